@@ -11,4 +11,5 @@ db_name = os.getenv("db_name")
 db_host = os.getenv("db_host","localhost")
 
 base_url = f"postgresql://{db_user}:{db_pswd}@{db_host}:{db_port}/{db_name}"
+base_url = os.getenv("DATABASE_URL", base_url)  # full URL override (e.g. sqlite for the benchmark harness)
 
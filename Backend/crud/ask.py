@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from Backend.services.ask_service import process_query
+from Backend.services.ask_service import process_query, process_query_batch
 
 def get_answer(query: str, user_id: int, db: Session) -> str:
     """
@@ -7,4 +7,11 @@ def get_answer(query: str, user_id: int, db: Session) -> str:
     Delegates actual logic to ask_service.
     """
     
-    return process_query(query, user_id, db)
\ No newline at end of file
+    return process_query(query, user_id, db)
+
+
+def get_answers_batch(queries: list, user_id: int, db: Session) -> tuple:
+    """
+    CRUD wrapper for answering many queries at once, (answers, errors) in the same order.
+    """
+    return process_query_batch(queries, user_id, db)
@@ -0,0 +1,26 @@
+from sqlalchemy.orm import Session
+from Backend.services import chat_service
+
+
+def create_session(db: Session, user_id: int, title: str = None):
+    return chat_service.create_session(db, user_id, title)
+
+
+def get_session(db: Session, session_id: int, user_id: int):
+    return chat_service.get_session(db, session_id, user_id)
+
+
+def list_sessions(db: Session, user_id: int) -> list:
+    return chat_service.list_sessions(db, user_id)
+
+
+def delete_session(db: Session, session_id: int, user_id: int) -> bool:
+    return chat_service.delete_session(db, session_id, user_id)
+
+
+def ask_in_session(session_id: int, query: str, user_id: int, db: Session):
+    """
+    CRUD wrapper for one chat turn, delegates to chat_service.
+    Returns None when the session does not belong to the user.
+    """
+    return chat_service.process_chat_query(session_id, query, user_id, db)
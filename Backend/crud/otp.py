@@ -1,9 +1,30 @@
+import os
 import random
 from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from Backend.models import OTPReset
 from Backend.dependencies.password import hash_password, verify_password
-from Backend.services.email_service import send_otp_email
+from Backend.services.email_service import enqueue_otp_email, outbox_sender
+from Backend.services.scheduler import RateLimiter, AdmissionRejected
+
+OTP_REQUESTS_PER_HOUR = float(os.getenv("OTP_REQUESTS_PER_HOUR", 10))   # per email, once the burst is used up
+OTP_REQUEST_BURST = float(os.getenv("OTP_REQUEST_BURST", 3))
+OTP_VERIFY_PER_HOUR = float(os.getenv("OTP_VERIFY_PER_HOUR", 20))       # reset attempts per email
+OTP_VERIFY_BURST = float(os.getenv("OTP_VERIFY_BURST", 5))
+OTP_PURGE_BATCH_SIZE = int(os.getenv("OTP_PURGE_BATCH_SIZE", 5000))
+
+# Per email (and per worker), checked before any Argon2 hashing or verification
+otp_request_limiter = RateLimiter(OTP_REQUESTS_PER_HOUR / 3600, OTP_REQUEST_BURST)
+otp_verify_limiter = RateLimiter(OTP_VERIFY_PER_HOUR / 3600, OTP_VERIFY_BURST)
+
+
+def check_rate(limiter: RateLimiter, email: str) -> None:
+    """
+    Raises AdmissionRejected (with the seconds to wait) when the email is over its limit.
+    """
+    wait = limiter.take(email.strip().lower())
+    if wait > 0:
+        raise AdmissionRejected("Too many requests for this email, try again later.", wait)
 
 
 def create_otp(db: Session, email: str):
@@ -12,8 +33,11 @@ def create_otp(db: Session, email: str):
 
 def generate_and_store_otp(db: Session, email: str) -> dict:
     """
-    Generate OTP, hash it, store in DB, and send via email.
+    Generate OTP, hash it, store in DB, and queue the email in the outbox.
+    The background sender delivers it, so the request doesn't wait on SMTP.
+    Raises AdmissionRejected when the email asked for too many OTPs.
     """
+    check_rate(otp_request_limiter, email)
 
     # 1. Generate 6-digit numeric OTP
     otp = str(random.randint(100000, 999999))
@@ -39,10 +63,11 @@ def generate_and_store_otp(db: Session, email: str) -> dict:
     )
 
     db.add(otp_entry)
-    db.commit()
 
-    # 6. Send OTP via email
-    send_otp_email(email, otp)
+    # 6. Queue OTP email in the same transaction and wake up the sender
+    enqueue_otp_email(db, email, otp, expires_at)
+    db.commit()
+    outbox_sender.notify()
 
     return {"message": "If the email exists, an OTP has been sent"}
 
@@ -50,8 +75,9 @@ def generate_and_store_otp(db: Session, email: str) -> dict:
 def verify_otp(db: Session, email: str, otp: str):
     """
     Verify OTP validity.
-    Raises ValueError if invalid.
+    Raises ValueError if invalid, AdmissionRejected after too many attempts.
     """
+    check_rate(otp_verify_limiter, email)
 
     otp_entry = db.query(OTPReset).filter(
         OTPReset.email == email,
@@ -72,3 +98,15 @@ def verify_otp(db: Session, email: str, otp: str):
     # Mark OTP as used
     otp_entry.used = True
     db.commit()
+
+
+def purge_expired_otps(db: Session, before: datetime, batch_size: int = OTP_PURGE_BATCH_SIZE) -> int:
+    """
+    Delete up to batch_size OTPs that expired before `before` (one short
+    transaction). Returns the number of rows deleted.
+    """
+    ids = [row.id for row in db.query(OTPReset.id).filter(OTPReset.expires_at < before).limit(batch_size)]
+    if ids:
+        db.query(OTPReset).filter(OTPReset.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(ids)
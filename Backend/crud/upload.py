@@ -1,10 +1,17 @@
 from sqlalchemy.orm import Session
 from Backend.models.document import Document
-from Backend.services.upload_service import process_upload
+from Backend.services.upload_service import process_upload, process_bulk_upload
 
 def create_document(file_content: str, filename: str, user_id: int, db: Session) -> Document:
     """
     CRUD function to handle document creation.
     Delegates the actual processing to upload_service.
     """
-    return process_upload(file_content, filename, user_id, db)
\ No newline at end of file
+    return process_upload(file_content, filename, user_id, db)
+
+
+def create_documents_bulk(files: list, user_id: int, db: Session) -> list:
+    """
+    CRUD function for bulk uploads, files is a list of (filename, bytes).
+    """
+    return process_bulk_upload(files, user_id, db)
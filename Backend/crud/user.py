@@ -17,8 +17,19 @@ def create_user(user, db: Session):
     db.refresh(new_user)
     return new_user
 
-def get_all_users(db: Session):
-    return db.query(User).all()
+def get_users_page(db: Session, limit: int, after_id: int = 0):
+    """
+    One page of users ordered by id, starting after after_id (keyset pagination,
+    so every page is a primary key range scan however deep it is). Only the
+    listed columns are selected, never hashed_password.
+    """
+    return (
+        db.query(User.id, User.name, User.email, User.role)
+        .filter(User.id > after_id)
+        .order_by(User.id)
+        .limit(limit)
+        .all()
+    )
 
 
 def reset_password(db: Session, email: str, otp: str, new_password: str):
@@ -4,14 +4,18 @@ engine
 session
 Base
 get_db FASTAPI dependency
+ensure_schema for tables created before a column/index was added
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from Backend.config import base_url
 
-Engine = create_engine(base_url)#connnects to db
+# sqlite (benchmarks) connections are shared with FastAPI's threadpool
+connect_args = {"check_same_thread": False} if base_url.startswith("sqlite") else {}
+Engine = create_engine(base_url, connect_args=connect_args)#connnects to db
 session_local = sessionmaker(bind=Engine)#Handles db operations
 Base = declarative_base() #Registry of ORM models
 
@@ -22,4 +26,54 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()    
\ No newline at end of file
+        db.close()
+
+
+def ensure_schema(bind=Engine) -> None:
+    """
+    create_all only creates missing tables. For existing tables add the
+    nullable columns and the indexes that were added to the models later.
+    Every uvicorn worker runs this at boot, so the statements are IF NOT
+    EXISTS and a worker losing the race to another one carries on. On
+    PostgreSQL indexes are built CONCURRENTLY so large tables (otp_reset)
+    keep taking writes meanwhile.
+    """
+    postgres = bind.dialect.name == "postgresql"
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns and column.nullable:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    if_not_exists = "IF NOT EXISTS " if postgres else ""     # sqlite has no ADD COLUMN IF NOT EXISTS
+                    _run_ddl(
+                        conn,
+                        f'ALTER TABLE {table.name} ADD COLUMN {if_not_exists}{column.name} {column_type}',
+                        lambda: column.name in {c["name"] for c in inspect(bind).get_columns(table.name)},
+                    )
+            indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in indexes:
+                    continue
+                unique = "UNIQUE " if index.unique else ""
+                concurrently = "CONCURRENTLY " if postgres else ""
+                _run_ddl(
+                    conn,
+                    f'CREATE {unique}INDEX {concurrently}IF NOT EXISTS {index.name} '
+                    f'ON {table.name} ({", ".join(c.name for c in index.columns)})',
+                    lambda: index.name in {i["name"] for i in inspect(bind).get_indexes(table.name)},
+                )
+
+
+def _run_ddl(conn, statement: str, exists) -> None:
+    # Another worker may have run the same statement in between, that is fine
+    try:
+        conn.execute(text(statement))
+    except DBAPIError:
+        if not exists():
+            raise
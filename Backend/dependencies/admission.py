@@ -0,0 +1,35 @@
+import math
+from fastapi import Depends, HTTPException
+from Backend.models import User
+from Backend.dependencies.jwt_dependency import require_user
+from Backend.services.scheduler import scheduler, AdmissionRejected
+
+
+def too_many_requests(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(math.ceil(e.retry_after))},
+    )
+
+
+def _one() -> int:
+    return 1
+
+
+# Admission control: the request waits for a scheduler slot of its work class
+# ("ask" or "ingest") and holds it until the response is done. Rejections
+# become 429 with a Retry-After header (see services/scheduler.py).
+# cost is a dependency returning the rate limit tokens the request takes,
+# e.g. the number of questions read from the body; one token by default.
+def admission(work_class: str, cost=_one):
+    async def dependency(current_user: User = Depends(require_user), tokens: int = Depends(cost)):
+        try:
+            token = await scheduler.acquire(work_class, current_user.id, cost=tokens)
+        except AdmissionRejected as e:
+            raise too_many_requests(e)
+        try:
+            yield
+        finally:
+            scheduler.release(token)
+    return dependency
@@ -0,0 +1,10 @@
+from typing import Optional
+from fastapi import Header
+from Backend.services.metrics import request_profiling
+
+
+# Per-request profiling switch: send "X-Profile: 1" (only honoured when PROFILING_ENABLED=true).
+# async so the flag is set in the request's own context and reaches the service code.
+async def profile_switch(x_profile: Optional[str] = Header(default=None)):
+    if x_profile and x_profile.lower() in ("1", "true", "yes"):
+        request_profiling()
@@ -2,4 +2,5 @@ from .user import User
 from .user_stat import UserStats
 from .document import Document
 from .otp_reset import OTPReset
-
+from .email_outbox import EmailOutbox
+from .chat import ChatSession, ChatTurn
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, JSON, LargeBinary
+from sqlalchemy.orm import relationship
+from Backend.database.database import Base
+from datetime import datetime, timezone
+
+
+class ChatSession(Base):
+    __tablename__ = "chat_sessions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    title = Column(String, nullable=False)
+    summary = Column(Text, nullable=True)                   # running summary of the turns older than the recent window
+    summarized_turns = Column(Integer, nullable=False, default=0)   # how many turns the summary covers
+    last_query_embedding = Column(LargeBinary, nullable=True)       # float32 bytes, to detect close follow-ups
+    last_chunk_ids = Column(JSON, nullable=True)            # chunk ids used by the last turn
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    turns = relationship("ChatTurn", back_populates="session", order_by="ChatTurn.id", cascade="all, delete-orphan")
+
+
+class ChatTurn(Base):
+    __tablename__ = "chat_turns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    question = Column(Text, nullable=False)
+    answer = Column(Text, nullable=False)
+    chunk_ids = Column(JSON, nullable=True)
+    reused_context = Column(Boolean, nullable=False, default=False)  # chunks of the previous turn were reused
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    latency_ms = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    session = relationship("ChatSession", back_populates="turns")
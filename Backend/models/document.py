@@ -9,9 +9,10 @@ class Document(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     upload_date = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))#- timestamp is evaluated at insertion time,
-    
+    chunk_count = Column(Integer, nullable=True)    # chunks stored in the vector index (NULL for older rows)
+
 
     # Relationship back to User
     user = relationship("User", back_populates="documents")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Boolean,DateTime
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Boolean,DateTime, Index
 from Backend.database.database import Base
 
 class OTPReset(Base):
@@ -8,4 +8,11 @@ class OTPReset(Base):
     email = Column(String, nullable=False)
     otp_hash = Column(Text, nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)  #column will store timezone‑aware datetime values
-    used = Column(Boolean, default=False)
\ No newline at end of file
+    used = Column(Boolean, default=False)
+
+    # verify_otp asks for "the newest unused OTP of an email", generate_and_store_otp
+    # updates the unused OTPs of an email; the purge deletes by expiry.
+    __table_args__ = (
+        Index("ix_otp_reset_email_used_expires", "email", "used", "expires_at"),
+        Index("ix_otp_reset_expires_at", "expires_at"),
+    )
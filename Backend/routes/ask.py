@@ -1,14 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from Backend.database.database import get_db
 from Backend.models.user import User
-from Backend.schemas.ask import AskResponse, AskRequest
-from Backend.crud.ask import get_answer
+from Backend.schemas.ask import AskResponse, AskRequest, AskBatchRequest, AskBatchResponse
+from Backend.crud.ask import get_answer, get_answers_batch
 from Backend.dependencies.jwt_dependency import require_user
+from Backend.dependencies.profiling import profile_switch
+from Backend.dependencies.admission import admission
+from Backend.services.llm_gateway import LLMError, LLMTimeoutError
+from Backend.services.ask_service import ASK_BATCH_MAX
 
-router = APIRouter(prefix="/ask", tags=["ask"])
+router = APIRouter(prefix="/ask", tags=["ask"], dependencies=[Depends(profile_switch)])
 
-@router.post("/", response_model=AskResponse)
+
+def batch_cost(payload: AskBatchRequest) -> int:
+    # A batch takes one rate limit token per question
+    return min(len(payload.queries), ASK_BATCH_MAX)
+
+@router.post("/", response_model=AskResponse, dependencies=[Depends(admission("ask"))])
 async def ask_question(
     payload: AskRequest,   # 👈 expects JSON body { "query": "..." }
     current_user: User = Depends(require_user),   # enforce JWT
@@ -21,8 +31,37 @@ async def ask_question(
     - Delegates to CRUD/service for retrieval + LLM response
     """
     try:
-        answer = get_answer(payload.query, current_user.id, db)
+        # In the threadpool: blocking here would stall the event loop and every queued request
+        answer = await run_in_threadpool(get_answer, payload.query, current_user.id, db)
         return {"answer": answer}
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except LLMError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch", response_model=AskBatchResponse, dependencies=[Depends(admission("ask", cost=batch_cost))])
+async def ask_questions_batch(
+    payload: AskBatchRequest,   # expects JSON body { "queries": ["...", "..."] }
+    current_user: User = Depends(require_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Answers several questions in one request, answers are returned in order.
+    A failed question has a null answer and its error, the batch only fails
+    (503 / 504) when every question did.
+    Embedding is done in one call and retrieval / LLM calls run concurrently.
+    """
+    try:
+        answers, errors = await run_in_threadpool(get_answers_batch, payload.queries, current_user.id, db)
+        return {"answers": answers, "errors": errors}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except LLMError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -7,6 +7,8 @@ from Backend.schemas.auth import TokenResponse, RefreshRequest
 from Backend.schemas.otp_reset import OTPResetCreate, OTPResetResponse,OTPResetRequest
 from Backend.crud import user as user_crud, otp as otp_crud
 from Backend.crud.auth import authenticate_user, refresh_access_token
+from Backend.dependencies.admission import too_many_requests
+from Backend.services.scheduler import AdmissionRejected
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -27,11 +29,17 @@ def refresh_token(body: RefreshRequest, db: Session = Depends(get_db)):
 
 @router.post("/forgot-password")
 def forgot_password(request: OTPResetCreate, db: Session = Depends(get_db)):
-    return otp_crud.create_otp(db, request.email)
+    try:
+        return otp_crud.create_otp(db, request.email)
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
 
 @router.post("/reset-password")
 def reset_password(request: OTPResetRequest, db: Session = Depends(get_db)):
-    return user_crud.reset_password(db, request.email, request.otp, request.new_password)
+    try:
+        return user_crud.reset_password(db, request.email, request.otp, request.new_password)
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
 
 # router = APIRouter(prefix="/auth", tags=["Auth"])
 
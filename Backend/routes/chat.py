@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List
+from Backend.database.database import get_db
+from Backend.models.user import User
+from Backend.schemas.chat import (
+    ChatSessionCreate, ChatSessionResponse, ChatSessionDetail, ChatAskRequest, ChatAskResponse
+)
+from Backend.crud import chat
+from Backend.dependencies.jwt_dependency import require_user
+from Backend.dependencies.profiling import profile_switch
+from Backend.dependencies.admission import admission
+from Backend.services.llm_gateway import LLMError, LLMTimeoutError
+
+router = APIRouter(prefix="/chat", tags=["chat"], dependencies=[Depends(profile_switch)])
+
+
+@router.post("/sessions", response_model=ChatSessionResponse)
+def create_session(
+    payload: ChatSessionCreate,
+    current_user: User = Depends(require_user),
+    db: Session = Depends(get_db)
+):
+    return chat.create_session(db, current_user.id, payload.title)
+
+
+@router.get("/sessions", response_model=List[ChatSessionResponse])
+def list_sessions(current_user: User = Depends(require_user), db: Session = Depends(get_db)):
+    return chat.list_sessions(db, current_user.id)
+
+
+@router.get("/sessions/{session_id}", response_model=ChatSessionDetail)
+def get_session(session_id: int, current_user: User = Depends(require_user), db: Session = Depends(get_db)):
+    session = chat.get_session(db, session_id, current_user.id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return session
+
+
+@router.delete("/sessions/{session_id}")
+def delete_session(session_id: int, current_user: User = Depends(require_user), db: Session = Depends(get_db)):
+    if not chat.delete_session(db, session_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return {"message": "Chat session deleted"}
+
+
+@router.post("/sessions/{session_id}/ask", response_model=ChatAskResponse, dependencies=[Depends(admission("ask"))])
+async def ask_in_session(
+    session_id: int,
+    payload: ChatAskRequest,   # expects JSON body { "query": "..." }
+    current_user: User = Depends(require_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Ask a follow-up inside a chat session. Earlier turns are remembered
+    (recent ones verbatim, older ones as a running summary).
+    """
+    try:
+        result = await run_in_threadpool(chat.ask_in_session, session_id, payload.query, current_user.id, db)
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except LLMError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return result
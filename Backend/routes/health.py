@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException
+from Backend.services import clients
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live")
+def live():
+    # Process is up and serving requests (heavy clients may still be loading)
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def ready():
+    status = clients.is_ready()
+    if not all(status.values()):
+        raise HTTPException(status_code=503, detail=status)
+    return {"status": "ready", "clients": status}
+
+
+@router.post("/warmup")
+def warmup():
+    """
+    Loads the embedding model and connects Pinecone / Groq if not done yet.
+    Runs in the threadpool, so a cold worker can be warmed before taking traffic.
+    """
+    try:
+        return {"status": "ready", "clients": clients.warmup()}
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
@@ -1,36 +1,73 @@
 from fastapi import APIRouter, UploadFile, Depends, HTTPException, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from typing import List
 from Backend.database.database import get_db
 from Backend.models.user import User
-from Backend.schemas.document import DocumentResponse
-from Backend.crud.upload import create_document
-from Backend.services.upload_service import extract_text_from_pdf, extract_text_from_docx
+from Backend.schemas.document import DocumentResponse, BulkUploadResponse
+from Backend.crud.upload import create_document, create_documents_bulk
+from Backend.services.upload_service import extract_in_pool, expand_archives, BULK_MAX_FILES
 from Backend.dependencies.jwt_dependency import require_user
+from Backend.dependencies.profiling import profile_switch
+from Backend.dependencies.admission import admission
 
-router = APIRouter(prefix="/upload", tags=["upload"])
+router = APIRouter(prefix="/upload", tags=["upload"], dependencies=[Depends(profile_switch)])
 
-@router.post("/", response_model=DocumentResponse)
+
+def bulk_cost(files: List[UploadFile] = File(...)) -> int:
+    # A bulk upload takes one rate limit token per uploaded file (an archive counts once)
+    return min(len(files), BULK_MAX_FILES)
+
+@router.post("/", response_model=DocumentResponse, dependencies=[Depends(admission("ingest"))])
 async def upload_file(
     file: UploadFile = File(...),  # 👈 file upload  tells FastAPI the type of data you expect (an uploaded file object).
     current_user: User = Depends(require_user),   # 👈 enforce JWT
     db: Session = Depends(get_db)
 ):
+    content = await file.read()
+
+    # PDF, DOCX, TXT and Markdown, detected from the content (see services/extractors.py)
     try:
-        content = await file.read()
-
-        # Only allow PDF and DOCX
-        if file.filename.endswith(".pdf"):
-            text = extract_text_from_pdf(content)
-        elif file.filename.endswith(".docx"):
-            text = extract_text_from_docx(content)
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Only PDF and DOCX files are supported."
-            )
-        # Save document tied to authenticated user
-        doc = create_document(text, file.filename, current_user.id, db)
+        text = await run_in_threadpool(extract_in_pool, file.filename, content)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Could not extract text from the file.")
+
+    try:
+        # Save document tied to authenticated user, in the threadpool: embedding blocks
+        doc = await run_in_threadpool(create_document, text, file.filename, current_user.id, db)
         return doc
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/bulk", response_model=BulkUploadResponse, dependencies=[Depends(admission("ingest", cost=bulk_cost))])
+async def upload_files_bulk(
+    files: List[UploadFile] = File(...),  # several PDF / DOCX / TXT / Markdown files and/or .zip archives of them
+    current_user: User = Depends(require_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload many documents in one request. Returns a status per file,
+    a failing file does not fail the others.
+    """
+    try:
+        contents = [(file.filename, await file.read()) for file in files]
+        contents = expand_archives(contents)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid archive.")
+    if not contents:
+        raise HTTPException(status_code=400, detail="No supported files found.")
+
+    try:
+        # Runs in the threadpool so a large batch doesn't block other requests
+        results = await run_in_threadpool(create_documents_bulk, contents, current_user.id, db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    uploaded = sum(1 for r in results if r["status"] == "uploaded")
+    return {"uploaded": uploaded, "failed": len(results) - uploaded, "results": results}
@@ -1,15 +1,40 @@
-from fastapi import APIRouter, Depends
+import os
+import orjson
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
 from Backend.database.database import get_db
-from Backend.schemas.user import UserResponse
+from Backend.schemas.user import UserPage
 from Backend.crud import user as user_crud
-from Backend.dependencies.jwt_dependency import get_current_user
+from Backend.dependencies.jwt_dependency import require_admin
 from Backend.models import User
 
+USERS_PAGE_SIZE = int(os.getenv("USERS_PAGE_SIZE", 100))        # default page size of /users/all
+USERS_PAGE_MAX = int(os.getenv("USERS_PAGE_MAX", 1000))
+USERS_STREAM_BATCH = 200                                        # users serialized per chunk written
+
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
-@router.get("/all", response_model=List[UserResponse])
-def get_all_users(db: Session = Depends(get_db)):
-    return user_crud.get_all_users(db)
\ No newline at end of file
+def _stream_page(rows: list, next_after_id):
+    """Serialize a UserPage with orjson, a batch of users per chunk."""
+    yield b'{"users":['
+    for start in range(0, len(rows), USERS_STREAM_BATCH):
+        batch = rows[start:start + USERS_STREAM_BATCH]
+        body = b",".join(
+            orjson.dumps({"id": r.id, "name": r.name, "email": r.email, "role": r.role}) for r in batch
+        )
+        yield body if start == 0 else b"," + body
+    yield b'],"next_after_id":' + orjson.dumps(next_after_id) + b"}"
+
+
+@router.get("/all", response_model=None, responses={200: {"model": UserPage}})
+def get_all_users(
+    limit: int = Query(USERS_PAGE_SIZE, ge=1, le=USERS_PAGE_MAX),
+    after_id: int = Query(0, ge=0, description="next_after_id of the previous page"),
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    rows = user_crud.get_users_page(db, limit, after_id)
+    next_after_id = rows[-1].id if len(rows) == limit else None
+    return StreamingResponse(_stream_page(rows, next_after_id), media_type="application/json")
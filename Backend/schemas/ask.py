@@ -1,7 +1,17 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from Backend.services.ask_service import ASK_BATCH_MAX
 
 class AskResponse(BaseModel):
     answer: str
 
 class AskRequest(BaseModel):
     query: str
+
+class AskBatchRequest(BaseModel):
+    # Validated before admission, so an oversized batch is rejected without taking tokens
+    queries: List[str] = Field(..., min_length=1, max_length=ASK_BATCH_MAX)
+
+class AskBatchResponse(BaseModel):
+    answers: List[Optional[str]]        # None where the question failed
+    errors: List[Optional[str]]         # error message per question, None when answered
@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class ChatSessionCreate(BaseModel):
+    title: Optional[str] = None
+
+class ChatSessionResponse(BaseModel):
+    id: int
+    title: str
+    summary: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ChatTurnResponse(BaseModel):
+    id: int
+    question: str
+    answer: str
+    reused_context: bool
+    prompt_tokens: Optional[int] = None
+    latency_ms: Optional[float] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ChatSessionDetail(ChatSessionResponse):
+    turns: List[ChatTurnResponse]
+
+class ChatAskRequest(BaseModel):
+    query: str
+
+class ChatAskResponse(BaseModel):
+    answer: str
+    turn_id: Optional[int] = None
+    reused_context: bool
+    prompt_tokens: Optional[int] = None
+    latency_ms: Optional[float] = None
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Literal, Optional
 
 class CreateDocument(BaseModel):
     filename: str
@@ -13,4 +14,17 @@ class DocumentResponse(BaseModel):
     upload_date: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BulkUploadFileResult(BaseModel):
+    filename: str
+    status: Literal["uploaded", "failed"]
+    document_id: Optional[int] = None
+    chunks: int = 0
+    error: Optional[str] = None
+
+
+class BulkUploadResponse(BaseModel):
+    uploaded: int
+    failed: int
+    results: List[BulkUploadFileResult]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Literal
+from typing import List, Literal, Optional
 
 # Used when creating a user
 class UserCreate(BaseModel):
@@ -23,4 +23,8 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
   # Enable ORM mode for compatibility with ORM objects
-        # "It’s okay if the input is an ORM object — read its attributes just like a dict."
\ No newline at end of file
+        # "It’s okay if the input is an ORM object — read its attributes just like a dict."
+
+class UserPage(BaseModel):
+    users: List[UserResponse]
+    next_after_id: Optional[int] = None   # pass as after_id for the next page, None on the last page
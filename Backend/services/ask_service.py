@@ -1,29 +1,93 @@
 import os
-from dotenv import load_dotenv
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from sqlalchemy.orm import Session
-from Backend.models.document import Document
-from groq import Groq
-from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
-from Backend.models import UserStats,Document
+from Backend.models import UserStats
+from Backend.services.clients import encode_texts, get_index, get_llm_gateway
+from Backend.services.rerank_service import RERANK_ENABLED, RERANK_CANDIDATES, rerank
+from Backend.services.metrics import stage, profiled, CHUNKS, LLM_TOKENS
+from Backend.services.catalogue import Catalogue, catalogue_cache
 
-# Load environment variables
-load_dotenv()
-key = os.getenv("db_key")          # Pinecone API key
-index_name = os.getenv("index_name")
-g_key = os.getenv("api_key")       # Groq API key
+NO_DOCUMENTS_MESSAGE = "No documents found for this user. Please upload documents first."
+ASK_BATCH_MAX = int(os.getenv("ASK_BATCH_MAX", 50))                 # questions per batch request
+ASK_BATCH_WORKERS = int(os.getenv("ASK_BATCH_WORKERS", 16))         # concurrent retrieval + LLM jobs
+ASK_LLM_CONCURRENCY = int(os.getenv("ASK_LLM_CONCURRENCY", 8))      # concurrent LLM calls for batch questions
 
-# Initialize Pinecone client
-pc = Pinecone(api_key=key)
-index = pc.Index(index_name)
+_batch_pool = ThreadPoolExecutor(max_workers=ASK_BATCH_WORKERS, thread_name_prefix="ask-batch")
+_llm_slots = threading.BoundedSemaphore(ASK_LLM_CONCURRENCY)
+_inflight = {}          # (document set fingerprint, normalized question) -> Future of the answer
+_inflight_lock = threading.Lock()
 
-# Initialize Groq client
-groq_client = Groq(api_key=g_key)
 
-# Initialize SentenceTransformer for embeddings
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+def retrieve(query: str, query_embedding: list, user_id: int) -> list:
+    """
+    Search Pinecone for the user's chunks (wider candidate set when the reranker picks the final chunks).
+    """
+    with stage("ask", "retrieve"):
+        results = get_index().query(
+            vector=query_embedding,
+            top_k=RERANK_CANDIDATES if RERANK_ENABLED else 5,
+            include_metadata=True,              # Include metadata in the results like chunk text, filename etc
+            filter={"user_id": user_id}         # Ensures only this user’s documents are searched.
+        )
+    matches = results["matches"]
+
+    # Optional: score (query, chunk) pairs with the cross-encoder and keep only the best few
+    if RERANK_ENABLED:
+        with stage("ask", "rerank"):
+            matches = rerank(query, matches)
+    CHUNKS.inc(len(matches), pipeline="ask")
+    return matches
+
+
+def build_prompt(query: str, matches: list) -> str:
+    # Build context from retrieved chunks
+    context = ""
+    for match in matches:            #  list of the top chunks that matched the query
+        chunk_text = match["metadata"]["chunk"]
+        context += chunk_text + "\n"
+
+    return (
+    f"Answer the following question based on the provided context.\n\n"
+    f"Context:\n{context}\n\n"
+    f"Question: {query}\n\n"
+    f"If the context does not contain relevant information, "
+    f"clearly state: 'I am unable to find data related to the query.'"
+   )
+
+
+def complete(prompt: str, pipeline: str = "ask"):
+    """
+    One LLM call through the gateway (timeouts, retries, fallback model),
+    returns (answer, usage). usage has prompt_tokens / completion_tokens.
+    """
+    with stage(pipeline, "llm"):
+        result = get_llm_gateway().complete(prompt)
+
+    if result.prompt_tokens is not None:
+        LLM_TOKENS.inc(result.prompt_tokens, type="prompt")
+    if result.completion_tokens is not None:
+        LLM_TOKENS.inc(result.completion_tokens, type="completion")
+    return result.content, result
+
+
+def ask_llm(prompt: str) -> str:
+    return complete(prompt)[0]
+
 
+def increment_questions(db: Session, user_id: int, count: int = 1) -> None:
+    # Increment question count in DB Class name: UserStats
+    with stage("ask", "stats_commit"):
+        stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
+        if not stats:
+            stats = UserStats(user_id=user_id, questions_asked_count=count)
+            db.add(stats)
+        else:
+            stats.questions_asked_count += count
+        db.commit()
 
+
+@profiled("ask")
 def process_query(query: str, user_id: int, db: Session) -> str:
     """
     Handles the full query workflow:
@@ -32,60 +96,100 @@ def process_query(query: str, user_id: int, db: Session) -> str:
     3. Build context from retrieved chunks
     4. Ask Groq LLM with context + query
     5. Increment user's question count in DB
+    Every step is timed into the rag_stage_duration_seconds histogram (see /metrics).
     """
-    doc_user = db.query(Document).filter(Document.user_id == user_id).all()
-    if not doc_user:
-        return "No documents found for this user. Please upload documents first."
+    with stage("ask", "document_check"):
+        catalogue = catalogue_cache.get(db, user_id)     # cached per user, no document rows loaded on a hit
+    if not catalogue:
+        return NO_DOCUMENTS_MESSAGE
     # 1. Embed query locally
-    query_embedding = embedder.encode(query).tolist()
+    with stage("ask", "embed"):
+        query_embedding = encode_texts([query])[0].tolist()
 
-    # 2. Search Pinecone
-    results = index.query(
-        vector=query_embedding,
-        top_k=5,
-        include_metadata=True,              # Include metadata in the results like chunk text, filename etc
-        filter={"user_id": user_id}         # Ensures only this user’s documents are searched.
-    )
+    # 2. + 3. Retrieve chunks and build the prompt
+    matches = retrieve(query, query_embedding, user_id)
+    prompt = build_prompt(query, matches)
 
-    # 3. Build context from retrieved chunks
-    context = ""
-    for match in results["matches"]:            #  results["matches"] list of the top‑k chunks that matched the query
-        chunk_text = match["metadata"]["chunk"]
-        context += chunk_text + "\n"
+    # 4. Ask Groq LLM
+    answer = ask_llm(prompt)
 
+    # 5. Increment question count
+    increment_questions(db, user_id)
 
-    # 4. Ask Groq LLM
-    prompt = (
-    f"Answer the following question based on the provided context.\n\n"
-    f"Context:\n{context}\n\n"
-    f"Question: {query}\n\n"
-    f"If the context does not contain relevant information, "
-    f"clearly state: 'I am unable to find data related to the query.'"
-   ) 
+    return answer
 
-    chat_response = groq_client.chat.completions.create(                #  chat.completions.create -> return multiple possible completions.
-        model="llama-3.3-70b-versatile",
-        messages=[{"role": "user", "content": prompt}]
-    )
 
-    """
-    .message contains dict like
-    {
-    "role": "assistant",
-    "content": "AI stands for Artificial Intelligence..."
-    }
+def _answer(query: str, query_embedding: list, user_id: int) -> str:
+    matches = retrieve(query, query_embedding, user_id)
+    prompt = build_prompt(query, matches)
+    with _llm_slots:                    # bounded parallelism towards the LLM provider
+        return ask_llm(prompt)
 
+
+def _shared_answer(catalogue: Catalogue, query: str, query_embedding: list) -> Future:
+    """
+    Identical questions over the same document set (catalogue fingerprint) that are
+    already being answered share the in-flight result instead of calling the LLM again.
+    Every document belongs to one user, so in practice only questions of the
+    same user are shared; two users never have the same document set.
     """
+    key = (catalogue.fingerprint, " ".join(query.lower().split()))
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+        future = _batch_pool.submit(_answer, query, query_embedding, catalogue.user_id)
+        _inflight[key] = future
 
-    answer = chat_response.choices[0].message.content
+    def forget(_):
+        with _inflight_lock:
+            if _inflight.get(key) is future:
+                del _inflight[key]
 
-    # 5. Increment question count in DB Class name: UserStats
-    stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
-    if not stats:
-        stats = UserStats(user_id=user_id, questions_asked_count=1)
-        db.add(stats)
-    else:
-        stats.questions_asked_count += 1
-    db.commit()
+    future.add_done_callback(forget)
+    return future
 
-    return answer
+
+@profiled("ask_batch")
+def process_query_batch(queries: list, user_id: int, db: Session) -> tuple:
+    """
+    Answers many questions at once, returns (answers, errors) in the same order:
+    1. One document check for the whole batch
+    2. All questions embedded in one call
+    3. Retrievals run concurrently, LLM calls with bounded parallelism,
+       duplicate questions (in this batch or in flight for the same documents) are answered once
+    4. Question count incremented once, for the answered questions
+    A failed question gets None as answer and the error message, the others
+    are still returned. Only when every question failed the first error is raised.
+    """
+    if len(queries) > ASK_BATCH_MAX:
+        raise ValueError(f"At most {ASK_BATCH_MAX} questions per batch.")
+    if not queries:
+        return [], []
+
+    with stage("ask", "document_check"):
+        catalogue = catalogue_cache.get(db, user_id)
+    if not catalogue:
+        return [NO_DOCUMENTS_MESSAGE] * len(queries), [None] * len(queries)
+
+    with stage("ask", "embed"):
+        embeddings = encode_texts(list(queries))
+
+    futures = [
+        _shared_answer(catalogue, query, embedding.tolist())
+        for query, embedding in zip(queries, embeddings)
+    ]
+    answers, errors, failures = [], [], []
+    for future in futures:
+        try:
+            answers.append(future.result())
+            errors.append(None)
+        except Exception as e:
+            answers.append(None)
+            errors.append(str(e) or type(e).__name__)
+            failures.append(e)
+    if len(failures) == len(queries):
+        raise failures[0]
+
+    increment_questions(db, user_id, len(queries) - len(failures))
+    return answers, errors
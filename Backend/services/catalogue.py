@@ -0,0 +1,104 @@
+import os
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+from Backend.models.document import Document
+from Backend.services.metrics import CACHE_REQUESTS
+
+CATALOGUE_CACHE_SIZE = int(os.getenv("CATALOGUE_CACHE_SIZE", 10000))     # users kept in memory
+CATALOGUE_TTL_SECONDS = float(os.getenv("CATALOGUE_TTL_SECONDS", 30))    # bounds staleness across workers
+
+
+class Catalogue:
+    """
+    The documents of one user: (id, version, chunk count) per document,
+    where the version is the upload date. key changes whenever a document
+    is added, re-uploaded or removed, so it can be part of cache keys.
+    fingerprint identifies the document set alone, without the user.
+    """
+
+    def __init__(self, user_id: int, documents: tuple):
+        self.user_id = user_id
+        self.documents = documents
+        self.fingerprint = hashlib.sha1(repr(documents).encode()).hexdigest()
+        self.key = hashlib.sha1(repr((user_id, self.fingerprint)).encode()).hexdigest()
+
+    def __bool__(self) -> bool:
+        return bool(self.documents)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @property
+    def chunk_count(self):
+        """Total chunks of the user, None if some older documents did not record it."""
+        counts = [d[2] for d in self.documents]
+        return None if None in counts else sum(counts)
+
+
+class CatalogueCache:
+    """
+    Thread-safe LRU of per-user catalogues. Uploads call invalidate() so the
+    next read reloads from the DB. Each worker has its own cache, entries
+    older than CATALOGUE_TTL_SECONDS are reloaded to pick up changes made by
+    other workers. Empty catalogues are never cached.
+    """
+
+    def __init__(self, max_size: int = CATALOGUE_CACHE_SIZE, ttl: float = CATALOGUE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()       # user_id -> (loaded_at, Catalogue)
+        self._loads = {}                    # user_id -> [loads in flight, invalidation count], guards against caching a stale load
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> Catalogue:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(user_id)
+                CACHE_REQUESTS.inc(cache="catalogue", result="hit")
+                return entry[1]
+            load = self._loads.setdefault(user_id, [0, 0])
+            load[0] += 1
+            generation = load[1]
+        CACHE_REQUESTS.inc(cache="catalogue", result="miss")
+
+        try:
+            rows = (
+                db.query(Document.id, Document.upload_date, Document.chunk_count)
+                .filter(Document.user_id == user_id)
+                .order_by(Document.id)
+                .all()
+            )
+            catalogue = Catalogue(user_id, tuple((r.id, r.upload_date.isoformat() if r.upload_date else None, r.chunk_count) for r in rows))
+            with self._lock:
+                if catalogue and load[1] == generation:
+                    self._entries[user_id] = (now, catalogue)
+                    self._entries.move_to_end(user_id)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+        finally:
+            with self._lock:
+                load[0] -= 1
+                if not load[0]:
+                    del self._loads[user_id]
+        return catalogue
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+            load = self._loads.get(user_id)
+            if load is not None:
+                load[1] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for load in self._loads.values():
+                load[1] += 1
+
+
+catalogue_cache = CatalogueCache()
@@ -0,0 +1,264 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy.orm import Session
+from Backend.models import ChatSession, ChatTurn
+from Backend.services.clients import encode_texts, get_index
+from Backend.services.ask_service import NO_DOCUMENTS_MESSAGE, retrieve, complete, increment_questions
+from Backend.services.catalogue import catalogue_cache
+from Backend.services.metrics import stage, profiled, CACHE_REQUESTS
+
+CHAT_REUSE_THRESHOLD = float(os.getenv("CHAT_REUSE_THRESHOLD", 0.8))     # cosine similarity to reuse the previous chunks
+CHAT_RECENT_TURNS = int(os.getenv("CHAT_RECENT_TURNS", 3))               # turns sent verbatim in the prompt
+CHAT_SUMMARY_BATCH = int(os.getenv("CHAT_SUMMARY_BATCH", 3))             # older turns folded into the summary at once
+CHAT_SUMMARY_MAX_CHARS = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", 1500))
+CHAT_ANSWER_MAX_CHARS = int(os.getenv("CHAT_ANSWER_MAX_CHARS", 600))     # per recent answer in the prompt
+CHAT_CHUNK_CACHE_SIZE = int(os.getenv("CHAT_CHUNK_CACHE_SIZE", 20000))
+
+Exchange = namedtuple("Exchange", "question answer")     # a stored turn, detached from the DB session
+
+logger = logging.getLogger("Backend.chat")
+
+
+class ChunkTextCache:
+    """
+    Thread-safe LRU of chunk id -> chunk text, so context reused by a
+    follow-up usually needs no index call at all.
+    """
+
+    def __init__(self, max_size: int = CHAT_CHUNK_CACHE_SIZE):
+        self.max_size = max_size
+        self._texts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, ids: list) -> dict:
+        found = {}
+        with self._lock:
+            for chunk_id in ids:
+                text = self._texts.get(chunk_id)
+                if text is not None:
+                    self._texts.move_to_end(chunk_id)
+                    found[chunk_id] = text
+        CACHE_REQUESTS.inc(len(found), cache="chat_chunks", result="hit")
+        CACHE_REQUESTS.inc(len(ids) - len(found), cache="chat_chunks", result="miss")
+        return found
+
+    def put_many(self, texts: dict) -> None:
+        with self._lock:
+            for chunk_id, text in texts.items():
+                self._texts[chunk_id] = text
+                self._texts.move_to_end(chunk_id)
+            while len(self._texts) > self.max_size:
+                self._texts.popitem(last=False)
+
+
+chunk_cache = ChunkTextCache()
+
+
+def _load_chunks(ids: list):
+    """Chunk texts for ids (cache first, then index.fetch). None if any chunk is gone."""
+    texts = chunk_cache.get_many(ids)
+    missing = [i for i in ids if i not in texts]
+    if missing:
+        with stage("chat", "fetch"):
+            fetched = get_index().fetch(ids=missing)["vectors"]
+        for chunk_id in missing:
+            if chunk_id not in fetched:
+                return None
+            texts[chunk_id] = fetched[chunk_id]["metadata"]["chunk"]
+        chunk_cache.put_many({i: texts[i] for i in missing})
+    return [texts[i] for i in ids]
+
+
+def _summarize(summary: str, turns: list) -> str:
+    exchanges = "\n".join(f"User: {t.question}\nAssistant: {t.answer}" for t in turns)
+    prompt = (
+        f"Update the running summary of a conversation about the user's documents. "
+        f"Keep facts, names and numbers the user may refer back to. "
+        f"Answer with the summary only, at most {CHAT_SUMMARY_MAX_CHARS // 6} words.\n\n"
+        f"Current summary:\n{summary or '(empty)'}\n\n"
+        f"New exchanges:\n{exchanges}\n\n"
+        f"Updated summary:"
+    )
+    with stage("chat", "summarize"):
+        text, _ = complete(prompt, pipeline="chat_summary")
+    return text.strip()[:CHAT_SUMMARY_MAX_CHARS]
+
+
+def build_chat_prompt(query: str, chunks: list, summary: str, recent: list) -> str:
+    parts = ["Answer the following question based on the provided context and the conversation so far.\n\n"]
+    if summary:
+        parts.append(f"Conversation summary:\n{summary}\n\n")
+    if recent:
+        history = "\n".join(
+            f"User: {t.question}\nAssistant: {t.answer[:CHAT_ANSWER_MAX_CHARS]}" for t in recent
+        )
+        parts.append(f"Recent conversation:\n{history}\n\n")
+    context = "".join(chunk + "\n" for chunk in chunks)
+    parts.append(
+        f"Context:\n{context}\n\n"
+        f"Question: {query}\n\n"
+        f"If the context does not contain relevant information, "
+        f"clearly state: 'I am unable to find data related to the query.'"
+    )
+    return "".join(parts)
+
+
+def create_session(db: Session, user_id: int, title: str = None) -> ChatSession:
+    session = ChatSession(user_id=user_id, title=title or "New chat")
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    return session
+
+
+def get_session(db: Session, session_id: int, user_id: int, for_update: bool = False):
+    """The session if it belongs to the user, else None."""
+    query = db.query(ChatSession).filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
+    if for_update:
+        query = query.with_for_update()         # one turn at a time per session
+    return query.first()
+
+
+def list_sessions(db: Session, user_id: int) -> list:
+    return db.query(ChatSession).filter(ChatSession.user_id == user_id).order_by(ChatSession.updated_at.desc()).all()
+
+
+def delete_session(db: Session, session_id: int, user_id: int) -> bool:
+    session = get_session(db, session_id, user_id)
+    if session is None:
+        return False
+    db.delete(session)
+    db.commit()
+    return True
+
+
+@profiled("chat")
+def process_chat_query(session_id: int, query: str, user_id: int, db: Session):
+    """
+    One turn of a chat session:
+    1. Read the session and the turns not covered by the summary, then release the DB connection
+    2. Embed the question, reuse the previous turn's chunks when it is close to
+       the question that retrieved them, otherwise retrieve again
+    3. Ask the LLM with summary + recent turns + context + question
+    4. Store the turn with its prompt tokens and latency (session row locked for this write only)
+    5. Fold turns older than the recent window into the running summary (every CHAT_SUMMARY_BATCH turns)
+    Returns None when the session does not exist for this user.
+    """
+    started = time.perf_counter()
+    session = get_session(db, session_id, user_id)
+    if session is None:
+        return None
+
+    with stage("chat", "document_check"):
+        catalogue = catalogue_cache.get(db, user_id)
+    if not catalogue:
+        return {"answer": NO_DOCUMENTS_MESSAGE, "turn_id": None, "reused_context": False,
+                "prompt_tokens": None, "latency_ms": None}
+
+    # 1. Turns not covered by the summary, the last CHAT_RECENT_TURNS go into the prompt
+    summary = session.summary
+    last_query_embedding, last_chunk_ids = session.last_query_embedding, session.last_chunk_ids
+    pending = _pending_exchanges(db, session)
+    recent = pending[-CHAT_RECENT_TURNS:] if CHAT_RECENT_TURNS else []
+    db.commit()                 # no connection is held during the LLM call
+
+    # 2. Reuse or retrieve the context
+    with stage("chat", "embed"):
+        query_embedding = encode_texts([query])[0].astype(np.float32)
+    chunk_ids, chunks = None, None
+    if last_query_embedding and last_chunk_ids:
+        anchor = np.frombuffer(last_query_embedding, dtype=np.float32)
+        if anchor.shape == query_embedding.shape:
+            similarity = float(anchor @ query_embedding) / (
+                float(np.linalg.norm(anchor) * np.linalg.norm(query_embedding)) or 1.0
+            )
+            if similarity >= CHAT_REUSE_THRESHOLD:
+                chunk_ids = list(last_chunk_ids)
+                chunks = _load_chunks(chunk_ids)
+    reused = chunks is not None
+    if not reused:
+        matches = retrieve(query, query_embedding.tolist(), user_id)
+        chunk_ids = [m["id"] for m in matches]
+        chunks = [m["metadata"]["chunk"] for m in matches]
+        chunk_cache.put_many(dict(zip(chunk_ids, chunks)))
+
+    # 3. Ask the LLM
+    prompt = build_chat_prompt(query, chunks, summary, recent)
+    answer, usage = complete(prompt, pipeline="chat")
+
+    # 4. Store the turn (increment_questions commits)
+    session = get_session(db, session_id, user_id, for_update=True)
+    if session is None:         # deleted while the question was answered
+        db.rollback()
+        return None
+    latency_ms = (time.perf_counter() - started) * 1000
+    turn = ChatTurn(
+        session_id=session.id,
+        question=query,
+        answer=answer,
+        chunk_ids=chunk_ids,
+        reused_context=reused,
+        prompt_tokens=getattr(usage, "prompt_tokens", None),
+        completion_tokens=getattr(usage, "completion_tokens", None),
+        latency_ms=round(latency_ms, 2),
+    )
+    db.add(turn)
+    if not reused:
+        # The question that retrieved the chunks stays the anchor, so a chain
+        # of small drifts cannot keep stale context forever
+        session.last_query_embedding = query_embedding.tobytes()
+        session.last_chunk_ids = chunk_ids
+    if session.title == "New chat":
+        session.title = query[:60]
+    session.updated_at = datetime.now(timezone.utc)
+    increment_questions(db, user_id)
+    result = {"answer": answer, "turn_id": turn.id, "reused_context": reused,
+              "prompt_tokens": turn.prompt_tokens, "latency_ms": turn.latency_ms}
+
+    # 5. The answer is stored, a failed summary call only postpones the roll-up
+    _roll_up_summary(db, session_id, user_id)
+    return result
+
+
+def _pending_exchanges(db: Session, session: ChatSession) -> list:
+    # Turns not covered by the summary, at most CHAT_RECENT_TURNS + CHAT_SUMMARY_BATCH of them
+    turns = (
+        db.query(ChatTurn.question, ChatTurn.answer)
+        .filter(ChatTurn.session_id == session.id)
+        .order_by(ChatTurn.id)
+        .offset(session.summarized_turns)
+        .all()
+    )
+    return [Exchange(t.question, t.answer) for t in turns]
+
+
+def _roll_up_summary(db: Session, session_id: int, user_id: int) -> None:
+    session = get_session(db, session_id, user_id)
+    if session is None:
+        return
+    pending = _pending_exchanges(db, session)
+    if len(pending) < CHAT_RECENT_TURNS + CHAT_SUMMARY_BATCH:
+        db.commit()
+        return
+    old = pending[:len(pending) - CHAT_RECENT_TURNS]
+    summarized_turns, summary = session.summarized_turns, session.summary
+    db.commit()
+    try:
+        summary = _summarize(summary, old)
+    except Exception:
+        logger.exception("Summarizing chat session %s failed, keeping the previous summary", session_id)
+        return
+
+    session = get_session(db, session_id, user_id, for_update=True)
+    # Another turn may have rolled the same turns up meanwhile
+    if session is not None and session.summarized_turns == summarized_turns:
+        session.summary = summary
+        session.summarized_turns += len(old)
+        db.commit()
+    else:
+        db.rollback()
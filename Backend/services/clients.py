@@ -0,0 +1,145 @@
+"""
+Shared clients for the services (embedding model, embedding store, vector index, LLM gateway).
+
+Nothing heavy is imported or connected at import time: torch / transformers /
+pinecone / httpx are only loaded the first time a client is asked for.
+The app lifespan calls warmup() once so the first request doesn't pay for it.
+"""
+
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+key = os.getenv("db_key")          # Pinecone API key
+index_name = os.getenv("index_name")
+g_key = os.getenv("api_key")       # Groq API key
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_SERVER_ADDRESS = os.getenv("EMBEDDING_SERVER_ADDRESS")   # use the shared embedding server if set
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")           # "pinecone" or "local"
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "float32")  # local backend: "float32", "int8" or "binary"
+VECTOR_RESCORE = os.getenv("VECTOR_RESCORE", "true").lower() == "true"
+VECTOR_RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", 4))
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR")             # persist chunk embeddings here, see embedding_store.py
+
+_lock = threading.RLock()     # re-entered when get_index rebuilds the local backend (store + embedder)
+_embedder = None
+_embedding_client = None
+_index = None
+_embedding_store = None
+_llm_gateway = None
+_cross_encoder = None
+
+
+def get_embedder():
+    global _embedder
+    if _embedder is None:
+        with _lock:
+            if _embedder is None:
+                from sentence_transformers import SentenceTransformer
+                _embedder = SentenceTransformer(EMBEDDING_MODEL)
+    return _embedder
+
+
+def get_embedding_client():
+    global _embedding_client
+    if _embedding_client is None:
+        with _lock:
+            if _embedding_client is None:
+                from Backend.services.embedding_server import EmbeddingClient
+                _embedding_client = EmbeddingClient(EMBEDDING_SERVER_ADDRESS)
+    return _embedding_client
+
+
+def encode_texts(texts: list):
+    """
+    Embed a list of texts, returns a (len(texts), dim) float32 numpy array.
+    Goes through the shared embedding server when EMBEDDING_SERVER_ADDRESS is set,
+    otherwise runs the model in this process.
+    """
+    if EMBEDDING_SERVER_ADDRESS:
+        return get_embedding_client().encode(texts)
+    return get_embedder().encode(texts, convert_to_numpy=True)
+
+
+def get_embedding_store():
+    """The persistent embedding store, None unless EMBEDDING_STORE_DIR is set."""
+    global _embedding_store
+    if _embedding_store is None and EMBEDDING_STORE_DIR:
+        with _lock:
+            if _embedding_store is None:
+                from Backend.services.embedding_store import EmbeddingStore
+                _embedding_store = EmbeddingStore(EMBEDDING_STORE_DIR, EMBEDDING_MODEL)
+    return _embedding_store
+
+
+def embed_chunks(texts: list):
+    """
+    encode_texts for document chunks: with the embedding store enabled, chunks
+    embedded before are read from disk and new ones are added to it.
+    """
+    store = get_embedding_store()
+    if store is None:
+        return encode_texts(texts)
+    return store.encode(texts, encode_texts)
+
+
+def get_cross_encoder():
+    global _cross_encoder
+    if _cross_encoder is None:
+        with _lock:
+            if _cross_encoder is None:
+                from sentence_transformers import CrossEncoder
+                _cross_encoder = CrossEncoder(RERANK_MODEL)
+    return _cross_encoder
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None and VECTOR_BACKEND == "local":
+                from Backend.services.vector_store import LocalVectorStore
+                index = LocalVectorStore(
+                    quantization=VECTOR_QUANTIZATION, rescore=VECTOR_RESCORE, rescore_factor=VECTOR_RESCORE_FACTOR
+                )
+                # The in-process index starts empty, refill it from the embedding store
+                if get_embedding_store() is not None:
+                    from Backend.services.embedding_store import rebuild_index
+                    rebuild_index(get_embedding_store(), index, encode_texts)
+                _index = index
+            elif _index is None:
+                from pinecone import Pinecone
+                pc = Pinecone(api_key=key)
+                _index = pc.Index(index_name)
+    return _index
+
+
+def get_llm_gateway():
+    # Groq through its OpenAI-compatible API, see llm_gateway.py
+    global _llm_gateway
+    if _llm_gateway is None:
+        with _lock:
+            if _llm_gateway is None:
+                from Backend.services.llm_gateway import create_gateway
+                _llm_gateway = create_gateway(g_key)
+    return _llm_gateway
+
+
+def is_ready() -> dict:
+    return {
+        "embedder": _embedder is not None or _embedding_client is not None,
+        "index": _index is not None,
+        "llm": _llm_gateway is not None,
+    }
+
+
+def warmup() -> dict:
+    """
+    Initialize every client once and run a dummy encode so model weights are loaded.
+    """
+    encode_texts(["warmup"])
+    get_index()
+    get_llm_gateway()
+    return is_ready()
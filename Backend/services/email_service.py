@@ -1,27 +1,48 @@
 from email.utils import formataddr
 import smtplib
 from email.message import EmailMessage # A helper class for constructing email messages (subject, sender, recipient, body).
+import logging
 import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from Backend.database.database import session_local
+from Backend.models import EmailOutbox
+from Backend.services.metrics import Counter
 
 SMTP_EMAIL = os.getenv("SMTP_EMAIL")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+SMTP_FROM = os.getenv("SMTP_FROM", SMTP_EMAIL or "no-reply@localhost")
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"  # set to false for a local stand-in such as aiosmtpd
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 10))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 2))
 
+# Outbox sender settings
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", 5))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", 30))
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", 3600))
+OUTBOX_RETENTION_SECONDS = float(os.getenv("OUTBOX_RETENTION_SECONDS", 3600))   # sent/failed rows kept this long
+OUTBOX_PURGE_INTERVAL_SECONDS = float(os.getenv("OUTBOX_PURGE_INTERVAL_SECONDS", 600))
+OUTBOX_PURGE_BATCH_SIZE = int(os.getenv("OUTBOX_PURGE_BATCH_SIZE", 1000))          # rows deleted per transaction
 
-def send_otp_email(to_email: str, otp: str) -> None:
-    """
-    Send OTP email from official email to user email.
-    """
+PURGED = Counter("email_outbox_purged_total", "Sent and failed outbox rows deleted")
 
-    msg = EmailMessage()
-    msg["Subject"] = "Password Reset OTP"
-    # msg["From"] = SMTP_EMAIL
-    msg["From"] = formataddr(("Support Team", SMTP_EMAIL))
-    msg["To"] = to_email
+logger = logging.getLogger("Backend.email_outbox")
 
-    msg.set_content(
-        f"""
+
+def build_otp_email(otp: str) -> tuple:
+    """
+    Return (subject, body) of the password reset email.
+    """
+    subject = "Password Reset OTP"
+    body = f"""
 Hello,
 
 Your One-Time Password (OTP) for password reset is:
@@ -34,13 +55,272 @@ If you did not request this, please ignore this email.
 Thanks,
 Support Team
 """
-    )
+    return subject, body
+
+
+def build_message(to_email: str, subject: str, body: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = formataddr(("Support Team", SMTP_FROM))
+    msg["To"] = to_email
+    msg.set_content(body)
+    return msg
+
+
+class SMTPConnectionPool:
+    """
+    Keeps a few authenticated SMTP connections open so that STARTTLS + login
+    is paid once per connection instead of once per email.
+    """
+
+    def __init__(self, size: int = SMTP_POOL_SIZE):
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)  #opens a connection to the SMTP server.
+        if SMTP_USE_TLS:
+            server.starttls()               # Secure connection, Upgrades the connection to a secure TLS channel.
+        if SMTP_EMAIL and SMTP_PASSWORD:
+            server.login(SMTP_EMAIL, SMTP_PASSWORD)
+        return server
+
+    def acquire(self) -> smtplib.SMTP:
+        # Reuse an idle connection if the server still answers, otherwise open a new one
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self.discard(server)
+
+    def release(self, server: smtplib.SMTP) -> None:
+        try:
+            self._idle.put_nowait(server)
+        except queue.Full:
+            self.discard(server)
+
+    def discard(self, server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self.discard(server)
+
+
+smtp_pool = SMTPConnectionPool()
+
+
+def send_otp_email(to_email: str, otp: str) -> None:
+    """
+    Send OTP email from official email to user email (synchronously).
+    Request handlers should use enqueue_otp_email instead.
+    """
+    subject, body = build_otp_email(otp)
+    msg = build_message(to_email, subject, body)
 
     try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:         #opens a connection to the SMTP server.
-            server.starttls()               # Secure connection, Upgrades the connection to a secure TLS channel.       
-            server.login(SMTP_EMAIL, SMTP_PASSWORD)         
+        server = smtp_pool.acquire()
+        try:
             server.send_message(msg)    #sends the constructed email message.
+        except Exception:
+            smtp_pool.discard(server)
+            raise
+        smtp_pool.release(server)
     except Exception as e:
         # Do NOT expose SMTP error details to user
         raise RuntimeError("Failed to send OTP email")
+
+
+def enqueue_otp_email(db: Session, to_email: str, otp: str, expires_at: datetime = None) -> EmailOutbox:
+    """
+    Store the OTP email in the outbox. The caller commits, so the email
+    is only sent if the OTP itself was stored. It is not sent (or retried)
+    after expires_at, the expiry of the OTP.
+    """
+    subject, body = build_otp_email(otp)
+    entry = EmailOutbox(
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+        expires_at=expires_at
+    )
+    db.add(entry)
+    return entry
+
+
+def _backoff(attempts: int) -> timedelta:
+    # Exponential backoff with jitter so failed emails don't retry in lockstep
+    delay = min(OUTBOX_BACKOFF_SECONDS * (2 ** (attempts - 1)), OUTBOX_MAX_BACKOFF_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _as_utc(value: datetime) -> datetime:
+    # sqlite hands back naive datetimes for timezone=True columns
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def send_pending_batch(db: Session, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Send one batch of due outbox emails over a pooled connection.
+    Pending emails past their expires_at are marked failed without sending.
+    Returns the number of rows processed (sent or rescheduled).
+    """
+    now = datetime.now(timezone.utc)
+
+    # Expired OTP emails are useless, drop them and their plain OTP
+    db.query(EmailOutbox).filter(
+        EmailOutbox.status == "pending",
+        EmailOutbox.expires_at < now
+    ).update({"status": "failed", "body": "", "last_error": "Expired"}, synchronize_session=False)
+
+    # skip_locked lets several workers drain the outbox without sending twice (PostgreSQL)
+    entries = db.query(EmailOutbox).filter(
+        EmailOutbox.status == "pending",
+        EmailOutbox.next_attempt_at <= now
+    ).order_by(EmailOutbox.next_attempt_at.asc()).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    if not entries:
+        db.commit()
+        return 0
+
+    server = None
+    for entry in entries:
+        try:
+            if server is None:
+                server = smtp_pool.acquire()
+            server.send_message(build_message(entry.to_email, entry.subject, entry.body))
+            entry.status = "sent"
+            entry.sent_at = datetime.now(timezone.utc)
+            entry.body = ""             # the body holds a plain OTP, don't keep it around
+            entry.last_error = None
+        except Exception as e:
+            if server is not None:
+                smtp_pool.discard(server)
+                server = None
+            entry.attempts += 1
+            entry.last_error = type(e).__name__
+            next_attempt_at = datetime.now(timezone.utc) + _backoff(entry.attempts)
+            if entry.attempts >= OUTBOX_MAX_ATTEMPTS or \
+                    (entry.expires_at is not None and next_attempt_at > _as_utc(entry.expires_at)):
+                entry.status = "failed"
+                entry.body = ""
+            else:
+                entry.next_attempt_at = next_attempt_at
+
+    if server is not None:
+        smtp_pool.release(server)
+    db.commit()
+    return len(entries)
+
+
+def purge_finished_emails(db: Session, before: datetime, batch_size: int) -> int:
+    """
+    Delete up to batch_size sent / failed emails created before `before`.
+    Returns the number of rows deleted.
+    """
+    ids = [
+        row.id for row in db.query(EmailOutbox.id)
+        .filter(EmailOutbox.status.in_(("sent", "failed")), EmailOutbox.created_at < before)
+        .limit(batch_size)
+    ]
+    if ids:
+        db.query(EmailOutbox).filter(EmailOutbox.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(ids)
+
+
+class OutboxSender:
+    """
+    Background thread draining the email outbox.
+    It wakes up every OUTBOX_POLL_SECONDS, or right away when notify() is called,
+    and deletes finished rows past OUTBOX_RETENTION_SECONDS every OUTBOX_PURGE_INTERVAL_SECONDS.
+    """
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._purged_at = 0.0
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+        smtp_pool.close_all()
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(OUTBOX_POLL_SECONDS)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception:
+                # A broken batch must not kill the sender, the rows are retried on the next poll
+                logger.exception("Sending the email outbox failed")
+            if time.monotonic() - self._purged_at >= OUTBOX_PURGE_INTERVAL_SECONDS:
+                self._purged_at = time.monotonic()
+                try:
+                    self.purge()
+                except Exception:
+                    logger.exception("Purging the email outbox failed")
+
+    def drain(self) -> int:
+        # Keep sending while full batches come back, the outbox may be backed up
+        total = 0
+        while not self._stopping.is_set():
+            db = session_local()
+            try:
+                processed = send_pending_batch(db)
+            finally:
+                db.close()
+            total += processed
+            if processed < OUTBOX_BATCH_SIZE:
+                break
+        return total
+
+    def purge(self, batch_size: int = OUTBOX_PURGE_BATCH_SIZE) -> int:
+        """Delete sent / failed emails past the retention, batch by batch. Returns the rows deleted."""
+        before = datetime.now(timezone.utc) - timedelta(seconds=OUTBOX_RETENTION_SECONDS)
+        total = 0
+        while not self._stopping.is_set():
+            db = session_local()
+            try:
+                deleted = purge_finished_emails(db, before, batch_size)
+            finally:
+                db.close()
+            total += deleted
+            PURGED.inc(deleted)
+            if deleted < batch_size:
+                break
+        return total
+
+
+outbox_sender = OutboxSender()
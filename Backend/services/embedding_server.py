@@ -0,0 +1,295 @@
+"""
+Out-of-process embedding server shared by all uvicorn workers.
+
+One process holds the SentenceTransformer model. API workers connect over a
+local socket (multiprocessing.connection, AF_UNIX) and every connection owns a
+shared-memory output buffer created by the client. Requests that arrive
+within EMBEDDING_MAX_WAIT_MS of each other are coalesced into one forward
+pass (dynamic micro-batching) and the vectors are written straight into each
+client's buffer, so no vectors are pickled over the socket.
+
+Run it with:
+
+    python -m Backend.services.embedding_server --address /tmp/embedding.sock
+
+and point the API at it with EMBEDDING_SERVER_ADDRESS=/tmp/embedding.sock.
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener, wait
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from Backend.services.metrics import HistogramValue
+
+EMBEDDING_SERVER_ADDRESS = os.getenv("EMBEDDING_SERVER_ADDRESS")
+EMBEDDING_SERVER_AUTHKEY = os.getenv("EMBEDDING_SERVER_AUTHKEY", "embedding-server").encode()
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", 64))        # texts per forward pass
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", 5))   # how long to wait for more requests
+EMBEDDING_BUFFER_ROWS = int(os.getenv("EMBEDDING_BUFFER_ROWS", 256))   # rows per client shared-memory buffer
+EMBEDDING_CLIENT_POOL = int(os.getenv("EMBEDDING_CLIENT_POOL", 4))     # connections per API worker
+
+
+class _Connection:
+    def __init__(self, conn, shm_name: str, rows: int, dim: int):
+        self.conn = conn
+        self.shm = SharedMemory(name=shm_name)
+        # The client owns (and unlinks) the segment, don't let our tracker unlink it too
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.out = np.ndarray((rows, dim), dtype=np.float32, buffer=self.shm.buf)
+
+    def close(self):
+        self.out = None
+        self.shm.close()
+        self.conn.close()
+
+
+class EmbeddingServer:
+    """
+    Accepts client connections and runs coalesced encode requests.
+    encode_fn takes a list of texts and returns a (n, dim) float32 array.
+    """
+
+    def __init__(self, address: str, encode_fn, dim: int,
+                 max_batch: int = EMBEDDING_MAX_BATCH, max_wait_ms: float = EMBEDDING_MAX_WAIT_MS):
+        self.address = address
+        self.encode_fn = encode_fn
+        self.dim = dim
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._connections = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.batch_size = HistogramValue([1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.queue_latency_ms = HistogramValue([0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000])
+        self.encode_latency_ms = HistogramValue([1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000])
+
+    def serve_forever(self) -> None:
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = Listener(self.address, family="AF_UNIX", authkey=EMBEDDING_SERVER_AUTHKEY)
+        threading.Thread(target=self._accept_loop, name="embedding-accept", daemon=True).start()
+        try:
+            self._batch_loop()
+        finally:
+            self._listener.close()
+            with self._lock:
+                for c in self._connections.values():
+                    c.close()
+                self._connections.clear()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self._connections),
+            "batch_size": self.batch_size.snapshot(),
+            "queue_latency_ms": self.queue_latency_ms.snapshot(),
+            "encode_latency_ms": self.encode_latency_ms.snapshot(),
+        }
+
+    def _accept_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                conn = self._listener.accept()
+                # Handshake: ("hello",) -> ("ok", dim), then ("buffer", shm_name, rows) -> ("ok",)
+                conn.recv()
+                conn.send(("ok", self.dim))
+                _, shm_name, rows = conn.recv()
+                c = _Connection(conn, shm_name, rows, self.dim)
+                conn.send(("ok",))
+            except Exception:
+                if self._stopping.is_set():
+                    return
+                continue
+            with self._lock:
+                self._connections[conn] = c
+
+    def _drop(self, conn) -> None:
+        with self._lock:
+            c = self._connections.pop(conn, None)
+        if c:
+            c.close()
+
+    def _collect(self, pending: list, timeout: float) -> None:
+        with self._lock:
+            conns = list(self._connections)
+        for conn in wait(conns, timeout=timeout):
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                self._drop(conn)
+                continue
+            if message[0] == "stats":
+                conn.send(("ok", self.stats()))
+            elif message[0] == "encode":
+                pending.append((conn, message[1], time.perf_counter()))
+
+    def _batch_loop(self) -> None:
+        while not self._stopping.is_set():
+            pending = []
+            self._collect(pending, timeout=0.1)
+            if not pending:
+                continue
+
+            # Keep coalescing until the batch is full or the oldest request waited max_wait
+            deadline = pending[0][2] + self.max_wait
+            while sum(len(p[1]) for p in pending) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._collect(pending, timeout=remaining)
+
+            self._run_batch(pending)
+
+    def _run_batch(self, pending: list) -> None:
+        texts = [t for _, request_texts, _ in pending for t in request_texts]
+        started = time.perf_counter()
+        for _, _, arrived in pending:
+            self.queue_latency_ms.observe((started - arrived) * 1000)
+
+        try:
+            vectors = self.encode_fn(texts)
+        except Exception as e:
+            for conn, _, _ in pending:
+                try:
+                    conn.send(("error", str(e)))
+                except OSError:
+                    self._drop(conn)
+            return
+
+        self.encode_latency_ms.observe((time.perf_counter() - started) * 1000)
+        self.batch_size.observe(len(texts))
+
+        offset = 0
+        for conn, request_texts, _ in pending:
+            n = len(request_texts)
+            c = self._connections.get(conn)
+            if c is None:
+                offset += n
+                continue
+            c.out[:n] = vectors[offset:offset + n]      # the only copy: model output -> client buffer
+            offset += n
+            try:
+                conn.send(("ok", n))
+            except OSError:
+                self._drop(conn)
+
+
+class _Channel:
+    def __init__(self, address: str, rows: int):
+        self.rows = rows
+        self.shm = None
+        self.conn = Client(address, family="AF_UNIX", authkey=EMBEDDING_SERVER_AUTHKEY)
+        self.conn.send(("hello",))
+        _, self.dim = self.conn.recv()
+        self.shm = SharedMemory(create=True, size=rows * self.dim * 4)     # float32 rows
+        self.conn.send(("buffer", self.shm.name, rows))
+        self.conn.recv()
+        self.out = np.ndarray((rows, self.dim), dtype=np.float32, buffer=self.shm.buf)
+
+    def close(self):
+        self.out = None
+        try:
+            self.conn.close()
+        finally:
+            if self.shm is not None:
+                self.shm.close()
+                self.shm.unlink()
+
+
+class EmbeddingClient:
+    """
+    Thread-safe client used by the API workers. Keeps a small pool of
+    connections, each with its own shared-memory buffer.
+    """
+
+    def __init__(self, address: str = EMBEDDING_SERVER_ADDRESS, pool_size: int = EMBEDDING_CLIENT_POOL,
+                 buffer_rows: int = EMBEDDING_BUFFER_ROWS):
+        self.address = address
+        self.buffer_rows = buffer_rows
+        self._channels = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    @contextmanager
+    def _channel(self):
+        self._slots.acquire()
+        try:
+            try:
+                channel = self._channels.get_nowait()
+            except queue.Empty:
+                channel = _Channel(self.address, self.buffer_rows)
+            try:
+                yield channel
+            except (EOFError, OSError):
+                # Broken connection, don't hand it out again
+                channel.close()
+                raise
+            except BaseException:
+                self._channels.put(channel)
+                raise
+            self._channels.put(channel)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def borrow(self, texts: list):
+        """
+        Zero-copy access: yields a view on the shared buffer. The view is only
+        valid inside the with block. len(texts) must fit in buffer_rows.
+        """
+        with self._channel() as channel:
+            channel.conn.send(("encode", list(texts)))
+            status, payload = channel.conn.recv()
+            if status != "ok":
+                raise RuntimeError(f"Embedding server error: {payload}")
+            yield channel.out[:payload]
+
+    def encode(self, texts: list) -> np.ndarray:
+        # Larger inputs are sent in buffer-sized pieces, the server batches them anyway
+        parts = []
+        for start in range(0, len(texts), self.buffer_rows):
+            with self.borrow(texts[start:start + self.buffer_rows]) as view:
+                parts.append(np.array(view))
+        if not parts:
+            return np.empty((0, 0), dtype=np.float32)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def stats(self) -> dict:
+        with self._channel() as channel:
+            channel.conn.send(("stats",))
+            return channel.conn.recv()[1]
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._channels.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared embedding server")
+    parser.add_argument("--address", default=EMBEDDING_SERVER_ADDRESS or "/tmp/embedding.sock")
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(args.model)
+
+    def encode_fn(texts):
+        return model.encode(texts, batch_size=len(texts), convert_to_numpy=True).astype(np.float32, copy=False)
+
+    server = EmbeddingServer(args.address, encode_fn, model.get_sentence_embedding_dimension())
+    print(f"Embedding server listening on {args.address}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
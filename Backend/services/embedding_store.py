@@ -0,0 +1,504 @@
+"""
+Persistent, append-only store of chunk embeddings, so re-indexing or moving
+to another vector backend never has to run the model again.
+
+Layout under EMBEDDING_STORE_DIR (see clients.get_embedding_store):
+
+    placements.jsonl        one line per indexed vector: id, chunk key, metadata
+    <model>/meta.json       {"model", "dim", "segment_rows"}
+    <model>/index.bin       append-only log, fixed-size records: chunk key -> (segment, row)
+    <model>/table.bin       open-addressing hash table over the log, memory-mapped for lookups
+    <model>/seg-00000.f32   float32 rows, segment_rows per file, memory-mapped for reads
+
+Embeddings are keyed by (model name, blake2b of the chunk text). The model is
+the directory, so a new EMBEDDING_MODEL starts its own segments and the old
+ones stay valid. Rows are appended before their log record, and the record
+before its table slot. A writer cuts a torn tail off the log and the last
+segment and replays log records the table is missing, so a crash at worst
+loses the batch being written (rebuild_index embeds whatever is missing).
+
+Several processes may share a store: writers take an exclusive file lock,
+readers probe the shared table.bin mapping without one (at worst missing a
+key that is being inserted). A process keeps no per-chunk state: lookups
+touch a few pages of table.bin (24 bytes per slot, at most half full) and
+opening the store costs the same at any size.
+
+rebuild_index() streams placements.jsonl into any index with the Pinecone
+upsert API at disk speed:
+
+    python -m Backend.services.embedding_store rebuild
+    python -m Backend.services.embedding_store stats
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+import orjson
+from Backend.services.metrics import CACHE_REQUESTS
+
+try:
+    import fcntl
+except ImportError:         # Windows: one process per store
+    fcntl = None
+
+EMBEDDING_STORE_SEGMENT_ROWS = int(os.getenv("EMBEDDING_STORE_SEGMENT_ROWS", 65536))   # rows per segment file
+EMBEDDING_STORE_TABLE_SLOTS = int(os.getenv("EMBEDDING_STORE_TABLE_SLOTS", 1 << 16))     # initial hash table size
+REBUILD_BATCH_SIZE = int(os.getenv("REBUILD_BATCH_SIZE", 1000))                          # vectors per upsert
+
+KEY_BYTES = 16
+_RECORD = np.dtype([("key", f"V{KEY_BYTES}"), ("segment", "<u4"), ("row", "<u4")])
+# Same layout as a record, the key split for hashing; row is stored + 1 so a zeroed slot is empty
+_SLOT = np.dtype([("k0", "<u8"), ("k1", "<u8"), ("segment", "<u4"), ("row", "<u4")])
+TABLE_MAGIC = 0x31544c4245444d45     # "EMDBLT1"
+TABLE_HEADER_BYTES = 4096             # magic, capacity, count, log bytes applied
+TABLE_MAX_LOAD = 0.5
+LOG_CHUNK_RECORDS = 1 << 20           # records per step when replaying the log or growing the table
+
+logger = logging.getLogger("Backend.embedding_store")
+
+
+def chunk_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+def _split_keys(keys: list):
+    """(k0, k1) uint64 halves of 16-byte chunk keys."""
+    halves = np.frombuffer(b"".join(keys), dtype="<u8").reshape(-1, 2) if keys else np.zeros((0, 2), dtype="<u8")
+    return halves[:, 0], halves[:, 1]
+
+
+class _KeyTable:
+    """
+    Linear-probing hash table in one file: chunk key -> (segment, row),
+    memory-mapped (shared) by every process using the store. Inserts and
+    growth happen under the store's file lock; growth rebuilds into a new
+    file that replaces the old one, other processes remap when they notice.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.inode = os.stat(path).st_ino
+        self.header = np.memmap(path, dtype="<u8", mode="r+", shape=(4,))
+        if int(self.header[0]) != TABLE_MAGIC:
+            raise ValueError(f"{path} is not an embedding store table")
+        self.capacity = int(self.header[1])
+        self.mask = np.uint64(self.capacity - 1)
+        self.slots = np.memmap(path, dtype=_SLOT, mode="r+", offset=TABLE_HEADER_BYTES, shape=(self.capacity,))
+
+    @classmethod
+    def create(cls, path: str, capacity: int) -> "_KeyTable":
+        capacity = 1 << max(int(capacity) - 1, 1).bit_length()      # power of two
+        with open(path, "wb") as f:
+            f.write(np.array([TABLE_MAGIC, capacity, 0, 0], dtype="<u8").tobytes())
+            f.truncate(TABLE_HEADER_BYTES + capacity * _SLOT.itemsize)     # sparse, zero = empty
+        return cls(path)
+
+    def stale(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return False
+
+    def __len__(self) -> int:
+        return int(self.header[2])
+
+    @property
+    def log_offset(self) -> int:
+        return int(self.header[3])
+
+    @log_offset.setter
+    def log_offset(self, value: int) -> None:
+        self.header[3] = value
+
+    def lookup(self, k0: np.ndarray, k1: np.ndarray):
+        """Returns (segment, row, found) arrays for the keys."""
+        n = len(k0)
+        segment = np.zeros(n, dtype=np.int64)
+        row = np.zeros(n, dtype=np.int64)
+        found = np.zeros(n, dtype=bool)
+        pos = k0 & self.mask
+        todo = np.arange(n)
+        while len(todo):
+            slots = self.slots[pos[todo]]
+            hit = (slots["row"] != 0) & (slots["k0"] == k0[todo]) & (slots["k1"] == k1[todo])
+            segment[todo[hit]] = slots["segment"][hit]
+            row[todo[hit]] = slots["row"][hit].astype(np.int64) - 1
+            found[todo[hit]] = True
+            todo = todo[~hit & (slots["row"] != 0)]         # an empty slot ends the probe
+            pos[todo] = (pos[todo] + np.uint64(1)) & self.mask
+        return segment, row, found
+
+    def insert(self, k0: np.ndarray, k1: np.ndarray, segment: np.ndarray, row: np.ndarray) -> None:
+        """Add keys, or move ones already there (caller holds the file lock and made room)."""
+        pos = k0 & self.mask
+        todo = np.arange(len(k0))
+        added = 0
+        while len(todo):
+            slots = self.slots[pos[todo]]
+            empty = slots["row"] == 0
+            usable = todo[empty | ((slots["k0"] == k0[todo]) & (slots["k1"] == k1[todo]))]
+            _, first = np.unique(pos[usable], return_index=True)      # one key per slot per round
+            place = usable[first]
+            at = pos[place]
+            added += int((self.slots["row"][at] == 0).sum())
+            # Key last: a reader that sees the key sees the location too
+            self.slots["segment"][at] = segment[place]
+            self.slots["row"][at] = row[place] + 1
+            self.slots["k1"][at] = k1[place]
+            self.slots["k0"][at] = k0[place]
+            placed = np.zeros(len(k0), dtype=bool)
+            placed[place] = True
+            todo = todo[~placed[todo]]
+            pos[todo] = (pos[todo] + np.uint64(1)) & self.mask
+        self.header[2] += added
+
+    def grown(self, extra: int) -> "_KeyTable":
+        """This table, or a larger copy replacing it, with room for extra more keys."""
+        capacity = self.capacity
+        while len(self) + extra > capacity * TABLE_MAX_LOAD:
+            capacity *= 2
+        if capacity == self.capacity:
+            return self
+        tmp = self.path + ".tmp"
+        table = _KeyTable.create(tmp, capacity)
+        for start in range(0, self.capacity, LOG_CHUNK_RECORDS):
+            chunk = np.array(self.slots[start:start + LOG_CHUNK_RECORDS])
+            used = chunk[chunk["row"] != 0]
+            table.insert(used["k0"], used["k1"], used["segment"], used["row"].astype(np.int64) - 1)
+        table.log_offset = self.log_offset
+        table.slots.flush()
+        table.header.flush()
+        os.replace(tmp, self.path)
+        return _KeyTable(self.path)
+
+
+class EmbeddingStore:
+    def __init__(self, root: str, model: str, segment_rows: int = EMBEDDING_STORE_SEGMENT_ROWS,
+                 table_slots: int = EMBEDDING_STORE_TABLE_SLOTS):
+        self.root = root
+        self.model = model
+        self.path = os.path.join(root, model.replace("/", "__").replace("\\", "__"))
+        self.placements_path = os.path.join(root, "placements.jsonl")
+        os.makedirs(self.path, exist_ok=True)
+        self._meta_path = os.path.join(self.path, "meta.json")
+        self._index_path = os.path.join(self.path, "index.bin")
+        self._table_path = os.path.join(self.path, "table.bin")
+        self._lock = threading.Lock()
+        self._table = None
+        self._maps = {}                 # segment -> (rows mapped, memmap)
+        self.dim = None
+        self.segment_rows = segment_rows
+        with self._lock, self._file_lock():
+            self._read_meta()
+            if not os.path.exists(self._table_path):
+                # New store, or one written before table.bin: the log is replayed into it
+                _KeyTable.create(self._table_path + ".tmp", table_slots)
+                os.replace(self._table_path + ".tmp", self._table_path)
+            self._table = _KeyTable(self._table_path)
+            self._recover()
+            self._replay_log()
+
+    # ---------------------------------------------------------------- files
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.path, "lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> None:
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            self.dim = meta["dim"]
+            self.segment_rows = meta["segment_rows"]      # the value the segments were written with
+
+    def _write_meta(self, dim: int) -> None:
+        self.dim = dim
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"model": self.model, "dim": dim, "segment_rows": self.segment_rows}, f)
+        os.replace(tmp, self._meta_path)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"seg-{segment:05d}.f32")
+
+    def _segment_count(self) -> int:
+        count = 0
+        while os.path.exists(self._segment_path(count)):
+            count += 1
+        return count
+
+    def _rows_in(self, segment: int) -> int:
+        path = self._segment_path(segment)
+        return os.path.getsize(path) // (self.dim * 4) if os.path.exists(path) else 0
+
+    def _recover(self) -> None:
+        """Cut a partially written row / log record left by a crash."""
+        paths = [(self._index_path, _RECORD.itemsize)]
+        if self.dim is not None:
+            paths.append((self._segment_path(max(self._segment_count() - 1, 0)), self.dim * 4))
+        for path, unit in paths:
+            if os.path.exists(path) and os.path.getsize(path) % unit:
+                with open(path, "r+b") as f:
+                    f.truncate(os.path.getsize(path) // unit * unit)
+
+    def _refresh_table(self) -> None:
+        # Another process grew the table into a new file
+        if self._table.stale():
+            self._table = _KeyTable(self._table_path)
+
+    def _replay_log(self) -> None:
+        """Insert log records the table is missing (a writer crashed in between). Needs the file lock."""
+        self._refresh_table()
+        size = os.path.getsize(self._index_path) if os.path.exists(self._index_path) else 0
+        size = size // _RECORD.itemsize * _RECORD.itemsize
+        offset = self._table.log_offset
+        if size <= offset:
+            return
+        with open(self._index_path, "rb") as f:
+            f.seek(offset)
+            while offset < size:
+                records = np.frombuffer(f.read(min(size - offset, LOG_CHUNK_RECORDS * _RECORD.itemsize)), dtype=_RECORD)
+                offset += records.nbytes
+                # Records written just before a crash may point past the rows that made it to disk
+                segments, inverse = np.unique(records["segment"], return_inverse=True)
+                rows_in = np.array([self._rows_in(int(segment)) for segment in segments], dtype=np.int64)
+                records = records[records["row"] < rows_in[inverse]]
+                _, last = np.unique(records["key"][::-1], return_index=True)     # a key stored again wins
+                records = records[len(records) - 1 - last]
+                slots = records.view(_SLOT)
+                self._table = self._table.grown(len(records))
+                self._table.insert(slots["k0"], slots["k1"], records["segment"].astype(np.int64),
+                                   records["row"].astype(np.int64))
+        self._table.log_offset = size
+
+    def _segment(self, segment: int, min_rows: int) -> np.ndarray:
+        mapped = self._maps.get(segment)
+        if mapped is None or mapped[0] < min_rows:
+            rows = self._rows_in(segment)
+            if not rows:
+                return np.zeros((0, self.dim), dtype=np.float32)
+            mapped = (rows, np.memmap(self._segment_path(segment), dtype=np.float32, mode="r", shape=(rows, self.dim)))
+            self._maps[segment] = mapped
+        return mapped[1]
+
+    # ---------------------------------------------------------------- API
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def _locate(self, keys: list):
+        """(segment, row, found) per key, found only when the row is on disk. Needs self._lock."""
+        k0, k1 = _split_keys(keys)
+        segments, rows, found = self._table.lookup(k0, k1)
+        if not found.all() and self._table.stale():
+            self._refresh_table()
+            segments, rows, found = self._table.lookup(k0, k1)
+        if found.any() and self.dim is None:
+            self._read_meta()
+        for segment in np.unique(segments[found]).tolist():
+            at = found & (segments == segment)
+            # A location past the rows on disk (lost in a crash) counts as not stored
+            found[at] = rows[at] < len(self._segment(segment, int(rows[at].max()) + 1))
+        return segments, rows, found
+
+    def get_many(self, keys: list):
+        """
+        Returns (vectors, found): a (len(keys), dim) float32 array and a bool mask
+        of the keys that were stored. vectors is None while the store is empty.
+        """
+        with self._lock:
+            segments, rows, found = self._locate(keys)
+            if self.dim is None:
+                self._read_meta()
+            if self.dim is None:
+                return None, found
+            vectors = np.zeros((len(keys), self.dim), dtype=np.float32)
+            for segment in np.unique(segments[found]).tolist():
+                positions = np.flatnonzero(found & (segments == segment))
+                vectors[positions] = self._segment(segment, 0)[rows[positions]]
+        return vectors, found
+
+    def put_many(self, keys: list, vectors) -> int:
+        """Append the vectors of keys not stored yet. Returns the number of rows written."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock, self._file_lock():
+            if self.dim is None:
+                self._read_meta()
+            self._recover()             # a writer in another process may have crashed mid-append
+            self._replay_log()
+            stored = self._locate(keys)[2]
+            fresh = {}
+            for i, key in enumerate(keys):
+                if not stored[i] and key not in fresh:
+                    fresh[key] = i
+            if not fresh:
+                return 0
+            if self.dim is None:
+                self._write_meta(vectors.shape[1])
+
+            records = np.empty(len(fresh), dtype=_RECORD)
+            records["key"] = np.frombuffer(b"".join(fresh), dtype=f"V{KEY_BYTES}")
+            rows = vectors[list(fresh.values())]
+            segment = max(self._segment_count() - 1, 0)
+            row = self._rows_in(segment)
+            written = 0
+            while written < len(rows):
+                if row >= self.segment_rows:
+                    segment, row = segment + 1, 0
+                n = min(self.segment_rows - row, len(rows) - written)
+                with open(self._segment_path(segment), "ab") as f:
+                    f.write(rows[written:written + n].tobytes())
+                records["segment"][written:written + n] = segment
+                records["row"][written:written + n] = np.arange(row, row + n)
+                written += n
+                row += n
+
+            # Rows first, then the records pointing at them, then the table slots
+            with open(self._index_path, "ab") as f:
+                f.write(records.tobytes())
+            slots = records.view(_SLOT)
+            self._table = self._table.grown(len(records))
+            self._table.insert(slots["k0"], slots["k1"], records["segment"].astype(np.int64),
+                               records["row"].astype(np.int64))
+            self._table.log_offset += records.nbytes
+            return len(fresh)
+
+    def encode(self, texts: list, encode_fn) -> np.ndarray:
+        """
+        encode_fn(texts) for chunk texts: stored embeddings are read back, the
+        rest (each distinct text once) is embedded and appended.
+        """
+        keys = [chunk_key(t) for t in texts]
+        vectors, found = self.get_many(keys)
+        hits = int(found.sum())
+        CACHE_REQUESTS.inc(hits, cache="embedding_store", result="hit")
+        CACHE_REQUESTS.inc(len(keys) - hits, cache="embedding_store", result="miss")
+        if hits == len(keys):
+            return vectors if vectors is not None else np.zeros((0, self.dim or 0), dtype=np.float32)
+
+        first = {}                      # key -> first position missing it
+        for i in np.flatnonzero(~found).tolist():
+            first.setdefault(keys[i], i)
+        fresh = np.asarray(encode_fn([texts[i] for i in first.values()]), dtype=np.float32)
+        self.put_many(list(first), fresh)
+        if vectors is None:
+            vectors = np.empty((len(keys), fresh.shape[1]), dtype=np.float32)
+        row_of = {key: j for j, key in enumerate(first)}
+        for i in np.flatnonzero(~found).tolist():
+            vectors[i] = fresh[row_of[keys[i]]]
+        return vectors
+
+    def record_placements(self, placements: list) -> None:
+        """Log [(vector id, metadata)] once they are in the index; metadata["chunk"] is the text."""
+        if not placements:
+            return
+        lines = b"".join(
+            orjson.dumps({"id": vector_id, "key": chunk_key(meta["chunk"]).hex(), "metadata": meta}) + b"\n"
+            for vector_id, meta in placements
+        )
+        with open(self.placements_path, "ab") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(lines)
+
+    def iter_placements(self):
+        if not os.path.exists(self.placements_path):
+            return
+        with open(self.placements_path, "rb") as f:
+            for line in f:
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:      # torn last line
+                    continue
+
+    def stats(self) -> dict:
+        segments = self._segment_count()
+        return {
+            "model": self.model,
+            "dim": self.dim,
+            "vectors": len(self._table),
+            "segments": segments,
+            "segment_bytes": sum(os.path.getsize(self._segment_path(s)) for s in range(segments)),
+            "table_slots": self._table.capacity,
+            "table_bytes": os.path.getsize(self._table_path),
+            "placements_bytes": os.path.getsize(self.placements_path) if os.path.exists(self.placements_path) else 0,
+        }
+
+
+def rebuild_index(store: EmbeddingStore, index, encode_fn=None, batch_size: int = REBUILD_BATCH_SIZE) -> dict:
+    """
+    Upsert every logged placement into index from the stored embeddings.
+    Chunks without an embedding for store.model are embedded with encode_fn
+    (and stored), or skipped when encode_fn is None.
+    """
+    started = time.perf_counter()
+    counts = {"upserted": 0, "embedded": 0, "skipped": 0}
+
+    def flush(batch):
+        vectors, found = store.get_many([bytes.fromhex(p["key"]) for p in batch])
+        missing = np.flatnonzero(~found)
+        if len(missing) and encode_fn is not None:
+            fresh = store.encode([batch[i]["metadata"]["chunk"] for i in missing], encode_fn)
+            if vectors is None:
+                vectors = np.empty((len(batch), fresh.shape[1]), dtype=np.float32)
+            vectors[missing] = fresh
+            found[missing] = True
+            counts["embedded"] += len(missing)
+        upserts = [(p["id"], vectors[i].tolist(), p["metadata"]) for i, p in enumerate(batch) if found[i]]
+        if upserts:
+            index.upsert(upserts)
+        counts["upserted"] += len(upserts)
+        counts["skipped"] += len(batch) - len(upserts)
+
+    batch = []
+    for placement in store.iter_placements():
+        batch.append(placement)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    counts["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info("Rebuilt index from the embedding store: %s", counts)
+    return counts
+
+
+def main():
+    from Backend.services import clients
+
+    parser = argparse.ArgumentParser(description="Embedding store tools")
+    parser.add_argument("command", choices=("rebuild", "stats"))
+    parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+    parser.add_argument("--no-embed", action="store_true", help="skip chunks without a stored embedding")
+    args = parser.parse_args()
+
+    store = clients.get_embedding_store()
+    if store is None:
+        parser.error("EMBEDDING_STORE_DIR is not set")
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+        return
+    if clients.VECTOR_BACKEND == "local":
+        parser.error("the local backend is rebuilt in-process when the API starts")
+    logging.basicConfig(level=logging.INFO)
+    encode_fn = None if args.no_embed else clients.encode_texts
+    print(json.dumps(rebuild_index(store, clients.get_index(), encode_fn, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
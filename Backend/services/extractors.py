@@ -0,0 +1,162 @@
+"""
+Text extractors, picked by the sniffed file format rather than the filename.
+
+    text = extract_text("report.docx", file_bytes)
+
+Formats are detected from magic bytes (PDF header, the DOCX zip layout,
+UTF-8 text); UTF-8 content is only accepted with a text or Markdown
+extension, which also tells the two apart.
+Register another format with @register("name") and teach sniff_format() to
+recognise it. This module stays light to import (parsers are imported on
+first use) because the process pool workers import it.
+"""
+
+import io
+import re
+import zipfile
+
+SUPPORTED_FORMATS_MESSAGE = "Only PDF, DOCX, TXT and Markdown files are supported."
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".md", ".markdown")
+TEXT_EXTENSIONS = (".txt", ".md", ".markdown")
+MARKDOWN_EXTENSIONS = (".md", ".markdown")
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+EXTRACTORS = {}      # format -> function(bytes) -> str
+
+
+def register(format_name: str):
+    def decorator(func):
+        EXTRACTORS[format_name] = func
+        return func
+    return decorator
+
+
+def sniff_format(filename: str, file_bytes: bytes):
+    """Return the registered format name for the content, or None."""
+    head = file_bytes[:8]
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+        return None
+    name = filename.lower()
+    if not name.endswith(TEXT_EXTENSIONS):      # e.g. .csv, .json or source code that happens to be UTF-8
+        return None
+    sample = file_bytes[:4096]
+    if b"\x00" in sample:
+        return None
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.start < len(sample) - 3:        # a multi-byte character cut by the sample is fine
+            return None
+    return "markdown" if name.endswith(MARKDOWN_EXTENSIONS) else "text"
+
+
+def extract_text(filename: str, file_bytes: bytes) -> str:
+    """
+    Sniff the format and run its extractor. Top-level so it can run in the
+    process pool. Raises ValueError for unsupported content.
+    """
+    format_name = sniff_format(filename, file_bytes)
+    if format_name not in EXTRACTORS:
+        raise ValueError(SUPPORTED_FORMATS_MESSAGE)
+    return EXTRACTORS[format_name](file_bytes)
+
+
+@register("pdf")
+def extract_text_from_pdf(file_bytes: bytes) -> str:
+    from PyPDF2 import PdfReader                 # imported on first use to keep startup fast
+    reader = PdfReader(io.BytesIO(file_bytes))   # open the PDF from bytes      io.BytesIO(file_bytes)wraps the raw bytes in a file-like object stored memory.
+    text = ""                                    # start with empty string
+    for page in reader.pages:                    # go through each page
+        page_text = page.extract_text()          # try to get text
+        if page_text:                            # if text exists
+            text += page_text                    # add it to our string
+    return text                                  # return all text
+
+
+def _paragraph_text(paragraph) -> str:
+    parts = []
+    for node in paragraph.iter(W_NS + "t", W_NS + "tab", W_NS + "br"):
+        if node.tag == W_NS + "t":
+            parts.append(node.text or "")
+        else:
+            parts.append(" ")
+    return "".join(parts)
+
+
+@register("docx")
+def extract_text_from_docx(file_bytes: bytes) -> str:
+    """
+    Streams word/document.xml with iterparse: body paragraphs one per line,
+    each table row as its cell texts joined by " | ", in document order.
+    Processed elements are freed so memory stays flat for large documents.
+    """
+    from lxml import etree
+    lines = []
+    table_depth = 0
+    with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+        with archive.open("word/document.xml") as xml:
+            for event, elem in etree.iterparse(xml, events=("start", "end"), tag=(W_NS + "tbl", W_NS + "tr", W_NS + "p")):
+                if elem.tag == W_NS + "tbl":
+                    table_depth += 1 if event == "start" else -1
+                    continue
+                if event == "start":
+                    continue
+                if elem.tag == W_NS + "p":
+                    if table_depth:
+                        continue                 # read with its table row
+                    lines.append(_paragraph_text(elem))
+                elif table_depth == 1:           # rows of nested tables are part of the outer cell
+                    cells = [
+                        " ".join(_paragraph_text(p) for p in cell.iter(W_NS + "p")).strip()
+                        for cell in elem.iterchildren(W_NS + "tc")
+                    ]
+                    lines.append(" | ".join(cells))
+                else:
+                    continue
+                # Free what has been read
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+@register("text")
+def extract_text_from_txt(file_bytes: bytes) -> str:
+    return file_bytes.decode("utf-8-sig", errors="replace")
+
+
+_MD_FENCE = re.compile(r"^\s*(```|~~~)")
+_MD_PREFIX = re.compile(r"^\s{0,3}(#{1,6}\s+|>\s?|[-*+]\s+|\d+[.)]\s+)")
+_MD_IMAGE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+_MD_LINK = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_MD_EMPHASIS = re.compile(r"(\*\*|__|\*|_|`)(\S(?:.*?\S)?)\1")
+_MD_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+
+
+@register("markdown")
+def extract_text_from_markdown(file_bytes: bytes) -> str:
+    """Plain text of a Markdown file: markup removed, code blocks kept as-is."""
+    lines = []
+    in_code = False
+    for line in extract_text_from_txt(file_bytes).splitlines():
+        if _MD_FENCE.match(line):
+            in_code = not in_code
+            continue
+        if not in_code:
+            if _MD_RULE.match(line):
+                continue
+            line = _MD_PREFIX.sub("", line)
+            line = _MD_IMAGE.sub(r"\1", line)
+            line = _MD_LINK.sub(r"\1", line)
+            line = _MD_EMPHASIS.sub(r"\2", line)
+        lines.append(line)
+    return "\n".join(lines) + "\n" if lines else ""
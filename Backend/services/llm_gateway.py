@@ -0,0 +1,293 @@
+"""
+LLM gateway: every chat completion goes through here.
+
+    result = get_llm_gateway().complete(prompt)
+    result.content, result.prompt_tokens, result.completion_tokens, result.model
+
+- one pooled HTTP client to an OpenAI-compatible endpoint (Groq by default)
+- a deadline per call (LLM_DEADLINE_SECONDS), covering queueing, retries and fallback,
+  and a shorter timeout per attempt (LLM_ATTEMPT_TIMEOUT_SECONDS) so a stalled
+  request leaves time for a retry
+- at most LLM_MAX_CONCURRENCY calls in flight per worker
+- retries of timeouts / 429 / 5xx with exponential backoff and full jitter
+- optional hedging: a second request is sent when the first one is slower than
+  the recent p95 latency, the first answer wins
+- fallback to LLM_FALLBACK_MODEL when the primary model keeps failing
+
+The services call this from FastAPI's threadpool, so the client is the
+synchronous httpx.Client and hedged requests run on a small thread pool.
+LLM_PROVIDER=fake swaps the HTTP provider for FakeProvider (tests, benchmarks).
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from Backend.services.metrics import Counter, Histogram
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")                          # "groq" (any OpenAI-compatible API) or "fake"
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "llama-3.1-8b-instant")  # empty to disable
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", 30))
+LLM_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", 12))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", 5))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))                  # per model
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", 0.25))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))     # latencies needed before hedging starts
+
+LLM_REQUESTS = Counter("llm_requests_total", "LLM provider requests by outcome", labelnames=("model", "outcome"))
+LLM_SECONDS = Histogram("llm_request_duration_seconds", "Duration of successful LLM provider requests", labelnames=("model",))
+
+
+class LLMError(Exception):
+    """The LLM call failed and should not be retried (bad request, auth...)."""
+
+
+class RetryableLLMError(LLMError):
+    """Timeout, rate limit or server error; retry_after is the server's hint in seconds."""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMError):
+    """The call's deadline passed (including time spent queueing and retrying)."""
+
+
+class Completion:
+    def __init__(self, content: str, model: str, prompt_tokens: int = None, completion_tokens: int = None):
+        self.content = content
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+# ---------------------------------------------------------------- providers
+
+class OpenAICompatibleProvider:
+    """POST {base_url}/chat/completions over one pooled keep-alive client."""
+
+    def __init__(self, base_url: str, api_key: str, max_connections: int = LLM_MAX_CONCURRENCY * 2):
+        import httpx
+        self._httpx = httpx
+        self._client = httpx.Client(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def complete(self, model: str, messages: list, timeout: float) -> Completion:
+        httpx = self._httpx
+        try:
+            response = self._client.post(
+                "/chat/completions",
+                json={"model": model, "messages": messages},
+                timeout=httpx.Timeout(timeout, connect=min(LLM_CONNECT_TIMEOUT_SECONDS, timeout)),
+            )
+        except httpx.TimeoutException as e:
+            raise RetryableLLMError(f"LLM request timed out: {e}")
+        except httpx.TransportError as e:
+            raise RetryableLLMError(f"LLM connection failed: {e}")
+
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = response.headers.get("retry-after")
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            raise RetryableLLMError(f"LLM provider returned {response.status_code}", retry_after)
+        if response.status_code >= 400:
+            raise LLMError(f"LLM provider returned {response.status_code}: {response.text[:200]}")
+
+        body = response.json()
+        usage = body.get("usage") or {}
+        return Completion(
+            body["choices"][0]["message"]["content"],
+            body.get("model", model),
+            usage.get("prompt_tokens"),
+            usage.get("completion_tokens"),
+        )
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class FakeProvider:
+    """
+    Local stand-in for the HTTP provider. Latency is latency_ms +- jitter_ms;
+    a stall_rate share of calls takes stall_ms instead (tail latency), a
+    failure_rate share fails with a retryable error. model_latency_ms
+    overrides latency_ms per model, e.g. a faster fallback model.
+    """
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, stall_rate: float = 0, stall_ms: float = 0,
+                 failure_rate: float = 0, model_latency_ms: dict = None, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.stall_rate = stall_rate
+        self.stall_ms = stall_ms
+        self.failure_rate = failure_rate
+        self.model_latency_ms = model_latency_ms or {}
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def complete(self, model: str, messages: list, timeout: float) -> Completion:
+        with self._lock:
+            self.calls += 1
+            delay = self.model_latency_ms.get(model, self.latency_ms)
+            delay = max(0.0, delay + self._rng.uniform(-self.jitter_ms, self.jitter_ms))
+            if self._rng.random() < self.stall_rate:
+                delay = self.stall_ms
+            failed = self._rng.random() < self.failure_rate
+        if delay / 1000 > timeout:
+            time.sleep(timeout)
+            raise RetryableLLMError("LLM request timed out")
+        time.sleep(delay / 1000)
+        if failed:
+            raise RetryableLLMError("LLM provider returned 503")
+        prompt_tokens = sum(len(m["content"].split()) for m in messages)
+        return Completion(f"Fake answer from {model} based on {prompt_tokens} prompt tokens.", model, prompt_tokens, 10)
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------- gateway
+
+class LLMGateway:
+    def __init__(self, provider, model: str = LLM_MODEL, fallback_model: str = LLM_FALLBACK_MODEL,
+                 deadline: float = LLM_DEADLINE_SECONDS, attempt_timeout: float = LLM_ATTEMPT_TIMEOUT_SECONDS,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, max_retries: int = LLM_MAX_RETRIES,
+                 retry_base: float = LLM_RETRY_BASE_SECONDS, hedge: bool = LLM_HEDGE, hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES):
+        self.provider = provider
+        self.model = model
+        self.fallback_model = fallback_model or None
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._latencies = {}                 # model -> recent successful latencies (seconds)
+        self._latencies_lock = threading.Lock()
+        self._hedge_pool = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix="llm-hedge") if hedge else None
+
+    def hedge_delay(self, model: str):
+        """p95 of the recent latencies of model, None until enough samples."""
+        with self._latencies_lock:
+            samples = list(self._latencies.get(model, ()))
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return float(np.percentile(samples, 95))
+
+    def _record(self, model: str, seconds: float) -> None:
+        LLM_SECONDS.observe(seconds, model=model)
+        with self._latencies_lock:
+            self._latencies.setdefault(model, deque(maxlen=500)).append(seconds)
+
+    def _call(self, model: str, messages: list, deadline_at: float) -> Completion:
+        """One provider request holding a concurrency slot."""
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0 or not self._slots.acquire(timeout=remaining):
+            raise LLMTimeoutError("LLM deadline exceeded while waiting for a free slot")
+        try:
+            started = time.monotonic()
+            timeout = max(0.001, min(self.attempt_timeout, deadline_at - started))
+            result = self.provider.complete(model, messages, timeout)
+            self._record(model, time.monotonic() - started)
+            return result
+        finally:
+            self._slots.release()
+
+    def _hedged_call(self, model: str, messages: list, deadline_at: float) -> Completion:
+        delay = self.hedge_delay(model)
+        if self._hedge_pool is None or delay is None:
+            return self._call(model, messages, deadline_at)
+
+        futures = [self._hedge_pool.submit(self._call, model, messages, deadline_at)]
+        done, _ = wait(futures, timeout=min(delay, max(0.0, deadline_at - time.monotonic())))
+        if not done:
+            LLM_REQUESTS.inc(model=model, outcome="hedged")
+            futures.append(self._hedge_pool.submit(self._call, model, messages, deadline_at))
+
+        # First success wins, the slower request finishes in the background and is ignored
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline_at - time.monotonic()) + 0.05, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                try:
+                    result = future.result()
+                except LLMError as e:
+                    error = e
+                    continue
+                if len(futures) > 1 and future is futures[1]:
+                    LLM_REQUESTS.inc(model=model, outcome="hedge_won")
+                return result
+        raise error or LLMTimeoutError("LLM deadline exceeded")
+
+    def complete(self, prompt: str = None, messages: list = None, deadline: float = None) -> Completion:
+        """
+        Chat completion for a user prompt (or a full messages list).
+        Raises LLMTimeoutError when the deadline passes, LLMError when every
+        model failed.
+        """
+        messages = messages or [{"role": "user", "content": prompt}]
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        models = [self.model] + ([self.fallback_model] if self.fallback_model and self.fallback_model != self.model else [])
+
+        last_error = None
+        for model in models:
+            if model != self.model:
+                LLM_REQUESTS.inc(model=model, outcome="fallback")
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result = self._hedged_call(model, messages, deadline_at)
+                    LLM_REQUESTS.inc(model=model, outcome="ok")
+                    return result
+                except RetryableLLMError as e:
+                    last_error = e
+                    LLM_REQUESTS.inc(model=model, outcome="retryable_error")
+                except LLMTimeoutError:
+                    LLM_REQUESTS.inc(model=model, outcome="deadline")
+                    raise
+                except LLMError:
+                    LLM_REQUESTS.inc(model=model, outcome="error")
+                    raise
+                if attempt == self.max_retries:
+                    break
+                # Exponential backoff with full jitter, at least what the server asked for
+                backoff = random.uniform(0, self.retry_base * 2 ** attempt)
+                if last_error.retry_after:
+                    backoff = max(backoff, last_error.retry_after)
+                if time.monotonic() + backoff >= deadline_at:
+                    break
+                time.sleep(backoff)
+            if time.monotonic() >= deadline_at:
+                break
+
+        if time.monotonic() >= deadline_at:
+            raise LLMTimeoutError("LLM deadline exceeded")
+        raise LLMError(f"LLM unavailable: {last_error}")
+
+    def close(self) -> None:
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+        self.provider.close()
+
+
+def create_gateway(api_key: str = None) -> LLMGateway:
+    if LLM_PROVIDER == "fake":
+        return LLMGateway(FakeProvider())
+    return LLMGateway(OpenAICompatibleProvider(LLM_BASE_URL, api_key))
@@ -0,0 +1,219 @@
+"""
+Minimal in-process metrics with Prometheus text exposition, plus optional
+sampled profiling.
+
+    with stage("ask", "embed"):
+        ...
+    CHUNKS.inc(len(chunks), pipeline="upload")
+
+GET /metrics renders every registered metric. Each uvicorn worker keeps its
+own registry, so scrape the workers individually (or run one worker).
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))    # fraction of calls profiled without asking
+
+logger = logging.getLogger("Backend.profiling")
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for k, v in labels.items():
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{k}="{v}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class HistogramValue:
+    """One histogram series: cumulative bucket counts, count and sum."""
+
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "buckets": {str(b): c for b, c in zip(self.buckets, self.counts)},
+                "count": self.count,
+                "sum": round(self.sum, 6),
+            }
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def labels(self, **labels) -> HistogramValue:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, HistogramValue(self.buckets))
+        return series
+
+    def observe(self, value: float, **labels) -> None:
+        self.labels(**labels).observe(value)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            labels = dict(zip(self.labelnames, key))
+            snap = series.snapshot()
+            for bound, count in snap["buckets"].items():
+                lines.append(f"{self.name}_bucket{_format_labels(dict(labels, le=bound))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(dict(labels, le='+Inf'))} {snap['count']}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {snap['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {snap['sum']}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def set(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {value}")
+        return lines
+
+
+def render_metrics() -> str:
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------- RAG pipeline metrics
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds", "Time spent in each stage of the upload/ask pipelines",
+    labelnames=("pipeline", "stage"),
+)
+CHUNKS = Counter("rag_chunks_total", "Chunks embedded (upload) or retrieved (ask)", labelnames=("pipeline",))
+LLM_TOKENS = Counter("rag_llm_tokens_total", "LLM tokens used", labelnames=("type",))
+CACHE_REQUESTS = Counter("rag_cache_requests_total", "Cache lookups", labelnames=("cache", "result"))
+
+
+@contextmanager
+def stage(pipeline: str, name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, pipeline=pipeline, stage=name)
+
+
+# ---------------------------------------------------------------- sampled profiling
+
+_profile_requested = ContextVar("profile_requested", default=False)
+
+
+def request_profiling(enabled: bool = True) -> None:
+    """Ask for the current request to be profiled (see dependencies/profiling.py)."""
+    _profile_requested.set(enabled)
+
+
+def profiled(name: str):
+    """
+    Decorator: run the function under cProfile when the request asked for it
+    (and PROFILING_ENABLED is set) or when it is picked by PROFILE_SAMPLE_RATE.
+    The top functions by cumulative time are logged to "Backend.profiling".
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            wanted = (PROFILING_ENABLED and _profile_requested.get()) or \
+                (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+            if not wanted:
+                return func(*args, **kwargs)
+
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(func, *args, **kwargs)
+            finally:
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+                logger.info("Profile of %s:\n%s", name, out.getvalue())
+        return wrapper
+    return decorator
@@ -0,0 +1,72 @@
+"""
+Background purge of expired password reset OTPs.
+
+otp_reset gets a row per /auth/forgot-password call and nothing else ever
+deletes them. Every OTP_PURGE_INTERVAL_SECONDS the purger deletes rows that
+expired more than OTP_RETENTION_SECONDS ago, OTP_PURGE_BATCH_SIZE rows per
+transaction with a short pause in between, so a large backlog never holds
+long locks. Running it in every worker is safe, batches just get smaller.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from Backend.crud.otp import purge_expired_otps, OTP_PURGE_BATCH_SIZE
+from Backend.database.database import session_local
+from Backend.services.metrics import Counter
+
+OTP_PURGE_INTERVAL_SECONDS = float(os.getenv("OTP_PURGE_INTERVAL_SECONDS", 600))
+OTP_RETENTION_SECONDS = float(os.getenv("OTP_RETENTION_SECONDS", 3600))      # expired OTPs kept this long
+OTP_PURGE_PAUSE_SECONDS = float(os.getenv("OTP_PURGE_PAUSE_SECONDS", 0.05))  # between batches
+
+PURGED = Counter("otp_purged_total", "Expired OTP rows deleted")
+
+logger = logging.getLogger("Backend.otp_purge")
+
+
+class OTPPurger:
+    def __init__(self):
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="otp-purge", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.purge()
+            except Exception:
+                # Retried on the next interval
+                logger.exception("OTP purge failed")
+            self._stopping.wait(OTP_PURGE_INTERVAL_SECONDS)
+
+    def purge(self, batch_size: int = OTP_PURGE_BATCH_SIZE, pause: float = OTP_PURGE_PAUSE_SECONDS) -> int:
+        """Delete all OTPs past the retention, batch by batch. Returns the rows deleted."""
+        before = datetime.now(timezone.utc) - timedelta(seconds=OTP_RETENTION_SECONDS)
+        total = 0
+        while not self._stopping.is_set():
+            db = session_local()
+            try:
+                deleted = purge_expired_otps(db, before, batch_size)
+            finally:
+                db.close()
+            total += deleted
+            PURGED.inc(deleted)
+            if deleted < batch_size:
+                break
+            self._stopping.wait(pause)
+        return total
+
+
+otp_purger = OTPPurger()
@@ -0,0 +1,82 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from Backend.services.clients import get_cross_encoder
+from Backend.services.metrics import CACHE_REQUESTS
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 20))    # how many chunks to fetch from the index
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", 3))               # how many chunks go into the prompt
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", 10000))
+
+
+class PairScoreCache:
+    """
+    Thread-safe LRU cache of cross-encoder scores keyed by (query, chunk) hashes.
+    Repeated questions over the same documents skip the model entirely.
+    """
+
+    def __init__(self, max_size: int = RERANK_CACHE_SIZE):
+        self.max_size = max_size
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: str, chunk: str) -> tuple:
+        return (
+            hashlib.sha1(query.strip().lower().encode()).digest(),
+            hashlib.sha1(chunk.encode()).digest(),
+        )
+
+    def get(self, key: tuple):
+        with self._lock:
+            score = self._scores.get(key)
+            if score is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="rerank", result="miss")
+                return None
+            self._scores.move_to_end(key)
+            self.hits += 1
+        CACHE_REQUESTS.inc(cache="rerank", result="hit")
+        return score
+
+    def put(self, key: tuple, score: float) -> None:
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.max_size:
+                self._scores.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scores.clear()
+            self.hits = self.misses = 0
+
+
+pair_cache = PairScoreCache()
+
+
+def rerank(query: str, matches: list, top_n: int = RERANK_TOP_N) -> list:
+    """
+    Re-order index matches with the cross-encoder and keep the best top_n.
+    All uncached (query, chunk) pairs are scored in a single batch.
+    """
+    if not matches:
+        return []
+
+    keys = [pair_cache.key(query, m["metadata"]["chunk"]) for m in matches]
+    scores = [pair_cache.get(k) for k in keys]
+
+    missing = [i for i, s in enumerate(scores) if s is None]
+    if missing:
+        pairs = [(query, matches[i]["metadata"]["chunk"]) for i in missing]
+        predicted = get_cross_encoder().predict(pairs, batch_size=len(pairs))
+        for i, score in zip(missing, predicted):
+            scores[i] = float(score)
+            pair_cache.put(keys[i], scores[i])
+
+    ranked = sorted(zip(scores, range(len(matches))), key=lambda x: x[0], reverse=True)
+    return [matches[i] for _, i in ranked[:top_n]]
@@ -0,0 +1,246 @@
+"""
+Admission control for the expensive endpoints (per uvicorn worker).
+
+Work comes in two priority classes:
+- "ask":    interactive questions (/ask, /ask/batch, chat turns)
+- "ingest": uploads, lower priority
+
+Every request first takes a token from its user's bucket for the class
+(rate limit, rejected with a Retry-After hint when empty), then waits for
+one of SCHEDULER_SLOTS execution slots. Ingest may hold at most
+INGEST_MAX_SLOTS of them, and a freed slot always goes to a waiting ask
+first. Within a class, the waiting request of the user with the fewest running
+jobs goes next, so one tenant can't monopolize the class. Queues are bounded,
+a full queue or a too long wait is rejected right away instead of piling up.
+
+The scheduler state lives on the event loop (see dependencies/admission.py);
+the only thing threads read is interactive_active(), used by bulk ingestion
+to pause between batches while questions are being answered.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from Backend.services.metrics import Counter, Gauge, Histogram
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+SCHEDULER_SLOTS = int(os.getenv("SCHEDULER_SLOTS", 16))                  # concurrent ask + ingest requests
+INGEST_MAX_SLOTS = int(os.getenv("INGEST_MAX_SLOTS", 4))                 # of which ingest may use at most
+ASK_QUEUE_MAX = int(os.getenv("ASK_QUEUE_MAX", 100))
+INGEST_QUEUE_MAX = int(os.getenv("INGEST_QUEUE_MAX", 20))
+ASK_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ASK_QUEUE_TIMEOUT_SECONDS", 10))
+INGEST_QUEUE_TIMEOUT_SECONDS = float(os.getenv("INGEST_QUEUE_TIMEOUT_SECONDS", 30))
+ASK_RATE_PER_USER = float(os.getenv("ASK_RATE_PER_USER", 2))             # tokens per second
+ASK_BURST_PER_USER = float(os.getenv("ASK_BURST_PER_USER", 20))
+INGEST_RATE_PER_USER = float(os.getenv("INGEST_RATE_PER_USER", 0.5))
+INGEST_BURST_PER_USER = float(os.getenv("INGEST_BURST_PER_USER", 10))
+RATE_LIMIT_USERS = int(os.getenv("RATE_LIMIT_USERS", 100000))            # buckets kept in memory
+
+WORK_CLASSES = ("ask", "ingest")
+
+QUEUE_DEPTH = Gauge("scheduler_queue_depth", "Requests waiting for a slot", labelnames=("work_class",))
+RUNNING = Gauge("scheduler_running", "Requests holding a slot", labelnames=("work_class",))
+WAIT_SECONDS = Histogram("scheduler_wait_seconds", "Time spent waiting for a slot", labelnames=("work_class",))
+REJECTIONS = Counter("scheduler_rejections_total", "Requests rejected by admission control", labelnames=("work_class", "reason"))
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1) -> float:
+        """
+        Take cost tokens. Returns 0 when allowed, else the seconds until it would be.
+        A cost above burst is allowed from a full bucket and leaves it in debt.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        needed = min(cost, self.burst)
+        if self.tokens >= needed:
+            self.tokens -= cost
+            return 0.0
+        return (needed - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+
+class RateLimiter:
+    """Per-key token buckets, least recently used keys are dropped beyond max_keys."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = RATE_LIMIT_USERS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, cost: float = 1) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take(cost)
+
+
+class _Ticket:
+    __slots__ = ("work_class", "user_id", "enqueued_at", "future")
+
+    def __init__(self, work_class: str, user_id: int, future):
+        self.work_class = work_class
+        self.user_id = user_id
+        self.enqueued_at = time.monotonic()
+        self.future = future
+
+
+class Scheduler:
+    def __init__(self, slots: int = SCHEDULER_SLOTS, ingest_max_slots: int = INGEST_MAX_SLOTS,
+                 enabled: bool = ADMISSION_ENABLED):
+        self.enabled = enabled
+        self.slots = slots
+        self.max_slots = {"ask": slots, "ingest": min(ingest_max_slots, slots)}
+        self.queue_max = {"ask": ASK_QUEUE_MAX, "ingest": INGEST_QUEUE_MAX}
+        self.queue_timeout = {"ask": ASK_QUEUE_TIMEOUT_SECONDS, "ingest": INGEST_QUEUE_TIMEOUT_SECONDS}
+        self.limiters = {
+            "ask": RateLimiter(ASK_RATE_PER_USER, ASK_BURST_PER_USER),
+            "ingest": RateLimiter(INGEST_RATE_PER_USER, INGEST_BURST_PER_USER),
+        }
+        self._waiting = {c: [] for c in WORK_CLASSES}       # tickets in arrival order
+        self._running = {c: 0 for c in WORK_CLASSES}
+        self._running_by_user = {}                           # (class, user_id) -> running count
+        self._service_seconds = {c: 1.0 for c in WORK_CLASSES}   # moving average of slot hold time
+
+    # ---------------------------------------------------------------- state
+
+    def interactive_active(self) -> bool:
+        """True while questions are running or waiting (safe to call from any thread)."""
+        return self._running["ask"] > 0 or len(self._waiting["ask"]) > 0
+
+    def _publish(self) -> None:
+        for c in WORK_CLASSES:
+            QUEUE_DEPTH.set(len(self._waiting[c]), work_class=c)
+            RUNNING.set(self._running[c], work_class=c)
+
+    def _has_slot(self, work_class: str) -> bool:
+        return sum(self._running.values()) < self.slots and self._running[work_class] < self.max_slots[work_class]
+
+    def _start(self, work_class: str, user_id: int) -> None:
+        self._running[work_class] += 1
+        key = (work_class, user_id)
+        self._running_by_user[key] = self._running_by_user.get(key, 0) + 1
+
+    def _next_ticket(self):
+        # Ask first; inside a class the user with the fewest running jobs, then arrival order
+        for c in WORK_CLASSES:
+            waiting = self._waiting[c]
+            if not waiting or not self._has_slot(c):
+                continue
+            ticket = min(
+                enumerate(waiting),
+                key=lambda item: (self._running_by_user.get((c, item[1].user_id), 0), item[0]),
+            )[1]
+            waiting.remove(ticket)
+            return ticket
+        return None
+
+    def _dispatch(self) -> None:
+        while True:
+            ticket = self._next_ticket()
+            if ticket is None:
+                break
+            if ticket.future.done():            # cancelled or timed out meanwhile
+                continue
+            self._start(ticket.work_class, ticket.user_id)
+            ticket.future.set_result(None)
+        self._publish()
+
+    def _retry_after(self, work_class: str) -> float:
+        # Rough time until the queue ahead has drained
+        ahead = len(self._waiting[work_class]) + self._running[work_class]
+        return max(1.0, ahead * self._service_seconds[work_class] / self.max_slots[work_class])
+
+    def _reject(self, work_class: str, reason: str, message: str, retry_after: float):
+        REJECTIONS.inc(work_class=work_class, reason=reason)
+        raise AdmissionRejected(message, retry_after)
+
+    # ---------------------------------------------------------------- API
+
+    async def acquire(self, work_class: str, user_id: int, cost: float = 1):
+        """
+        Wait for a slot. Returns a token to pass to release().
+        Raises AdmissionRejected (rate limited, queue full or waited too long).
+        """
+        if not self.enabled:
+            return None
+        wait = self.limiters[work_class].take(user_id, cost)
+        if wait > 0:
+            self._reject(work_class, "rate_limited", "Too many requests, slow down.", wait)
+
+        started = time.monotonic()
+        if not self._waiting["ask"] and (work_class == "ask" or not self._waiting["ingest"]) and self._has_slot(work_class):
+            self._start(work_class, user_id)
+            WAIT_SECONDS.observe(0, work_class=work_class)
+            self._publish()
+            return (work_class, user_id, started)
+
+        if len(self._waiting[work_class]) >= self.queue_max[work_class]:
+            self._reject(work_class, "queue_full", "Server is busy, try again later.", self._retry_after(work_class))
+
+        ticket = _Ticket(work_class, user_id, asyncio.get_running_loop().create_future())
+        self._waiting[work_class].append(ticket)
+        self._publish()
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), timeout=self.queue_timeout[work_class])
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # The slot was granted just as we gave up, hand it on
+                self.release((work_class, user_id, time.monotonic()))
+            else:
+                ticket.future.cancel()
+                if ticket in self._waiting[work_class]:
+                    self._waiting[work_class].remove(ticket)
+                self._publish()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject(work_class, "queue_timeout", "Server is busy, try again later.", self._retry_after(work_class))
+
+        now = time.monotonic()
+        WAIT_SECONDS.observe(now - started, work_class=work_class)
+        return (work_class, user_id, now)
+
+    def release(self, token) -> None:
+        if token is None:
+            return
+        work_class, user_id, started = token
+        self._running[work_class] -= 1
+        key = (work_class, user_id)
+        self._running_by_user[key] -= 1
+        if not self._running_by_user[key]:
+            del self._running_by_user[key]
+        held = time.monotonic() - started
+        self._service_seconds[work_class] = 0.9 * self._service_seconds[work_class] + 0.1 * held
+        self._dispatch()
+
+    def wait_for_interactive(self, max_seconds: float, poll: float = 0.01) -> None:
+        """Called from ingestion threads between batches: pause while questions are in flight."""
+        if not self.enabled:
+            return
+        deadline = time.monotonic() + max_seconds
+        while self.interactive_active() and time.monotonic() < deadline:
+            time.sleep(poll)
+
+
+scheduler = Scheduler()
@@ -1,44 +1,80 @@
-import os, io, uuid
-from dotenv import load_dotenv
+import io, os, uuid, zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from Backend.models.document import Document
 from Backend.models import UserStats
-from PyPDF2 import PdfReader
-import docx
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone, ServerlessSpec
-
-# Load environment variables
-load_dotenv()
-key = os.getenv("db_key")          # Pinecone API key
-env = os.getenv("reg")             # Pinecone region
-index_name = os.getenv("index_name")
-
-# Initialize Pinecone client
-pc = Pinecone(api_key=key)
-index = pc.Index(index_name)
-
-# Load Sentence Transformer model
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
-
-
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    reader = PdfReader(io.BytesIO(file_bytes))   # open the PDF from bytes      io.BytesIO(file_bytes)wraps the raw bytes in a file-like object stored memory.
-    text = ""                                    # start with empty string
-    for page in reader.pages:                    # go through each page
-        page_text = page.extract_text()          # try to get text
-        if page_text:                            # if text exists
-            text += page_text                    # add it to our string
-    return text                                  # return all text
-
-
-def extract_text_from_docx(file_bytes: bytes) -> str:
-    doc = docx.Document(io.BytesIO(file_bytes))
-    text = ""
-    for para in doc.paragraphs:
-        text += para.text + "\n"
-    return text
+from Backend.services.clients import embed_chunks, get_embedding_store, get_index
+from Backend.services.catalogue import catalogue_cache
+from Backend.services.extractors import extract_text, SUPPORTED_EXTENSIONS
+from Backend.services.metrics import stage, profiled, CHUNKS
+from Backend.services.scheduler import scheduler
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 256))       # chunks per embedding call, shared across files
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", 100))     # vectors per index upsert
+INGEST_YIELD_SECONDS = float(os.getenv("INGEST_YIELD_SECONDS", 0.05))   # max pause per embed batch while questions run
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", 500))
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", 200 * 1024 * 1024))  # total uncompressed size per bulk request
+
+_extract_pool = None
+
+
+def extract_in_pool(filename: str, file_bytes: bytes) -> str:
+    """
+    Run the extractor in the process pool, so parsing a large file neither
+    holds the GIL of the API process nor blocks the event loop.
+    """
+    with stage("upload", "extract"):
+        return get_extract_pool().submit(extract_text, filename, file_bytes).result()
+
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    # spawn: forking a process that already runs threads (uvicorn, outbox sender) is unsafe
+    global _extract_pool
+    if _extract_pool is None:
+        _extract_pool = ProcessPoolExecutor(
+            max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _extract_pool
+
+
+def shutdown_extract_pool() -> None:
+    # On worker shutdown: do not wait for queued extractions, the requests are gone
+    global _extract_pool
+    if _extract_pool is not None:
+        _extract_pool.shutdown(wait=False, cancel_futures=True)
+        _extract_pool = None
+
+
+def expand_archives(files: list) -> list:
+    """
+    Replace every .zip in [(filename, bytes)] by its supported members.
+    Raises ValueError when the request is too large (file count or uncompressed size).
+    """
+    expanded = []
+    total = 0
+    for filename, content in files:
+        if not filename.lower().endswith(".zip"):
+            expanded.append((filename, content))
+            total += len(content)
+            continue
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                total += info.file_size          # checked before reading, protects against zip bombs
+                if total > BULK_MAX_BYTES:
+                    raise ValueError("Bulk upload is too large.")
+                expanded.append((info.filename, archive.read(info)))
+        if len(expanded) > BULK_MAX_FILES:
+            raise ValueError(f"A bulk upload can contain at most {BULK_MAX_FILES} files.")
+    if len(expanded) > BULK_MAX_FILES:
+        raise ValueError(f"A bulk upload can contain at most {BULK_MAX_FILES} files.")
+    if total > BULK_MAX_BYTES:
+        raise ValueError("Bulk upload is too large.")
+    return expanded
 
 #Iterative Fixed‑length character chunking with overlap
 def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50):
@@ -51,49 +87,207 @@ def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50):
     return chunks
 
 
+@profiled("upload")
 def process_upload(file_content: str, filename: str, user_id: int, db: Session) -> Document:
     """
     Handles the full upload workflow:
-    1. Save document metadata in DB
+    1. Chunk text, save document metadata (with the chunk count) in DB
     2. Update user's stats
-    3. Chunk text, embed locally, and upsert into Pinecone
+    3. Embed chunks (through the embedding store when enabled) and upsert into Pinecone,
+       pausing up to INGEST_YIELD_SECONDS before each batch while questions are running
     """
 
+    # Chunk first so the chunk count is stored with the document
+    with stage("upload", "chunk"):
+        chunks = chunk_text(file_content)
+    CHUNKS.inc(len(chunks), pipeline="upload")
+
     # 1. Save document metadata
-    doc = Document(
-        filename=filename,
-        user_id=user_id,
-        upload_date=datetime.now(timezone.utc)
-    )
-    db.add(doc)
-    db.commit()
-    db.refresh(doc)
+    with stage("upload", "db_insert"):
+        doc = Document(
+            filename=filename,
+            user_id=user_id,
+            upload_date=datetime.now(timezone.utc),
+            chunk_count=len(chunks)
+        )
+        db.add(doc)
+        db.commit()
+        db.refresh(doc)
 
     # 2. Update stats
-    stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
-    if not stats:
-        stats = UserStats(user_id=user_id, files_uploaded_count=1)
-        db.add(stats)
-    else:
-        stats.files_uploaded_count += 1
-    db.commit()
-
-    # 3. Chunk text + embed + upsert to Pinecone
-    chunks = chunk_text(file_content)
+    with stage("upload", "stats_commit"):
+        stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
+        if not stats:
+            stats = UserStats(user_id=user_id, files_uploaded_count=1)
+            db.add(stats)
+        else:
+            stats.files_uploaded_count += 1
+        db.commit()
+
+    catalogue_cache.invalidate(user_id)
+
+    # 3. Embed + upsert to Pinecone, in batches that give way to interactive questions
     vectors = []
-    for chunk in chunks:
-        embedding = embedder.encode(chunk).tolist()
-        vectors.append((
-            str(uuid.uuid4()),          #generates a unique ID for the vector
-            embedding,
-            {
-                "user_id": user_id,
-                "document_id": doc.id,
-                "filename": filename,
-                "chunk": chunk
-            }
-        ))
-
-    index.upsert(vectors)
-
-    return doc
\ No newline at end of file
+    for start in range(0, len(chunks), EMBED_BATCH_SIZE):
+        batch = chunks[start:start + EMBED_BATCH_SIZE]
+        scheduler.wait_for_interactive(INGEST_YIELD_SECONDS)
+        with stage("upload", "embed"):
+            embeddings = embed_chunks(batch)
+        for chunk, embedding in zip(batch, embeddings):
+            vectors.append((
+                str(uuid.uuid4()),          #generates a unique ID for the vector
+                embedding.tolist(),
+                {
+                    "user_id": user_id,
+                    "document_id": doc.id,
+                    "filename": filename,
+                    "chunk": chunk
+                }
+            ))
+
+    for start in range(0, len(vectors), UPSERT_BATCH_SIZE):
+        scheduler.wait_for_interactive(INGEST_YIELD_SECONDS)
+        with stage("upload", "upsert"):
+            get_index().upsert(vectors[start:start + UPSERT_BATCH_SIZE])
+
+    # The document was committed in 1., log the placements for rebuilds
+    if get_embedding_store() is not None:
+        get_embedding_store().record_placements([(v[0], v[2]) for v in vectors])
+
+    return doc
+
+
+@profiled("bulk_upload")
+def process_bulk_upload(files: list, user_id: int, db: Session) -> list:
+    """
+    Bulk version of process_upload for [(filename, bytes)]:
+    1. Extract text of all files in the process pool
+    2. Insert all Document rows in one batch
+    3. Embed chunks of all files in shared batches, upserting the previous batch
+       to the index while the next one is embedded
+    4. Update stats and commit once
+    Returns one {"filename", "status", "document_id", "chunks", "error"} dict per file, in order.
+    """
+    results = [
+        {"filename": filename, "status": "pending", "document_id": None, "chunks": 0, "error": None}
+        for filename, _ in files
+    ]
+
+    # 1. Extract in parallel
+    texts = [None] * len(files)
+    with stage("bulk_upload", "extract"):
+        futures = [get_extract_pool().submit(extract_text, filename, content) for filename, content in files]
+        for i, future in enumerate(futures):
+            try:
+                texts[i] = future.result()
+            except Exception as e:
+                results[i].update(status="failed", error=str(e) if isinstance(e, ValueError) else "Could not extract text")
+                continue
+            if not texts[i].strip():
+                results[i].update(status="failed", error="No text found in file")
+
+    ok = [i for i, r in enumerate(results) if r["status"] == "pending"]
+    if not ok:
+        return results
+
+    # 2. One batched insert, flush to get the ids used in the vector metadata
+    with stage("bulk_upload", "db_insert"):
+        now = datetime.now(timezone.utc)
+        docs = {i: Document(filename=files[i][0], user_id=user_id, upload_date=now) for i in ok}
+        db.add_all(docs.values())
+        db.flush()
+
+    # 3. Chunk everything, then embed + upsert in file-independent batches
+    with stage("bulk_upload", "chunk"):
+        chunks = []                             # (file index, chunk text)
+        for i in ok:
+            file_chunks = chunk_text(texts[i])
+            results[i]["chunks"] = docs[i].chunk_count = len(file_chunks)
+            chunks.extend((i, c) for c in file_chunks)
+    CHUNKS.inc(len(chunks), pipeline="upload")
+
+    failed_files = set()
+    pending_upserts = []
+    placements = {i: [] for i in ok}            # file index -> [(vector id, metadata)]
+    try:
+        with ThreadPoolExecutor(max_workers=1) as upserter:
+            for start in range(0, len(chunks), EMBED_BATCH_SIZE):
+                batch = chunks[start:start + EMBED_BATCH_SIZE]
+                scheduler.wait_for_interactive(INGEST_YIELD_SECONDS)     # interactive questions go first
+                with stage("bulk_upload", "embed"):
+                    embeddings = embed_chunks([c for _, c in batch])
+                vectors = [
+                    (
+                        str(uuid.uuid4()),
+                        embedding.tolist(),
+                        {"user_id": user_id, "document_id": docs[i].id, "filename": files[i][0], "chunk": c},
+                    )
+                    for (i, c), embedding in zip(batch, embeddings)
+                ]
+                for (i, _), v in zip(batch, vectors):
+                    placements[i].append((v[0], v[2]))
+                for v_start in range(0, len(vectors), UPSERT_BATCH_SIZE):
+                    part = vectors[v_start:v_start + UPSERT_BATCH_SIZE]
+                    future = upserter.submit(_timed_upsert, part)
+                    pending_upserts.append((future, {v[2]["document_id"] for v in part}))
+
+            for future, document_ids in pending_upserts:
+                try:
+                    future.result()
+                except Exception:
+                    failed_files.update(i for i in ok if docs[i].id in document_ids)
+    except Exception:
+        # Leaving the executor waited for the upserts already submitted. The
+        # Document rows are rolled back, so none of their vectors may stay behind.
+        db.rollback()
+        _delete_vectors([v_id for file_placements in placements.values() for v_id, _ in file_placements])
+        raise
+
+    # Files whose vectors could not all be stored are rolled back individually
+    for i in failed_files:
+        db.delete(docs[i])
+        results[i].update(status="failed", error="Could not index file", chunks=0)
+    if failed_files:
+        _delete_vectors([v_id for i in failed_files for v_id, _ in placements[i]])
+
+    stored = [i for i in ok if i not in failed_files]
+
+    # 4. Stats + single commit
+    with stage("bulk_upload", "stats_commit"):
+        try:
+            if stored:
+                stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
+                if not stats:
+                    stats = UserStats(user_id=user_id, files_uploaded_count=len(stored))
+                    db.add(stats)
+                else:
+                    stats.files_uploaded_count += len(stored)
+            db.commit()
+        except Exception:
+            db.rollback()
+            _delete_vectors([v_id for i in stored for v_id, _ in placements[i]])
+            raise
+    catalogue_cache.invalidate(user_id)
+
+    # Only documents that exist are logged for rebuilds
+    if get_embedding_store() is not None:
+        get_embedding_store().record_placements([p for i in stored for p in placements[i]])
+
+    for i in stored:
+        results[i].update(status="uploaded", document_id=docs[i].id)
+    return results
+
+
+def _delete_vectors(ids: list) -> None:
+    # Best effort, some of them may never have been stored
+    if not ids:
+        return
+    try:
+        get_index().delete(ids=ids)
+    except Exception:
+        pass
+
+
+def _timed_upsert(vectors: list) -> None:
+    with stage("bulk_upload", "upsert"):
+        get_index().upsert(vectors)
@@ -0,0 +1,254 @@
+"""
+In-process vector store with optional quantized storage.
+
+Drop-in for the subset of the Pinecone Index API the services use
+(upsert / query / fetch / delete) so it can be selected with
+VECTOR_BACKEND=local. Vectors are L2-normalized, so the dot product is the
+cosine similarity.
+
+quantization:
+- "float32": full precision, 4 bytes per dimension
+- "int8":    per-vector scalar quantization, 1 byte per dimension (+4 bytes scale)
+- "binary":  sign bits, 1 bit per dimension, scored with hamming distance
+
+With rescore=True the float32 vectors are kept next to the codes and the top
+top_k * rescore_factor candidates from the quantized scan are re-scored exactly.
+"""
+
+import threading
+import numpy as np
+
+SCAN_BLOCK_ROWS = 2048      # rows de-quantized per step, small enough to stay in cache
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return (x / norms).astype(np.float32, copy=False)
+
+
+class LocalVectorStore:
+    def __init__(self, dim: int = None, quantization: str = "float32", rescore: bool = False, rescore_factor: int = 4):
+        if quantization not in ("float32", "int8", "binary"):
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.dim = dim
+        self.quantization = quantization
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor
+        self._size = 0
+        self._ids = []
+        self._metadata = []
+        self._row_of = {}            # vector id -> row
+        self._postings = {}          # (metadata key, value) -> list of rows, for filters
+        self._alive = np.zeros(0, dtype=bool)
+        self._codes = None           # float32 / int8 / packed bits depending on quantization
+        self._scales = None          # int8 only
+        self._floats = None          # kept for rescoring (or as the codes for float32)
+        self._lock = threading.RLock()   # upserts may run in a background thread while queries come in
+
+    # ---------------------------------------------------------------- storage
+
+    def _ensure_capacity(self, extra: int) -> None:
+        needed = self._size + extra
+        capacity = len(self._alive)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 1024)
+
+        def grow(arr, shape, dtype):
+            new = np.zeros((new_capacity,) + shape, dtype=dtype)
+            if arr is not None:
+                new[:self._size] = arr[:self._size]
+            return new
+
+        self._alive = grow(self._alive, (), bool)
+        if self.quantization == "int8":
+            self._codes = grow(self._codes, (self.dim,), np.int8)
+            self._scales = grow(self._scales, (), np.float32)
+        elif self.quantization == "binary":
+            self._codes = grow(self._codes, ((self.dim + 7) // 8,), np.uint8)
+        if self.quantization == "float32" or self.rescore:
+            self._floats = grow(self._floats, (self.dim,), np.float32)
+        if self.quantization == "float32":
+            self._codes = self._floats
+
+    def _encode(self, x: np.ndarray, rows: slice) -> None:
+        if self.quantization == "int8":
+            scales = np.abs(x).max(axis=1) / 127
+            scales[scales == 0] = 1
+            self._codes[rows] = np.round(x / scales[:, None]).astype(np.int8)
+            self._scales[rows] = scales
+        elif self.quantization == "binary":
+            self._codes[rows] = np.packbits(x > 0, axis=1)
+        if self._floats is not None:
+            self._floats[rows] = x
+
+    def memory_bytes(self) -> dict:
+        """Bytes used by the live rows (index codes and rescoring copy)."""
+        n = self._size
+        index_bytes = {
+            "float32": n * self.dim * 4,
+            "int8": n * (self.dim + 4),
+            "binary": n * ((self.dim + 7) // 8),
+        }[self.quantization] if self.dim else 0
+        rescore_bytes = n * self.dim * 4 if (self.rescore and self.quantization != "float32") else 0
+        return {"index": index_bytes, "rescore": rescore_bytes}
+
+    # ---------------------------------------------------------------- Pinecone-like API
+
+    def upsert(self, vectors) -> dict:
+        """
+        vectors: list of (id, values, metadata) tuples or {"id", "values", "metadata"} dicts
+        """
+        with self._lock:
+            return self._upsert(vectors)
+
+    def delete(self, ids=None, filter=None) -> dict:
+        with self._lock:
+            return self._delete(ids=ids, filter=filter)
+
+    def fetch(self, ids) -> dict:
+        with self._lock:
+            return self._fetch(ids)
+
+    def query(self, vector, top_k: int = 10, include_metadata: bool = False, filter: dict = None,
+              include_values: bool = False) -> dict:
+        with self._lock:
+            return self._query(vector, top_k, include_metadata, filter, include_values)
+
+    # ---------------------------------------------------------------- implementation
+
+    def _upsert(self, vectors) -> dict:
+        ids, values, metadata = [], [], []
+        for v in vectors:
+            if isinstance(v, dict):
+                ids.append(v["id"]), values.append(v["values"]), metadata.append(v.get("metadata") or {})
+            else:
+                ids.append(v[0]), values.append(v[1]), metadata.append(v[2] if len(v) > 2 else {})
+        if not ids:
+            return {"upserted_count": 0}
+
+        x = np.asarray(values, dtype=np.float32)
+        if self.dim is None:
+            self.dim = x.shape[1]
+        x = _normalize(x)
+
+        # Overwrite = delete the old row and append the new one
+        self._delete(ids=[i for i in ids if i in self._row_of])
+
+        self._ensure_capacity(len(ids))
+        start = self._size
+        rows = slice(start, start + len(ids))
+        self._encode(x, rows)
+        self._alive[rows] = True
+        for offset, (vector_id, meta) in enumerate(zip(ids, metadata)):
+            row = start + offset
+            self._ids.append(vector_id)
+            self._metadata.append(meta)
+            self._row_of[vector_id] = row
+            for k, val in meta.items():
+                if isinstance(val, (int, str, bool)):
+                    self._postings.setdefault((k, val), []).append(row)
+        self._size += len(ids)
+        return {"upserted_count": len(ids)}
+
+    def _delete(self, ids=None, filter=None) -> dict:
+        rows = []
+        if ids:
+            rows.extend(self._row_of.pop(i) for i in ids if i in self._row_of)
+        if filter:
+            matched = self._filter_rows(filter)
+            rows.extend(int(r) for r in matched)
+            for r in matched:
+                self._row_of.pop(self._ids[r], None)
+        if rows:
+            self._alive[rows] = False
+        return {}
+
+    def _fetch(self, ids) -> dict:
+        vectors = {}
+        for vector_id in ids:
+            row = self._row_of.get(vector_id)
+            if row is None:
+                continue
+            vectors[vector_id] = {
+                "id": vector_id,
+                "values": self._floats[row].tolist() if self._floats is not None else None,
+                "metadata": self._metadata[row],
+            }
+        return {"vectors": vectors}
+
+    def _filter_rows(self, filter: dict) -> np.ndarray:
+        # Supports {"key": value}, {"key": {"$eq": value}} and {"key": {"$in": [...]}}, ANDed together
+        result = None
+        for k, cond in filter.items():
+            if isinstance(cond, dict) and "$in" in cond:
+                values = cond["$in"]
+            elif isinstance(cond, dict) and "$eq" in cond:
+                values = [cond["$eq"]]
+            else:
+                values = [cond]
+            rows = np.unique(np.concatenate(
+                [np.asarray(self._postings.get((k, v), []), dtype=np.int64) for v in values]
+            )) if values else np.zeros(0, dtype=np.int64)
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+        if result is None:
+            result = np.arange(self._size)
+        return result[self._alive[result]]
+
+    def _scan(self, q: np.ndarray, rows) -> np.ndarray:
+        """Approximate (or exact for float32) scores of the given rows, vectorized in blocks."""
+        if self.quantization == "binary":
+            q_bits = np.packbits(q > 0)
+            codes = self._codes[rows] if rows is not None else self._codes[:self._size]
+            hamming = np.bitwise_count(np.bitwise_xor(codes, q_bits)).sum(axis=1, dtype=np.int32)
+            return 1 - 2 * hamming.astype(np.float32) / self.dim
+
+        n = len(rows) if rows is not None else self._size
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, SCAN_BLOCK_ROWS):
+            block = slice(start, min(start + SCAN_BLOCK_ROWS, n))
+            idx = rows[block] if rows is not None else block
+            if self.quantization == "int8":
+                scores[block] = (self._codes[idx].astype(np.float32) @ q) * self._scales[idx]
+            else:
+                scores[block] = self._codes[idx] @ q
+        return scores
+
+    def _query(self, vector, top_k: int = 10, include_metadata: bool = False, filter: dict = None,
+              include_values: bool = False) -> dict:
+        if self._size == 0:
+            return {"matches": []}
+        q = _normalize(np.asarray(vector, dtype=np.float32))
+
+        if filter:
+            rows = self._filter_rows(filter)
+        else:
+            rows = None if self._alive[:self._size].all() else np.flatnonzero(self._alive[:self._size])
+        candidates_n = self._size if rows is None else len(rows)
+        if candidates_n == 0:
+            return {"matches": []}
+
+        scores = self._scan(q, rows)
+
+        # Keep a wider candidate set when a float rescoring pass follows
+        rescoring = self.rescore and self.quantization != "float32"
+        k = min(top_k * self.rescore_factor if rescoring else top_k, candidates_n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top_rows = top if rows is None else rows[top]
+        top_scores = scores[top]
+
+        if rescoring:
+            top_scores = self._floats[top_rows] @ q
+
+        order = np.argsort(-top_scores)[:top_k]
+        matches = []
+        for i in order:
+            row = int(top_rows[i])
+            match = {"id": self._ids[row], "score": float(top_scores[i])}
+            if include_metadata:
+                match["metadata"] = self._metadata[row]
+            if include_values and self._floats is not None:
+                match["values"] = self._floats[row].tolist()
+            matches.append(match)
+        return {"matches": matches}
@@ -15,16 +15,16 @@ const Dashboard = () => {
   const [answer, setAnswer] = useState('')     //backend’s answer.
   const [asking, setAsking] = useState(false)   //tracks Q&A request progress
   const [error, setError] = useState('')
-  //File handling : Handles file input change by validating selected file type (PDF or DOCX) and updating state accordingly
+  //File handling : Handles file input change by validating selected file type (PDF, DOCX, TXT or Markdown) and updating state accordingly
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     if (e.target.files && e.target.files[0]) {          //list of files selected by the user.
       const selectedFile = e.target.files[0]
       if (selectedFile.type === 'application/pdf' ||           //MIME stands for Multipurpose Internet Mail Extensions.
-          selectedFile.name.endsWith('.docx')) {
+          /\.(docx|txt|md|markdown)$/i.test(selectedFile.name)) {
         setFile(selectedFile)
         setError('')
       } else {
-        setError('Only PDF and DOCX files are supported')
+        setError('Only PDF, DOCX, TXT and Markdown files are supported')
         setFile(null)
       }
     }
@@ -106,12 +106,12 @@ const Dashboard = () => {
               <input
                 type="file"
                 id="file-input"
-                accept=".pdf,.docx"
+                accept=".pdf,.docx,.txt,.md,.markdown"
                 onChange={handleFileChange}
                 className="file-input"
               />
               <label htmlFor="file-input" className="file-label">
-                {file ? file.name : 'Choose PDF or DOCX file'}     {/*tenary conditional operator - If file is selected, show its name; otherwise, prompt to choose a file.*/}
+                {file ? file.name : 'Choose PDF, DOCX, TXT or Markdown file'}     {/*tenary conditional operator - If file is selected, show its name; otherwise, prompt to choose a file.*/}
               </label>
             </div>
             <button type="submit" disabled={uploading || !file} className="upload-button">
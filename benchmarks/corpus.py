@@ -0,0 +1,132 @@
+"""
+Synthetic users, documents and questions for the benchmark harness.
+"""
+
+import io
+import random
+from Backend.dependencies.password import hash_password
+from Backend.models import User, UserStats
+
+WORDS = (
+    "contract invoice payment term clause party agreement liability notice renewal "
+    "delivery warranty service level support fee schedule termination confidential "
+    "data privacy security audit report budget forecast revenue cost project milestone "
+    "owner approval policy employee benefit leave insurance claim premium coverage"
+).split()
+
+BENCH_PASSWORD = "bench-password"
+
+
+def make_text(rng: random.Random, n_chars: int) -> str:
+    words = []
+    size = 0
+    while size < n_chars:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + ". "
+        words.append(sentence)
+        size += len(sentence)
+    return "".join(words)[:n_chars]
+
+
+def make_docx(text: str, table_rows: int = 0, rng: random.Random = None) -> bytes:
+    import docx
+    document = docx.Document()
+    for paragraph in text.split(". "):
+        document.add_paragraph(paragraph)
+    if table_rows:
+        rng = rng or random.Random(0)
+        table = document.add_table(rows=table_rows, cols=3)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 5)))
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_markdown(text: str) -> bytes:
+    lines = []
+    for i, paragraph in enumerate(text.split(". ")):
+        if i % 10 == 0:
+            lines.append(f"## Section {i // 10 + 1}\n")
+        lines.append(f"- **{paragraph}**" if i % 3 == 0 else paragraph + ".")
+    return "\n".join(lines).encode()
+
+
+def make_pdf(text: str, lines_per_page: int = 50, line_chars: int = 90) -> bytes:
+    """Minimal uncompressed PDF (Helvetica text), enough for PyPDF2 to extract."""
+    lines = [text[i:i + line_chars] for i in range(0, len(text), line_chars)] or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        body = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") '" for line in page
+        ) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def make_question(rng: random.Random) -> str:
+    return f"What does the {rng.choice(WORDS)} {rng.choice(WORDS)} say about the {rng.choice(WORDS)}?"
+
+
+def make_conversation(rng: random.Random, turns: int, follow_up_ratio: float = 0.6) -> list:
+    """
+    A question followed by turns - 1 more: a follow_up_ratio share re-ask the
+    previous topic with one extra term, the rest change the topic.
+    """
+    questions = [make_question(rng)]
+    for _ in range(turns - 1):
+        if rng.random() < follow_up_ratio:
+            questions.append(questions[-1].rstrip("?") + f" and its {rng.choice(WORDS)}?")
+        else:
+            questions.append(make_question(rng))
+    return questions
+
+
+def seed_users(db, n: int, rng: random.Random, with_stats: bool = True, role: str = "user", prefix: str = "user") -> list:
+    """
+    Bulk insert n users sharing one password hash (Argon2 per user would
+    dominate seeding time). Returns the new user ids.
+    """
+    hashed = hash_password(BENCH_PASSWORD)
+    users = [
+        User(name=f"{prefix} {i}", email=f"{prefix}{i}@example.com", role=role, hashed_password=hashed)
+        for i in range(n)
+    ]
+    db.add_all(users)
+    db.flush()
+    if with_stats:
+        db.add_all([
+            UserStats(user_id=u.id, files_uploaded_count=rng.randint(0, 20), questions_asked_count=rng.randint(0, 200))
+            for u in users
+        ])
+    db.commit()
+    return [u.id for u in users]
+
+
+def seed_users_core(db, n: int, prefix: str = "bulk", batch: int = 50000) -> None:
+    """Insert n plain users with executemany batches, for user bases too large for the ORM."""
+    hashed = hash_password(BENCH_PASSWORD)
+    for start in range(0, n, batch):
+        db.execute(User.__table__.insert(), [
+            {"name": f"{prefix} {i}", "email": f"{prefix}{i}@example.com", "role": "user", "hashed_password": hashed}
+            for i in range(start, min(n, start + batch))
+        ])
+        db.commit()
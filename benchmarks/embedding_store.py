@@ -0,0 +1,95 @@
+"""
+Embedding store (services/embedding_store.py): write, read back and rebuild.
+
+A synthetic corpus of --chunks chunks is embedded into a fresh store (fake
+embedder), reopened cold, read back in upload-sized batches and replayed into
+a LocalVectorStore with rebuild_index. Re-embedding is measured on a sample
+with --embed-ms-per-chunk of simulated model time:
+
+    python benchmarks/embedding_store.py --chunks 200000 --embed-ms-per-chunk 2
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import corpus
+from fakes import FakeEmbedder
+from Backend.services.embedding_store import EmbeddingStore, rebuild_index
+from Backend.services.vector_store import LocalVectorStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding store benchmark")
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--chunk-chars", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=256, help="chunks per encode call")
+    parser.add_argument("--embed-ms-per-chunk", type=float, default=2.0, help="simulated model time")
+    parser.add_argument("--reembed-sample", type=int, default=5000, help="placements re-embedded for the comparison")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    embedder = FakeEmbedder(args.dim)
+
+    def encode(texts):
+        time.sleep(len(texts) * args.embed_ms_per_chunk / 1000)
+        return embedder.encode(texts)
+
+    texts = [f"{i} " + corpus.make_text(rng, args.chunk_chars - 8) for i in range(args.chunks)]
+    root = tempfile.mkdtemp(prefix="embedding-store-")
+    metrics = {}
+    try:
+        # Fill the store like uploads do (without model time), then log the placements
+        store = EmbeddingStore(root, "bench-model")
+        started = time.perf_counter()
+        for start in range(0, len(texts), args.batch_size):
+            store.encode(texts[start:start + args.batch_size], embedder.encode)
+        metrics["fill_chunks_per_s"] = round(len(texts) / (time.perf_counter() - started), 1)
+        store.record_placements([
+            (f"v{i}", {"user_id": i % 100, "document_id": i // 50, "filename": "bench.txt", "chunk": t})
+            for i, t in enumerate(texts)
+        ])
+        metrics.update({f"store_{k}": v for k, v in store.stats().items() if k.endswith("bytes")})
+
+        # Cold open (index load), then the same chunks again: every batch is a hit
+        started = time.perf_counter()
+        store = EmbeddingStore(root, "bench-model")
+        metrics["open_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        started = time.perf_counter()
+        for start in range(0, len(texts), args.batch_size):
+            store.encode(texts[start:start + args.batch_size], encode)
+        elapsed = time.perf_counter() - started
+        metrics["cached_upload_chunks_per_s"] = round(len(texts) / elapsed, 1)
+        metrics["cached_read_mb_per_s"] = round(len(texts) * args.dim * 4 / elapsed / 1e6, 1)
+
+        # Rebuild a vector backend from the store vs running the model again
+        index = LocalVectorStore(args.dim)
+        counts = rebuild_index(store, index, encode_fn=None)
+        metrics["rebuild_vectors"] = counts["upserted"]
+        metrics["rebuild_vectors_per_s"] = round(counts["upserted"] / counts["seconds"], 1)
+
+        sample = min(args.reembed_sample, len(texts))
+        started = time.perf_counter()
+        for start in range(0, sample, args.batch_size):
+            batch = texts[start:min(start + args.batch_size, sample)]
+            index.upsert([(f"v{start + j}", e.tolist(), {"chunk": t}) for j, (t, e) in enumerate(zip(batch, encode(batch)))])
+        metrics["reembed_vectors_per_s"] = round(sample / (time.perf_counter() - started), 1)
+        metrics["rebuild_speedup"] = round(metrics["rebuild_vectors_per_s"] / metrics["reembed_vectors_per_s"], 1)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(json.dumps({"scenario": "embedding_store", "params": vars(args), "metrics": metrics}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Text extraction throughput per format (services/extractors.py).
+
+For each format a synthetic corpus is extracted serially in this process and
+then through the upload process pool (EXTRACT_WORKERS processes). DOCX is
+also run through the previous python-docx paragraph walk as a reference
+(which drops table text):
+
+    python benchmarks/extract.py --files 40 --doc-chars 50000 --table-rows 200 --workers 4
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import corpus
+from Backend.services.extractors import extract_text
+
+
+def python_docx_paragraphs(filename: str, file_bytes: bytes) -> str:
+    import docx
+    doc = docx.Document(io.BytesIO(file_bytes))
+    text = ""
+    for para in doc.paragraphs:
+        text += para.text + "\n"
+    return text
+
+
+def measure(extract, files: list, pool=None) -> dict:
+    started = time.perf_counter()
+    if pool is None:
+        texts = [extract(name, data) for name, data in files]
+    else:
+        texts = list(pool.map(extract, [n for n, _ in files], [d for _, d in files], chunksize=1))
+    elapsed = time.perf_counter() - started
+    size = sum(len(d) for _, d in files)
+    return {
+        "files_per_s": round(len(files) / elapsed, 2),
+        "input_mb_per_s": round(size / elapsed / 1e6, 2),
+        "text_chars": sum(len(t) for t in texts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extraction throughput per format")
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--doc-chars", type=int, default=50000)
+    parser.add_argument("--table-rows", type=int, default=100, help="table rows added to every DOCX")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default EXTRACT_WORKERS)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.workers:
+        os.environ["EXTRACT_WORKERS"] = str(args.workers)
+    from Backend.services.upload_service import get_extract_pool, EXTRACT_WORKERS
+
+    rng = random.Random(args.seed)
+    texts = [corpus.make_text(rng, args.doc_chars) for _ in range(args.files)]
+    corpora = {
+        "pdf": [(f"doc{i}.pdf", corpus.make_pdf(t)) for i, t in enumerate(texts)],
+        "docx": [(f"doc{i}.docx", corpus.make_docx(t, args.table_rows, rng)) for i, t in enumerate(texts)],
+        "text": [(f"doc{i}.txt", t.encode()) for i, t in enumerate(texts)],
+        "markdown": [(f"doc{i}.md", corpus.make_markdown(t)) for i, t in enumerate(texts)],
+    }
+
+    pool = get_extract_pool()
+    list(pool.map(extract_text, ["warm.txt"] * EXTRACT_WORKERS, [b"warm"] * EXTRACT_WORKERS))   # start the workers
+
+    metrics = {}
+    for format_name, files in corpora.items():
+        for name, value in measure(extract_text, files).items():
+            metrics[f"{format_name}_serial_{name}"] = value
+        for name, value in measure(extract_text, files, pool).items():
+            metrics[f"{format_name}_pool_{name}"] = value
+    for name, value in measure(python_docx_paragraphs, corpora["docx"]).items():
+        metrics[f"docx_python_docx_serial_{name}"] = value
+    pool.shutdown()
+
+    params = dict(vars(args), workers=EXTRACT_WORKERS)
+    print(json.dumps({"scenario": "extract", "params": params, "metrics": metrics}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
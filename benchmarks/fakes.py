@@ -0,0 +1,101 @@
+"""
+In-process stand-ins for the external services, used by the benchmark harness.
+
+- FakeEmbedder: deterministic hashed bag-of-words vectors (no torch needed)
+- LocalVectorStore: replaces the Pinecone index
+- FakeProvider: the LLM gateway's local provider, with configurable latency
+- FakeSMTP:     replaces smtplib.SMTP, records messages with configurable latency
+
+install() plugs them into Backend.services.clients so the real services run
+unchanged against them.
+"""
+
+import hashlib
+import re
+import smtplib
+import time
+import numpy as np
+
+from Backend.services import clients
+from Backend.services.vector_store import LocalVectorStore
+from Backend.services.llm_gateway import LLMGateway, FakeProvider
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+class FakeEmbedder:
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _vector(self, text: str) -> np.ndarray:
+        v = np.zeros(self.dim, dtype=np.float32)
+        for token in TOKEN_RE.findall(text.lower()):
+            h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+            v[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def encode(self, texts, convert_to_numpy: bool = True, **kwargs):
+        if isinstance(texts, str):
+            return self._vector(texts)
+        if not len(texts):
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.stack([self._vector(t) for t in texts])
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+
+class FakeSMTP:
+    """Drop-in for smtplib.SMTP, every instance shares the sent list."""
+
+    sent = []
+    latency_ms = 0.0
+    connections = 0
+
+    def __init__(self, host="", port=0, timeout=None):
+        FakeSMTP.connections += 1
+
+    def starttls(self):
+        return (220, b"ready")
+
+    def login(self, user, password):
+        return (235, b"ok")
+
+    def noop(self):
+        return (250, b"ok")
+
+    def send_message(self, msg):
+        time.sleep(self.latency_ms / 1000)
+        FakeSMTP.sent.append(msg["To"])
+        return {}
+
+    def quit(self):
+        return (221, b"bye")
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.quit()
+
+
+def install(llm_latency_ms: float = 0, llm_jitter_ms: float = 0, smtp_latency_ms: float = 0, dim: int = 384) -> dict:
+    """
+    Replace the embedding model, vector index, LLM provider and SMTP with fakes.
+    Returns the installed objects so scenarios can inspect them.
+    """
+    embedder = FakeEmbedder(dim)
+    index = LocalVectorStore(dim=dim)
+    llm = FakeProvider(llm_latency_ms, llm_jitter_ms)
+    clients._embedder = embedder
+    clients._index = index
+    clients._llm_gateway = LLMGateway(llm)
+    clients._cross_encoder = None
+    FakeSMTP.latency_ms = smtp_latency_ms
+    FakeSMTP.sent = []
+    smtplib.SMTP = FakeSMTP
+    return {"embedder": embedder, "index": index, "llm": llm, "smtp": FakeSMTP}
@@ -0,0 +1,76 @@
+"""
+Import-time benchmark for the API entry point.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and reports
+the total import time plus the modules with the highest self time. Fails (exit code 1)
+if a heavy dependency is imported eagerly or the budget is exceeded, so it can
+run next to the other checks in CI:
+
+    python benchmarks/import_time.py --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# These must only be loaded on first use (see Backend/services/clients.py)
+HEAVY_MODULES = ["torch", "transformers", "sentence_transformers", "pinecone", "groq"]
+
+
+def measure(module: str = "main") -> list:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        errors = [l for l in result.stderr.splitlines() if not l.startswith("import time:")]
+        raise RuntimeError(errors[-1] if errors else "import failed")
+
+    # Lines look like: "import time:       self [us] |  cumulative | imported package"
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.rstrip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if total import time is higher")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    target = next(r for r in rows if r["module"].strip() == args.module)
+    heavy = sorted({r["module"].strip() for r in rows if r["module"].strip().split(".")[0] in HEAVY_MODULES})
+    slowest = sorted(rows, key=lambda r: r["self_us"], reverse=True)[:args.top]
+
+    report = {
+        "module": args.module,
+        "total_ms": round(target["cumulative_us"] / 1000, 1),
+        "heavy_modules_imported": heavy,
+        "slowest": [{"module": r["module"].strip(), "self_ms": round(r["self_us"] / 1000, 1)} for r in slowest],
+    }
+    print(json.dumps(report, indent=2))
+
+    if heavy:
+        sys.exit(1)
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+LLM gateway under injected latency and failures (FakeProvider, no network).
+
+The same request stream is sent through gateway configurations that add
+retries, hedging and the fallback model one at a time:
+
+    python benchmarks/llm_gateway.py --requests 400 --concurrency 16 --latency-ms 200 \\
+        --stall-rate 0.05 --stall-ms 5000 --failure-rate 0.02 --deadline 3 --attempt-timeout 1
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Backend.services.llm_gateway import LLMGateway, FakeProvider, LLMError
+
+CONFIGS = {
+    "plain": dict(max_retries=0, hedge=False, fallback_model=None),
+    "retries": dict(max_retries=2, hedge=False, fallback_model=None),
+    "hedging": dict(max_retries=2, hedge=True, fallback_model=None),
+    "hedging_fallback": dict(max_retries=1, hedge=True, fallback_model="fast-model"),
+}
+
+
+def run(config: dict, args) -> dict:
+    provider = FakeProvider(
+        args.latency_ms, args.jitter_ms, args.stall_rate, args.stall_ms, args.failure_rate,
+        model_latency_ms={"fast-model": args.fallback_latency_ms}, seed=args.seed,
+    )
+    gateway = LLMGateway(
+        provider, model="main-model", deadline=args.deadline, attempt_timeout=args.attempt_timeout,
+        max_concurrency=args.max_concurrency, retry_base=0.05, hedge_min_samples=20, **config,
+    )
+    # Latency history for the hedge delay, not measured
+    for _ in range(30):
+        try:
+            gateway.complete("warm up")
+        except LLMError:
+            pass
+    provider.calls = 0
+
+    latencies, errors = [], 0
+
+    def one(i):
+        started = time.perf_counter()
+        try:
+            gateway.complete(f"question {i}")
+            return (time.perf_counter() - started) * 1000, False
+        except LLMError:
+            return (time.perf_counter() - started) * 1000, True
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for latency, failed in pool.map(one, range(args.requests)):
+            latencies.append(latency)
+            errors += failed
+    elapsed = time.perf_counter() - started
+    gateway.close()
+
+    values = np.asarray(latencies)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+        "requests_per_s": round(len(values) / elapsed, 2),
+        "errors": errors,
+        "provider_calls_per_request": round(provider.calls / args.requests, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM gateway latency injection benchmark")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-concurrency", type=int, default=32, help="gateway semaphore size")
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--stall-rate", type=float, default=0.05)
+    parser.add_argument("--stall-ms", type=float, default=5000)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--fallback-latency-ms", type=float, default=80)
+    parser.add_argument("--deadline", type=float, default=3.0, help="seconds per call")
+    parser.add_argument("--attempt-timeout", type=float, default=1.0, help="seconds per provider request")
+    parser.add_argument("--configs", nargs="+", choices=sorted(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    metrics = {}
+    for name in args.configs:
+        for metric, value in run(CONFIGS[name], args).items():
+            metrics[f"{name}_{metric}"] = value
+    print(json.dumps({"scenario": "llm_gateway", "params": vars(args), "metrics": metrics}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Cross-encoder rerank benchmark: latency, cache effect and quality vs prompt size.
+
+Builds a synthetic fact corpus where every question has exactly one answering
+chunk, indexes it in the local vector store with the real embedding model,
+and compares
+  - baseline:  top-k chunks from the index straight into the prompt
+  - rerank:    top-N out of a wider candidate set, re-scored by the cross-encoder
+on hit rate (answering chunk in the prompt), prompt characters and latency.
+Needs sentence-transformers and the models (downloaded on first run).
+
+    python benchmarks/rerank.py --facts 2000 --questions 200
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Backend.services.clients import encode_texts
+from Backend.services.rerank_service import pair_cache, rerank
+from Backend.services.vector_store import LocalVectorStore
+
+SUBJECTS = ["invoice", "contract", "policy", "report", "warranty", "lease", "order", "claim", "audit", "budget"]
+FIELDS = ["due date", "owner", "total amount", "renewal term", "approval status", "reference number"]
+
+
+def make_corpus(n: int, rng: random.Random):
+    facts, questions = [], []
+    for i in range(n):
+        subject = f"{rng.choice(SUBJECTS)} {i}"
+        field = rng.choice(FIELDS)
+        value = f"{rng.randint(1000, 9999)}-{rng.choice('ABCDEFGH')}"
+        filler = " ".join(rng.choice(SUBJECTS + FIELDS) for _ in range(rng.randint(20, 60)))
+        facts.append(f"{filler}. The {field} of {subject} is {value}. {filler}")
+        questions.append((f"What is the {field} of {subject}?", i))
+    return facts, questions
+
+
+def percentile(values, p):
+    return round(float(np.percentile(values, p)), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--facts", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--baseline-k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    facts, questions = make_corpus(args.facts, rng)
+    questions = rng.sample(questions, min(args.questions, len(questions)))
+
+    store = LocalVectorStore()
+    vectors = encode_texts(facts)
+    store.upsert([(str(i), v, {"chunk": f, "user_id": 1}) for i, (f, v) in enumerate(zip(facts, vectors))])
+
+    baseline_hits, rerank_hits = 0, 0
+    baseline_chars, rerank_chars = 0, 0
+    cold_ms, warm_ms = [], []
+    for query, answer in questions:
+        q = encode_texts([query])[0]
+        base = store.query(q, top_k=args.baseline_k, include_metadata=True, filter={"user_id": 1})["matches"]
+        candidates = store.query(q, top_k=args.candidates, include_metadata=True, filter={"user_id": 1})["matches"]
+
+        started = time.perf_counter()
+        kept = rerank(query, candidates, args.top_n)
+        cold_ms.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        rerank(query, candidates, args.top_n)           # same pairs again -> served from the cache
+        warm_ms.append((time.perf_counter() - started) * 1000)
+
+        baseline_hits += any(m["id"] == str(answer) for m in base)
+        rerank_hits += any(m["id"] == str(answer) for m in kept)
+        baseline_chars += sum(len(m["metadata"]["chunk"]) for m in base)
+        rerank_chars += sum(len(m["metadata"]["chunk"]) for m in kept)
+
+    n = len(questions)
+    print(json.dumps({
+        "questions": n,
+        "baseline": {
+            "top_k": args.baseline_k,
+            "hit_rate": round(baseline_hits / n, 4),
+            "avg_prompt_chars": round(baseline_chars / n),
+        },
+        "rerank": {
+            "candidates": args.candidates,
+            "top_n": args.top_n,
+            "hit_rate": round(rerank_hits / n, 4),
+            "avg_prompt_chars": round(rerank_chars / n),
+            "cold_p50_ms": percentile(cold_ms, 50),
+            "cold_p95_ms": percentile(cold_ms, 95),
+            "cached_p50_ms": percentile(warm_ms, 50),
+            "cache_hits": pair_cache.hits,
+            "cache_misses": pair_cache.misses,
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
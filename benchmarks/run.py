@@ -0,0 +1,593 @@
+"""
+Offline end-to-end benchmarks for the API hot paths.
+
+Runs the real FastAPI app in-process (httpx ASGI transport) against sqlite and
+the fakes in benchmarks/fakes.py, so no Pinecone / Groq / SMTP / PostgreSQL is
+needed. Every scenario prints (or writes with --out) a JSON document; pass
+--baseline with a previous result to fail on regressions:
+
+    python benchmarks/run.py ask --users 20 --requests 200 --concurrency 16 --llm-latency-ms 300
+    python benchmarks/run.py upload --files 50 --doc-chars 20000 --out upload.json
+    python benchmarks/run.py bulk_upload --files 200 --batch-size 50 --concurrency 1
+    python benchmarks/run.py ask_batch --users 5 --requests 20 --batch-size 25 --duplicate-ratio 0.3
+    python benchmarks/run.py chat --users 5 --sessions 20 --turns 10 --follow-up-ratio 0.6
+    python benchmarks/run.py fairness --users 10 --requests 100 --files 40 --batch-size 10
+    python benchmarks/run.py dashboard --sizes 100 1000 10000
+    python benchmarks/run.py users --sizes 10000 100000 1000000 --batch-size 100
+    python benchmarks/run.py login --requests 50
+    python benchmarks/run.py otp --requests 100
+    python benchmarks/run.py otp_stale --stale-rows 2000000 --requests 200
+    python benchmarks/run.py ask --baseline ask.json --tolerance 0.2
+
+Metric names ending in "_ms" are lower-is-better, names ending in "_per_s"
+are higher-is-better; other metrics are informational.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Must be set before the Backend modules read their configuration
+_db_dir = tempfile.mkdtemp(prefix="bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+os.environ.setdefault("Secret_Key", "benchmark-secret-key")
+os.environ["EMBEDDING_SERVER_ADDRESS"] = ""
+os.environ["EMAIL_OUTBOX_SENDER_ENABLED"] = "false"
+os.environ["WARMUP_ON_STARTUP"] = "false"
+# Per-user rate limits would reject the synthetic load, slots and queues stay as configured
+for _name in ("ASK_RATE_PER_USER", "ASK_BURST_PER_USER", "INGEST_RATE_PER_USER", "INGEST_BURST_PER_USER"):
+    os.environ.setdefault(_name, "1000000")
+
+import httpx
+import numpy as np
+from sqlalchemy import text
+import fakes
+import corpus
+from Backend.database.database import Base, Engine, session_local
+from Backend.dependencies.jwt import create_access_token
+from Backend.services.upload_service import process_upload, process_bulk_upload
+from main import app
+
+
+def summarize(latencies_ms: list, elapsed_s: float, prefix: str = "") -> dict:
+    values = np.asarray(latencies_ms)
+    return {
+        f"{prefix}requests": len(values),
+        f"{prefix}p50_ms": round(float(np.percentile(values, 50)), 2),
+        f"{prefix}p95_ms": round(float(np.percentile(values, 95)), 2),
+        f"{prefix}p99_ms": round(float(np.percentile(values, 99)), 2),
+        f"{prefix}requests_per_s": round(len(values) / elapsed_s, 2),
+    }
+
+
+async def run_concurrently(make_request, n: int, concurrency: int):
+    """
+    Fire n requests with at most `concurrency` in flight.
+    make_request(client, i) returns the awaitable httpx call.
+    Returns (latencies_ms, elapsed_s, responses).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = [0.0] * n
+    responses = [None] * n
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            async with semaphore:
+                started = time.perf_counter()
+                responses[i] = await make_request(client, i)
+                latencies[i] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n)))
+        elapsed = time.perf_counter() - started
+
+    failed = [r.status_code for r in responses if r.status_code >= 400]
+    if failed:
+        raise RuntimeError(f"{len(failed)} requests failed, status codes: {sorted(set(failed))}")
+    return latencies, elapsed, responses
+
+
+def auth_header(user_id: int, role: str = "user") -> dict:
+    return {"Authorization": f"Bearer {create_access_token(user_id, role)}"}
+
+
+# ---------------------------------------------------------------- scenarios
+
+def scenario_upload(args, rng, installed) -> dict:
+    db = session_local()
+    user_id = corpus.seed_users(db, 1, rng, prefix="uploader")[0]
+    db.close()
+    headers = auth_header(user_id)
+    files = [corpus.make_docx(corpus.make_text(rng, args.doc_chars)) for _ in range(args.files)]
+
+    def request(client, i):
+        return client.post("/upload/", headers=headers, files={"file": (f"doc{i}.docx", files[i])})
+
+    latencies, elapsed, _ = asyncio.run(run_concurrently(request, args.files, args.concurrency))
+    metrics = summarize(latencies, elapsed)
+    chunks = installed["index"]._size
+    metrics["files_per_s"] = round(args.files / elapsed, 2)
+    metrics["chunks"] = chunks
+    metrics["chunks_per_s"] = round(chunks / elapsed, 2)
+    return metrics
+
+
+def scenario_bulk_upload(args, rng, installed) -> dict:
+    db = session_local()
+    user_id = corpus.seed_users(db, 1, rng, prefix="bulk")[0]
+    db.close()
+    headers = auth_header(user_id)
+    files = [corpus.make_docx(corpus.make_text(rng, args.doc_chars)) for _ in range(args.files)]
+    batches = [list(range(i, min(i + args.batch_size, args.files))) for i in range(0, args.files, args.batch_size)]
+
+    def request(client, b):
+        return client.post(
+            "/upload/bulk", headers=headers,
+            files=[("files", (f"doc{i}.docx", files[i])) for i in batches[b]],
+        )
+
+    latencies, elapsed, _ = asyncio.run(run_concurrently(request, len(batches), args.concurrency))
+    metrics = summarize(latencies, elapsed)
+    chunks = installed["index"]._size
+    metrics["files_per_s"] = round(args.files / elapsed, 2)
+    metrics["chunks"] = chunks
+    metrics["chunks_per_s"] = round(chunks / elapsed, 2)
+    return metrics
+
+
+def scenario_ask(args, rng, installed) -> dict:
+    db = session_local()
+    user_ids = corpus.seed_users(db, args.users, rng, prefix="asker")
+    for user_id in user_ids:
+        for d in range(args.docs_per_user):
+            process_upload(corpus.make_text(rng, args.doc_chars), f"doc{d}.txt", user_id, db)
+    db.close()
+    headers = {u: auth_header(u) for u in user_ids}
+    questions = [(rng.choice(user_ids), corpus.make_question(rng)) for _ in range(args.requests)]
+
+    def request(client, i):
+        user_id, question = questions[i]
+        return client.post("/ask/", headers=headers[user_id], json={"query": question})
+
+    latencies, elapsed, _ = asyncio.run(run_concurrently(request, args.requests, args.concurrency))
+    metrics = summarize(latencies, elapsed)
+    metrics["llm_calls"] = installed["llm"].calls
+    return metrics
+
+
+def scenario_ask_batch(args, rng, installed) -> dict:
+    """
+    Each request is a batch of --batch-size questions for one user, a
+    --duplicate-ratio share of them repeat an earlier question of the batch.
+    """
+    db = session_local()
+    user_ids = corpus.seed_users(db, args.users, rng, prefix="batcher")
+    for user_id in user_ids:
+        for d in range(args.docs_per_user):
+            process_upload(corpus.make_text(rng, args.doc_chars), f"doc{d}.txt", user_id, db)
+    db.close()
+    headers = {u: auth_header(u) for u in user_ids}
+    batches = []
+    for _ in range(args.requests):
+        questions = []
+        for _ in range(args.batch_size):
+            if questions and rng.random() < args.duplicate_ratio:
+                questions.append(rng.choice(questions))
+            else:
+                questions.append(corpus.make_question(rng))
+        batches.append((rng.choice(user_ids), questions))
+
+    def request(client, i):
+        user_id, questions = batches[i]
+        return client.post("/ask/batch", headers=headers[user_id], json={"queries": questions})
+
+    latencies, elapsed, _ = asyncio.run(run_concurrently(request, args.requests, args.concurrency))
+    metrics = summarize(latencies, elapsed)
+    questions = args.requests * args.batch_size
+    metrics["questions_per_s"] = round(questions / elapsed, 2)
+    metrics["llm_calls"] = installed["llm"].calls
+    metrics["llm_calls_saved"] = questions - installed["llm"].calls
+    return metrics
+
+
+def scenario_chat(args, rng, installed) -> dict:
+    """
+    The same conversations twice: through /chat sessions, and statelessly
+    through /ask with the earlier questions and answers pasted into the query.
+    Reports prompt tokens and latency per turn for both.
+    """
+    from Backend.services.metrics import LLM_TOKENS
+
+    db = session_local()
+    user_ids = corpus.seed_users(db, args.users, rng, prefix="chatter")
+    for user_id in user_ids:
+        for d in range(args.docs_per_user):
+            process_upload(corpus.make_text(rng, args.doc_chars), f"doc{d}.txt", user_id, db)
+    db.close()
+    headers = {u: auth_header(u) for u in user_ids}
+    conversations = [
+        (rng.choice(user_ids), corpus.make_conversation(rng, args.turns, args.follow_up_ratio))
+        for _ in range(args.sessions)
+    ]
+
+    def run(path: str) -> dict:
+        turn_latencies, tokens, reused = [], [], []
+        llm_calls = installed["llm"].calls
+        prompt_tokens = LLM_TOKENS.value(type="prompt")
+
+        async def conversation(client, i):
+            user_id, questions = conversations[i]
+            if path == "session":
+                created = await client.post("/chat/sessions", headers=headers[user_id], json={})
+                session_id = created.json()["id"]
+            history = ""
+            for question in questions:
+                started = time.perf_counter()
+                if path == "session":
+                    response = await client.post(
+                        f"/chat/sessions/{session_id}/ask", headers=headers[user_id], json={"query": question}
+                    )
+                    body = response.json()
+                    tokens.append(body["prompt_tokens"])
+                    reused.append(body["reused_context"])
+                    answer = body["answer"]
+                else:
+                    response = await client.post("/ask/", headers=headers[user_id], json={"query": history + question})
+                    answer = response.json()["answer"]
+                turn_latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    return response
+                history += f"Earlier I asked: {question} You answered: {answer} "
+            return response
+
+        _, elapsed, _ = asyncio.run(run_concurrently(conversation, args.sessions, args.concurrency))
+        metrics = summarize(turn_latencies, elapsed, prefix=f"{path}_turn_")
+        calls = installed["llm"].calls - llm_calls
+        total_prompt_tokens = LLM_TOKENS.value(type="prompt") - prompt_tokens
+        metrics[f"{path}_llm_calls"] = calls
+        metrics[f"{path}_prompt_tokens_per_turn"] = round(total_prompt_tokens / len(turn_latencies), 1)
+        if path == "session":
+            metrics["session_answer_prompt_tokens_max"] = max(tokens)
+            metrics["session_context_reuse_ratio"] = round(sum(reused) / len(reused), 3)
+        return metrics
+
+    metrics = run("stateless")
+    metrics.update(run("session"))
+    return metrics
+
+
+def scenario_fairness(args, rng, installed) -> dict:
+    """
+    One tenant bulk-uploads --files files (--batch-size per request, all
+    requests at once) while --users other users ask --requests questions
+    (--concurrency in flight). Run without and with admission control.
+    """
+    from Backend.services.scheduler import scheduler
+
+    db = session_local()
+    uploader = corpus.seed_users(db, 1, rng, prefix="tenant")[0]
+    askers = corpus.seed_users(db, args.users, rng, prefix="fair")
+    for user_id in askers:
+        process_upload(corpus.make_text(rng, args.doc_chars), "doc.txt", user_id, db)
+    db.close()
+    headers = {u: auth_header(u) for u in [uploader] + askers}
+    files = [corpus.make_docx(corpus.make_text(rng, args.doc_chars)) for _ in range(args.files)]
+    batches = [list(range(i, min(i + args.batch_size, args.files))) for i in range(0, args.files, args.batch_size)]
+    questions = [(rng.choice(askers), corpus.make_question(rng)) for _ in range(args.requests)]
+
+    async def workload():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            ask_latencies, upload_latencies, statuses = [], [], []
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def upload(b):
+                started = time.perf_counter()
+                response = await client.post(
+                    "/upload/bulk", headers=headers[uploader],
+                    files=[("files", (f"doc{i}.docx", files[i])) for i in batches[b]],
+                )
+                upload_latencies.append((time.perf_counter() - started) * 1000)
+                statuses.append(response.status_code)
+
+            async def ask(i):
+                async with semaphore:
+                    user_id, question = questions[i]
+                    started = time.perf_counter()
+                    response = await client.post("/ask/", headers=headers[user_id], json={"query": question})
+                    ask_latencies.append((time.perf_counter() - started) * 1000)
+                    statuses.append(response.status_code)
+
+            started = time.perf_counter()
+            uploads = asyncio.gather(*(upload(b) for b in range(len(batches))))
+            await asyncio.sleep(0.05)           # the uploads are in flight when the questions start
+            await asyncio.gather(*(ask(i) for i in range(args.requests)))
+            ask_elapsed = time.perf_counter() - started
+            await uploads
+            return ask_latencies, ask_elapsed, upload_latencies, time.perf_counter() - started, statuses
+
+    # Spawn the extraction pool before measuring
+    db = session_local()
+    process_bulk_upload([("warmup.docx", files[0])], uploader, db)
+    db.close()
+
+    metrics = {}
+    for mode, enabled in (("without", False), ("with", True)):
+        scheduler.enabled = enabled
+        ask_latencies, ask_elapsed, upload_latencies, elapsed, statuses = asyncio.run(workload())
+        metrics.update(summarize(ask_latencies, ask_elapsed, prefix=f"{mode}_admission_ask_"))
+        metrics[f"{mode}_admission_upload_p50_ms"] = round(float(np.percentile(upload_latencies, 50)), 2)
+        metrics[f"{mode}_admission_files_per_s"] = round(args.files / elapsed, 2)
+        metrics[f"{mode}_admission_rejected"] = sum(1 for s in statuses if s == 429)
+        metrics[f"{mode}_admission_errors"] = sum(1 for s in statuses if s >= 400 and s != 429)
+    return metrics
+
+
+def scenario_dashboard(args, rng, installed) -> dict:
+    db = session_local()
+    admin_id = corpus.seed_users(db, 1, rng, with_stats=False, role="admin", prefix="admin")[0]
+    headers = auth_header(admin_id, "admin")
+    metrics = {}
+    seeded = 0
+    for size in sorted(args.sizes):
+        corpus.seed_users(db, size - seeded, rng, prefix=f"dash{size}-")
+        seeded = size
+
+        def request(client, i):
+            return client.get("/admin/dashboard", headers=headers)
+
+        latencies, elapsed, responses = asyncio.run(run_concurrently(request, args.requests, 1))
+        metrics.update(summarize(latencies, elapsed, prefix=f"users_{size}_"))
+        metrics[f"users_{size}_response_bytes"] = len(responses[0].content)
+    db.close()
+    return metrics
+
+
+def _legacy_user_listing(db) -> int:
+    # The previous /users/all: every user as an ORM object through UserResponse
+    from Backend.models import User
+    from Backend.schemas.user import UserResponse
+    users = [UserResponse.model_validate(u).model_dump() for u in db.query(User).all()]
+    return len(json.dumps(users))
+
+
+def scenario_users(args, rng, installed) -> dict:
+    """
+    GET /users/all pages at the start, middle and end of growing user bases,
+    with the peak Python memory of a page request. The previous unpaginated
+    listing is measured too, up to LEGACY_MAX_USERS.
+    """
+    import tracemalloc
+    LEGACY_MAX_USERS = 100000
+
+    db = session_local()
+    admin_id = corpus.seed_users(db, 1, rng, with_stats=False, role="admin", prefix="admin")[0]
+    headers = auth_header(admin_id, "admin")
+    metrics = {}
+    seeded = 1
+    for size in sorted(args.sizes):
+        corpus.seed_users_core(db, size - seeded, prefix=f"users{size}-")
+        seeded = size
+        last_id = db.execute(text("SELECT max(id) FROM users")).scalar()
+
+        for position, after_id in (("first", 0), ("middle", last_id // 2), ("last", last_id - args.batch_size)):
+            def request(client, i):
+                return client.get("/users/all", params={"limit": args.batch_size, "after_id": after_id}, headers=headers)
+
+            latencies, elapsed, responses = asyncio.run(run_concurrently(request, args.requests, 1))
+            metrics.update(summarize(latencies, elapsed, prefix=f"users_{size}_{position}_page_"))
+        metrics[f"users_{size}_page_bytes"] = len(responses[0].content)
+
+        tracemalloc.start()
+        asyncio.run(run_concurrently(request, 1, 1))
+        metrics[f"users_{size}_page_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        tracemalloc.stop()
+
+        if size <= LEGACY_MAX_USERS:
+            started = time.perf_counter()
+            metrics[f"users_{size}_unpaginated_bytes"] = _legacy_user_listing(db)
+            metrics[f"users_{size}_unpaginated_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            db.expunge_all()
+            tracemalloc.start()
+            _legacy_user_listing(db)
+            metrics[f"users_{size}_unpaginated_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+            tracemalloc.stop()
+            db.expunge_all()
+    db.close()
+    return metrics
+
+
+def scenario_login(args, rng, installed) -> dict:
+    db = session_local()
+    corpus.seed_users(db, 1, rng, prefix="login")
+    db.close()
+
+    def request(client, i):
+        return client.post("/auth/login", json={"email": "login0@example.com", "password": corpus.BENCH_PASSWORD})
+
+    latencies, elapsed, _ = asyncio.run(run_concurrently(request, args.requests, args.concurrency))
+    return summarize(latencies, elapsed)
+
+
+def scenario_otp(args, rng, installed) -> dict:
+    from Backend.services.email_service import outbox_sender
+
+    def request(client, i):
+        return client.post("/auth/forgot-password", json={"email": f"otp{i}@example.com"})
+
+    latencies, elapsed, _ = asyncio.run(run_concurrently(request, args.requests, args.concurrency))
+    metrics = summarize(latencies, elapsed)
+
+    # The emails were only queued, measure draining the outbox separately
+    started = time.perf_counter()
+    sent = outbox_sender.drain()
+    drain_s = time.perf_counter() - started
+    metrics["emails_sent"] = sent
+    metrics["emails_per_s"] = round(sent / drain_s, 2) if drain_s else None
+    metrics["smtp_connections"] = installed["smtp"].connections
+    return metrics
+
+
+def scenario_otp_stale(args, rng, installed) -> dict:
+    """
+    /auth/forgot-password and the verify_otp lookup on top of --stale-rows
+    expired OTPs (about 10 per email), without the otp_reset indexes and with
+    them, then hammering one email past its rate limit and purging the table.
+    """
+    from datetime import datetime, timedelta, timezone
+    from Backend.database.database import ensure_schema
+    from Backend.models import OTPReset
+    from Backend.services.otp_purge import otp_purger
+
+    emails = max(args.requests, args.stale_rows // 10)
+    expired = datetime.now(timezone.utc) - timedelta(days=2)
+    db = session_local()
+    for start in range(0, args.stale_rows, 50000):
+        db.execute(OTPReset.__table__.insert(), [
+            {"email": f"stale{i % emails}@example.com", "otp_hash": "x", "used": rng.random() < 0.9,
+             "expires_at": expired - timedelta(seconds=i)}
+            for i in range(start, min(args.stale_rows, start + 50000))
+        ])
+        db.commit()
+
+    def lookup_ms(email):
+        # The query verify_otp runs
+        started = time.perf_counter()
+        db.query(OTPReset).filter(OTPReset.email == email, OTPReset.used == False) \
+            .order_by(OTPReset.expires_at.desc()).first()
+        return (time.perf_counter() - started) * 1000
+
+    new_indexes = [ix for ix in OTPReset.__table__.indexes if ix.name != "ix_otp_reset_id"]
+    for ix in new_indexes:
+        ix.drop(bind=Engine)
+    metrics = {}
+    for label in ("no_index", "indexed"):
+        if label == "indexed":
+            started = time.perf_counter()
+            ensure_schema(Engine)
+            metrics["index_build_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        lookups = [lookup_ms(f"stale{rng.randrange(emails)}@example.com") for _ in range(args.requests)]
+        metrics[f"{label}_lookup_p50_ms"] = round(float(np.percentile(lookups, 50)), 3)
+        metrics[f"{label}_lookup_p95_ms"] = round(float(np.percentile(lookups, 95)), 3)
+
+        # One request per email, so the per-email limit is not hit here. Sequential:
+        # sqlite serializes the writes anyway (and concurrent long UPDATEs crash some builds)
+        def request(client, i):
+            return client.post("/auth/forgot-password", json={"email": f"stale{(i * 7919 + len(label)) % emails}@example.com"})
+
+        latencies, elapsed, _ = asyncio.run(run_concurrently(request, args.requests, 1))
+        metrics.update(summarize(latencies, elapsed, prefix=f"{label}_forgot_"))
+
+    # One email over its limit: rejected before hashing
+    async def hammer():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = []
+            for _ in range(20):
+                started = time.perf_counter()
+                r = await client.post("/auth/forgot-password", json={"email": "hammer@example.com"})
+                results.append((r.status_code, (time.perf_counter() - started) * 1000))
+            return results
+
+    results = asyncio.run(hammer())
+    metrics["hammer_rejected"] = sum(code == 429 for code, _ in results)
+    metrics["hammer_accepted_p50_ms"] = round(float(np.median([ms for code, ms in results if code == 200])), 2)
+    metrics["hammer_rejected_p50_ms"] = round(float(np.median([ms for code, ms in results if code == 429])), 2)
+
+    started = time.perf_counter()
+    purged = otp_purger.purge()
+    purge_s = time.perf_counter() - started
+    metrics["purged_rows"] = purged
+    metrics["purge_rows_per_s"] = round(purged / purge_s, 1)
+    metrics["rows_left"] = db.query(OTPReset).count()
+    db.close()
+    return metrics
+
+
+SCENARIOS = {
+    "upload": scenario_upload,
+    "bulk_upload": scenario_bulk_upload,
+    "ask": scenario_ask,
+    "ask_batch": scenario_ask_batch,
+    "chat": scenario_chat,
+    "fairness": scenario_fairness,
+    "dashboard": scenario_dashboard,
+    "users": scenario_users,
+    "login": scenario_login,
+    "otp": scenario_otp,
+    "otp_stale": scenario_otp_stale,
+}
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """Return the list of metrics that regressed by more than tolerance."""
+    regressions = []
+    for name, old in baseline.get("metrics", {}).items():
+        new = result["metrics"].get(name)
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+            continue
+        if name.endswith("_ms") and new > old * (1 + tolerance):
+            regressions.append(f"{name}: {old} -> {new}")
+        elif name.endswith("_per_s") and new < old * (1 - tolerance):
+            regressions.append(f"{name}: {old} -> {new}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--docs-per-user", type=int, default=3)
+    parser.add_argument("--sessions", type=int, default=20, help="chat conversations")
+    parser.add_argument("--turns", type=int, default=10, help="questions per chat conversation")
+    parser.add_argument("--follow-up-ratio", type=float, default=0.6)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=50, help="files per bulk upload / questions per ask batch / users per page")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0, help="share of repeated questions in an ask batch")
+    parser.add_argument("--doc-chars", type=int, default=10000)
+    parser.add_argument("--stale-rows", type=int, default=1000000, help="expired OTP rows seeded by otp_stale")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50)
+    parser.add_argument("--smtp-latency-ms", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON result to this file")
+    parser.add_argument("--baseline", help="previous JSON result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=Engine)
+    installed = fakes.install(args.llm_latency_ms, args.llm_jitter_ms, args.smtp_latency_ms)
+    rng = random.Random(args.seed)
+
+    metrics = SCENARIOS[args.scenario](args, rng, installed)
+    params = {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "tolerance", "scenario")}
+    result = {"scenario": args.scenario, "params": params, "metrics": metrics}
+
+    output = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Quantized vs float32 retrieval benchmark for the local vector store.
+
+Builds a synthetic clustered corpus (MiniLM-sized, 384 dims), then reports for
+each storage mode: memory per million chunks, query latency percentiles and
+recall@k against exact float32 search.
+
+    python benchmarks/vector_quantization.py --chunks 200000 --queries 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Backend.services.vector_store import LocalVectorStore
+
+# (quantization, rescore, rescore_factor)
+MODES = [
+    ("float32", False, 0),
+    ("int8", False, 0),
+    ("int8", True, 4),
+    ("binary", False, 0),
+    ("binary", True, 4),
+    ("binary", True, 20),
+]
+
+
+def synthetic_corpus(n: int, dim: int, clusters: int, rng) -> np.ndarray:
+    # Clustered data is closer to real embeddings than uniform noise
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    return centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def percentile(values, p):
+    return round(float(np.percentile(values, p)), 3)
+
+
+def run(args) -> dict:
+    rng = np.random.default_rng(args.seed)
+    corpus = synthetic_corpus(args.chunks, args.dim, args.clusters, rng)
+    queries = corpus[rng.integers(0, args.chunks, args.queries)] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    ids = [str(i) for i in range(args.chunks)]
+    metadata = [{"user_id": i % args.users} for i in range(args.chunks)]
+
+    results = []
+    ground_truth = None
+    for quantization, rescore, rescore_factor in MODES:
+        store = LocalVectorStore(dim=args.dim, quantization=quantization, rescore=rescore, rescore_factor=rescore_factor)
+        for start in range(0, args.chunks, 10000):
+            end = min(start + 10000, args.chunks)
+            store.upsert(list(zip(ids[start:end], corpus[start:end], metadata[start:end])))
+
+        latencies, found = [], []
+        for q in queries:
+            started = time.perf_counter()
+            matches = store.query(q, top_k=args.top_k, filter={"user_id": 0} if args.filtered else None)["matches"]
+            latencies.append((time.perf_counter() - started) * 1000)
+            found.append({m["id"] for m in matches})
+
+        if ground_truth is None:        # float32 runs first and is exact
+            ground_truth = found
+        recall = np.mean([len(f & g) / max(len(g), 1) for f, g in zip(found, ground_truth)])
+
+        memory = store.memory_bytes()
+        per_million = 1_000_000 / args.chunks
+        results.append({
+            "quantization": quantization,
+            "rescore_factor": rescore_factor if rescore else None,
+            "index_mb_per_million": round(memory["index"] * per_million / 2**20, 1),
+            "rescore_mb_per_million": round(memory["rescore"] * per_million / 2**20, 1),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            f"recall@{args.top_k}": round(float(recall), 4),
+        })
+    return {"chunks": args.chunks, "dim": args.dim, "filtered": args.filtered, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--filtered", action="store_true", help="filter on one user_id like process_query does")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,57 @@
+import os
+import logging
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from Backend.database.database import Engine, Base
-from Backend.routes import auth, user, admin, upload, ask
+from Backend.database.database import Engine, Base, ensure_schema
+from Backend.routes import auth, user, admin, upload, ask, chat, health, metrics
+from Backend.services import clients
+from Backend.services.email_service import outbox_sender
+from Backend.services.otp_purge import otp_purger
+from Backend.services.upload_service import shutdown_extract_pool
+
+logging.basicConfig()
+logging.getLogger("Backend").setLevel(os.getenv("LOG_LEVEL", "INFO"))
+logger = logging.getLogger("Backend.warmup")
+
+
+def _warmup():
+    try:
+        clients.warmup()
+    except Exception:
+        # /health/ready keeps reporting not ready, /health/warmup can retry
+        logger.exception("Warming up the embedding model and API clients failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables
+    Base.metadata.create_all(bind=Engine)
+    ensure_schema(Engine)
+
+    # Load the embedding model and API clients once, in the background, so the
+    # worker starts accepting connections right away (see /health/ready)
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        threading.Thread(target=_warmup, name="warmup", daemon=True).start()
+
+    # Background sender for queued emails (OTP etc.)
+    if os.getenv("EMAIL_OUTBOX_SENDER_ENABLED", "true").lower() == "true":
+        outbox_sender.start()
+
+    # Periodic delete of expired OTPs
+    if os.getenv("OTP_PURGE_ENABLED", "true").lower() == "true":
+        otp_purger.start()
+    yield
+    otp_purger.stop()
+    outbox_sender.stop()
+    shutdown_extract_pool()
 
-# Create tables
-Base.metadata.create_all(bind=Engine)
 
 app = FastAPI(
     title="Intern Technical Assessment",
     version="1.0",
-    description="Implemented using FastAPI and PostgreSQL"
+    description="Implemented using FastAPI and PostgreSQL",
+    lifespan=lifespan
 )
 
 # Include routers
@@ -17,3 +60,6 @@ app.include_router(user.router)
 app.include_router(admin.router)
 app.include_router(upload.router)
 app.include_router(ask.router)
+app.include_router(chat.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
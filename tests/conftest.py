@@ -0,0 +1,22 @@
+import os
+import socket
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# Must be set before the Backend modules read their configuration
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='tests-'), 'test.db')}"
+os.environ["SMTP_HOST"] = "127.0.0.1"
+os.environ["SMTP_PORT"] = str(_free_port())
+os.environ["SMTP_USE_TLS"] = "false"
+os.environ.pop("SMTP_EMAIL", None)
+os.environ.pop("SMTP_PASSWORD", None)
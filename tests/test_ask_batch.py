@@ -0,0 +1,40 @@
+"""
+process_query_batch returns an answer or an error per question, so one
+failed LLM call does not fail the whole batch.
+"""
+
+import numpy as np
+import pytest
+from Backend.services import ask_service
+from Backend.services.catalogue import Catalogue
+from Backend.services.llm_gateway import LLMError
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    counted = []
+    monkeypatch.setattr(ask_service.catalogue_cache, "get", lambda db, user_id: Catalogue(user_id, ((1, "v1", 3),)))
+    monkeypatch.setattr(ask_service, "encode_texts", lambda texts: np.zeros((len(texts), 4), dtype=np.float32))
+    monkeypatch.setattr(ask_service, "increment_questions", lambda db, user_id, count=1: counted.append(count))
+
+    def answer(query, query_embedding, user_id):
+        if query.startswith("fail"):
+            raise LLMError("LLM unavailable")
+        return f"answer to {query}"
+
+    monkeypatch.setattr(ask_service, "_answer", answer)
+    return counted
+
+
+def test_failed_question_does_not_fail_the_batch(counted):
+    answers, errors = ask_service.process_query_batch(["one", "fail two", "three"], 1, db=None)
+
+    assert answers == ["answer to one", None, "answer to three"]
+    assert errors == [None, "LLM unavailable", None]
+    assert counted == [2]
+
+
+def test_batch_fails_when_every_question_failed(counted):
+    with pytest.raises(LLMError):
+        ask_service.process_query_batch(["fail one", "fail two"], 2, db=None)
+    assert counted == []
@@ -0,0 +1,64 @@
+"""
+process_chat_query holds no transaction during the LLM call, and a failed
+summary roll-up keeps the previous summary instead of failing the turn.
+"""
+
+import numpy as np
+import pytest
+from Backend.database.database import Base, Engine, session_local
+from Backend.models import User
+from Backend.services import chat_service
+from Backend.services.catalogue import Catalogue
+from Backend.services.chat_service import CHAT_RECENT_TURNS, CHAT_SUMMARY_BATCH, create_session, process_chat_query
+from Backend.services.llm_gateway import LLMError
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=Engine)
+    session = session_local()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def chat(db, monkeypatch):
+    user = User(name="chat", email=f"chat-{id(db)}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    calls = {"summaries": [], "fail_summary": True}
+    monkeypatch.setattr(chat_service.catalogue_cache, "get", lambda db, user_id: Catalogue(user_id, ((1, "v1", 3),)))
+    monkeypatch.setattr(chat_service, "encode_texts", lambda texts: np.ones((len(texts), 4), dtype=np.float32))
+    monkeypatch.setattr(chat_service, "retrieve", lambda query, emb, user_id: [{"id": "c1", "metadata": {"chunk": "text"}}])
+    monkeypatch.setattr(chat_service, "increment_questions", lambda db, user_id: db.commit())
+
+    def complete(prompt, pipeline):
+        assert not db.in_transaction(), "a connection is held during the LLM call"
+        if pipeline == "chat_summary":
+            calls["summaries"].append(prompt)
+            if calls["fail_summary"]:
+                raise LLMError("LLM unavailable")
+            return "summary", None
+        return "answer", None
+
+    monkeypatch.setattr(chat_service, "complete", complete)
+    return user, create_session(db, user.id), calls
+
+
+def test_failed_summary_keeps_the_turn_and_the_old_summary(db, chat):
+    user, session, calls = chat
+    turns = CHAT_RECENT_TURNS + CHAT_SUMMARY_BATCH
+    for i in range(turns):
+        result = process_chat_query(session.id, f"question {i}", user.id, db)
+        assert result["answer"] == "answer" and result["turn_id"] is not None
+
+    db.refresh(session)
+    assert len(calls["summaries"]) == 1
+    assert session.summary is None and session.summarized_turns == 0
+
+    # The next turn retries the roll-up
+    calls["fail_summary"] = False
+    process_chat_query(session.id, "one more", user.id, db)
+    db.refresh(session)
+    assert session.summary == "summary"
+    assert session.summarized_turns == turns + 1 - CHAT_RECENT_TURNS
@@ -0,0 +1,158 @@
+"""
+Email outbox against a local aiosmtpd sink: enqueue -> drain -> delivered,
+retries with backoff, and giving up after OUTBOX_MAX_ATTEMPTS or the OTP expiry.
+"""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from aiosmtpd.controller import Controller
+from Backend.database.database import Base, Engine, session_local
+from Backend.models import EmailOutbox
+from Backend.services import email_service
+from Backend.services.email_service import (
+    OUTBOX_MAX_ATTEMPTS, enqueue_otp_email, outbox_sender, purge_finished_emails, send_pending_batch,
+)
+
+
+class SinkHandler:
+    """Keeps delivered messages, refuses recipients starting with "reject"."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("reject"):
+            return "550 mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode()))
+        return "250 Message accepted for delivery"
+
+
+@pytest.fixture
+def smtp_sink():
+    handler = SinkHandler()
+    controller = Controller(handler, hostname=email_service.SMTP_HOST, port=email_service.SMTP_PORT)
+    controller.start()
+    yield handler
+    email_service.smtp_pool.close_all()
+    controller.stop()
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=Engine)
+    session = session_local()
+    session.query(EmailOutbox).delete()
+    session.commit()
+    yield session
+    session.close()
+
+
+def _in(seconds: float) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+def _make_due(db, entry) -> None:
+    entry.next_attempt_at = _in(-1)
+    db.commit()
+
+
+def test_enqueued_email_is_delivered(smtp_sink, db):
+    entry = enqueue_otp_email(db, "user@example.com", "123456", _in(300))
+    db.commit()
+
+    assert outbox_sender.drain() == 1
+
+    db.refresh(entry)
+    assert entry.status == "sent"
+    assert entry.sent_at is not None
+    assert entry.body == ""                 # the plain OTP is not kept once sent
+    [(recipients, content)] = smtp_sink.messages
+    assert recipients == ["user@example.com"]
+    assert "123456" in content
+
+
+def test_failed_send_is_retried_with_backoff(smtp_sink, db):
+    entry = enqueue_otp_email(db, "reject@example.com", "123456")
+    db.commit()
+
+    before = datetime.now(timezone.utc)
+    assert send_pending_batch(db) == 1
+
+    db.refresh(entry)
+    assert entry.status == "pending"
+    assert entry.attempts == 1
+    assert entry.last_error is not None
+    assert email_service._as_utc(entry.next_attempt_at) > before + timedelta(seconds=20)
+    # Not due yet
+    assert send_pending_batch(db) == 0
+
+
+def test_failed_after_max_attempts(smtp_sink, db):
+    entry = enqueue_otp_email(db, "reject@example.com", "123456")
+    db.commit()
+
+    for attempt in range(1, OUTBOX_MAX_ATTEMPTS + 1):
+        assert send_pending_batch(db) == 1
+        db.refresh(entry)
+        assert entry.attempts == attempt
+        if attempt < OUTBOX_MAX_ATTEMPTS:
+            assert entry.status == "pending"
+            _make_due(db, entry)
+
+    assert entry.status == "failed"
+    assert entry.body == ""
+    assert smtp_sink.messages == []
+
+
+def test_no_retry_past_expiry(smtp_sink, db):
+    # The first backoff (~30s) ends after the OTP expired, so it gives up right away
+    entry = enqueue_otp_email(db, "reject@example.com", "123456", _in(10))
+    db.commit()
+
+    assert send_pending_batch(db) == 1
+    db.refresh(entry)
+    assert entry.status == "failed"
+    assert entry.attempts == 1
+    assert entry.body == ""
+
+
+def test_expired_email_is_not_sent(smtp_sink, db):
+    entry = enqueue_otp_email(db, "user@example.com", "123456", _in(-1))
+    db.commit()
+
+    assert send_pending_batch(db) == 0
+    db.refresh(entry)
+    assert entry.status == "failed"
+    assert entry.last_error == "Expired"
+    assert entry.body == ""
+    assert smtp_sink.messages == []
+
+
+def test_purge_finished_emails(smtp_sink, db):
+    sent = enqueue_otp_email(db, "user@example.com", "111111", _in(300))
+    pending = enqueue_otp_email(db, "other@example.com", "222222", _in(300))
+    db.commit()
+    sent_id, pending_id = sent.id, pending.id
+    send_pending_batch(db, batch_size=1)     # only the first one goes out
+
+    assert purge_finished_emails(db, _in(60), batch_size=100) == 1
+    assert [e.id for e in db.query(EmailOutbox)] == [pending_id]
+    assert sent_id != pending_id
+
+
+def test_sender_purges_rows_past_retention(smtp_sink, db):
+    old = enqueue_otp_email(db, "user@example.com", "111111", _in(300))
+    recent = enqueue_otp_email(db, "other@example.com", "222222", _in(300))
+    db.commit()
+    send_pending_batch(db)
+    old.created_at = _in(-email_service.OUTBOX_RETENTION_SECONDS - 60)
+    db.commit()
+    recent_id = recent.id
+
+    assert outbox_sender.purge(batch_size=1) == 1
+    db.expire_all()
+    assert [e.id for e in db.query(EmailOutbox)] == [recent_id]
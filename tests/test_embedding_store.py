@@ -0,0 +1,131 @@
+"""
+Embedding store: lookups through table.bin across store instances (as
+separate processes would open it), table growth, and the crash cases from
+the module docstring (torn tails, a log record without its table slot, a
+record pointing past the rows on disk, a store written before table.bin).
+"""
+
+import os
+import numpy as np
+import pytest
+from Backend.services import embedding_store
+from Backend.services.embedding_store import EmbeddingStore, chunk_key
+
+DIM = 8
+
+
+def _vectors(texts: list) -> np.ndarray:
+    return np.stack([np.random.default_rng(int.from_bytes(chunk_key(t)[:8], "little")).random(DIM, dtype=np.float32) for t in texts])
+
+
+def _texts(n: int, prefix: str = "chunk") -> list:
+    return [f"{prefix} {i}" for i in range(n)]
+
+
+def _assert_stored(store: EmbeddingStore, texts: list) -> None:
+    vectors, found = store.get_many([chunk_key(t) for t in texts])
+    assert found.all()
+    np.testing.assert_array_equal(vectors, _vectors(texts))
+
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path)
+
+
+def _open(root: str, **kwargs) -> EmbeddingStore:
+    return EmbeddingStore(root, "test-model", **kwargs)
+
+
+def test_put_get_and_reopen(root):
+    texts = _texts(100)
+    store = _open(root)
+    assert store.put_many([chunk_key(t) for t in texts], _vectors(texts)) == 100
+    assert store.put_many([chunk_key(t) for t in texts[:10]], _vectors(texts[:10])) == 0     # already stored
+    _assert_stored(store, texts)
+
+    reopened = _open(root)
+    assert len(reopened) == 100
+    _assert_stored(reopened, texts)
+    _, found = reopened.get_many([chunk_key("never stored")])
+    assert not found.any()
+
+
+def test_growth_seen_by_other_instances(root):
+    # Tiny table: every instance writes through several rebuilds of table.bin
+    reader = _open(root, table_slots=4)
+    writer = _open(root, table_slots=4)
+    texts = _texts(1000)
+    for start in range(0, len(texts), 100):
+        batch = texts[start:start + 100]
+        writer.put_many([chunk_key(t) for t in batch], _vectors(batch))
+    assert writer.stats()["table_slots"] >= 2048
+
+    _assert_stored(reader, texts)
+    more = _texts(50, prefix="reader")
+    reader.put_many([chunk_key(t) for t in more], _vectors(more))
+    _assert_stored(writer, texts + more)
+    assert len(_open(root)) == 1050
+
+
+def test_torn_tails_are_cut(root):
+    texts = _texts(20)
+    running = _open(root)
+    running.put_many([chunk_key(t) for t in texts], _vectors(texts))
+    # Another process died half way through a row and a log record
+    with open(os.path.join(running.path, "seg-00000.f32"), "ab") as f:
+        f.write(b"\x01" * (DIM * 4 // 2))
+    with open(os.path.join(running.path, "index.bin"), "ab") as f:
+        f.write(b"\x02" * 10)
+
+    # A process that was already running appends after the cut
+    more = _texts(5, prefix="after")
+    assert running.put_many([chunk_key(t) for t in more], _vectors(more)) == 5
+    _assert_stored(running, texts + more)
+    _assert_stored(_open(root), texts + more)
+
+
+def test_log_record_without_table_slot_is_replayed(root, monkeypatch):
+    store = _open(root)
+    texts = _texts(30)
+    store.put_many([chunk_key(t) for t in texts[:10]], _vectors(texts[:10]))
+
+    # Crash after the rows and log records were written, before the table slots
+    def crash(*args, **kwargs):
+        raise SystemExit("killed")
+
+    monkeypatch.setattr(embedding_store._KeyTable, "insert", crash)
+    with pytest.raises(SystemExit):
+        store.put_many([chunk_key(t) for t in texts[10:]], _vectors(texts[10:]))
+    monkeypatch.undo()
+
+    _assert_stored(_open(root), texts)
+
+
+def test_location_past_the_rows_on_disk_is_not_stored(root):
+    store = _open(root)
+    texts = _texts(10)
+    store.put_many([chunk_key(t) for t in texts], _vectors(texts))
+    # The last row was lost (e.g. an OS crash) although its records made it to disk
+    segment = os.path.join(store.path, "seg-00000.f32")
+    with open(segment, "r+b") as f:
+        f.truncate(os.path.getsize(segment) - DIM * 4)
+
+    reopened = _open(root)
+    _, found = reopened.get_many([chunk_key(t) for t in texts])
+    assert found.tolist() == [True] * 9 + [False]
+    assert reopened.put_many([chunk_key(texts[-1])], _vectors(texts[-1:])) == 1
+    _assert_stored(reopened, texts)
+    _assert_stored(_open(root), texts)
+
+
+def test_store_without_table_is_rebuilt_from_the_log(root):
+    texts = _texts(200)
+    store = _open(root)
+    store.put_many([chunk_key(t) for t in texts], _vectors(texts))
+    # Lost, or written by a version that had no table.bin
+    os.remove(os.path.join(store.path, "table.bin"))
+
+    reopened = _open(root)
+    assert len(reopened) == 200
+    _assert_stored(reopened, texts)
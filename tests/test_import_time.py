@@ -0,0 +1,19 @@
+"""
+`python -X importtime -c "import main"` must not load the model or API
+client packages, they are imported on first use (see benchmarks/import_time.py).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from import_time import HEAVY_MODULES, measure
+
+
+def test_main_does_not_import_heavy_modules():
+    rows = measure("main")
+    imported = {r["module"].strip() for r in rows}
+    assert "main" in imported
+    heavy = sorted(m for m in imported if m.split(".")[0] in HEAVY_MODULES)
+    assert heavy == []
@@ -0,0 +1,65 @@
+"""
+LLM gateway: fallback once the primary model keeps failing with retryable
+errors, LLMTimeoutError within the deadline on a stalled provider, and a
+non-retryable 4xx from the HTTP provider tried only once.
+"""
+
+import time
+import httpx
+import pytest
+from Backend.services.llm_gateway import (
+    FakeProvider, LLMError, LLMGateway, LLMTimeoutError, OpenAICompatibleProvider,
+)
+
+
+def _gateway(provider, **kwargs) -> LLMGateway:
+    options = {"model": "primary", "fallback_model": "fallback", "deadline": 5, "attempt_timeout": 1,
+               "max_retries": 2, "retry_base": 0.001, "hedge": False}
+    options.update(kwargs)
+    return LLMGateway(provider, **options)
+
+
+def test_falls_back_when_the_primary_keeps_failing():
+    # Every primary attempt runs past the attempt timeout (a retryable error)
+    provider = FakeProvider(model_latency_ms={"primary": 10_000, "fallback": 1})
+    gateway = _gateway(provider, attempt_timeout=0.02)
+
+    result = gateway.complete("question")
+
+    assert result.model == "fallback"
+    assert provider.calls == 3 + 1          # max_retries + 1 on the primary, then the fallback
+
+
+def test_every_model_failing_raises_llm_error():
+    provider = FakeProvider(failure_rate=1)
+    with pytest.raises(LLMError, match="LLM unavailable") as failed:
+        _gateway(provider).complete("question")
+    assert not isinstance(failed.value, LLMTimeoutError)
+    assert provider.calls == 2 * 3
+
+
+def test_stalled_provider_times_out_within_the_deadline():
+    provider = FakeProvider(stall_rate=1, stall_ms=10_000)
+    gateway = _gateway(provider, deadline=5, attempt_timeout=5)
+
+    started = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        gateway.complete("question", deadline=0.2)
+    assert time.monotonic() - started < 0.5
+
+
+def test_client_error_is_not_retried():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(400, json={"error": "bad request"})
+
+    provider = OpenAICompatibleProvider("http://llm.test/v1", "key")
+    provider._client = httpx.Client(base_url="http://llm.test/v1", transport=httpx.MockTransport(handler))
+
+    with pytest.raises(LLMError, match="returned 400") as failed:
+        _gateway(provider).complete("question")
+    assert not isinstance(failed.value, LLMTimeoutError)
+    assert len(requests) == 1
+    provider.close()
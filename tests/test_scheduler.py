@@ -0,0 +1,125 @@
+"""
+Admission control: a freed slot goes to a waiting ask before ingest, a full
+queue or a too long wait becomes 429 with Retry-After, a cancelled waiter
+does not leak its slot, and a cost above burst leaves the bucket in debt.
+"""
+
+import asyncio
+from types import SimpleNamespace
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from Backend.dependencies import admission as admission_module
+from Backend.dependencies.admission import admission
+from Backend.dependencies.jwt_dependency import require_user
+from Backend.services.scheduler import AdmissionRejected, Scheduler, TokenBucket
+
+
+def _scheduler(slots: int = 1, ingest_max_slots: int = 1, queue_max: int = 10, queue_timeout: float = 5) -> Scheduler:
+    scheduler = Scheduler(slots=slots, ingest_max_slots=ingest_max_slots, enabled=True)
+    scheduler.queue_max = {"ask": queue_max, "ingest": queue_max}
+    scheduler.queue_timeout = {"ask": queue_timeout, "ingest": queue_timeout}
+    return scheduler
+
+
+def test_freed_slot_goes_to_ask_before_ingest():
+    async def run():
+        scheduler = _scheduler()
+        running = await scheduler.acquire("ingest", 1)
+        order = []
+
+        async def job(work_class, user_id):
+            token = await scheduler.acquire(work_class, user_id)
+            order.append(work_class)
+            scheduler.release(token)
+
+        # Ingest queued first, the ask arrives later but goes first
+        waiters = [asyncio.create_task(job("ingest", 2))]
+        await asyncio.sleep(0)
+        waiters.append(asyncio.create_task(job("ask", 3)))
+        await asyncio.sleep(0)
+        assert scheduler.interactive_active()
+
+        scheduler.release(running)
+        await asyncio.gather(*waiters)
+        assert order == ["ask", "ingest"]
+        assert scheduler._running == {"ask": 0, "ingest": 0}
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def run():
+        scheduler = _scheduler()
+        running = await scheduler.acquire("ask", 1)
+        waiter = asyncio.create_task(scheduler.acquire("ask", 2))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler._waiting["ask"] == []
+
+        scheduler.release(running)
+        assert scheduler._running == {"ask": 0, "ingest": 0}
+        assert scheduler._running_by_user == {}
+        # The slot is free for the next request right away
+        scheduler.release(await asyncio.wait_for(scheduler.acquire("ask", 3), timeout=1))
+
+    asyncio.run(run())
+
+
+def test_cost_above_burst_is_allowed_from_a_full_bucket_and_leaves_debt():
+    bucket = TokenBucket(rate=1, burst=5)
+    assert bucket.take(8) == 0
+    assert bucket.tokens == pytest.approx(-3, abs=0.01)
+    # The debt is paid back before anything else is allowed
+    assert bucket.take(1) == pytest.approx(4, abs=0.01)
+    assert bucket.take(8) == pytest.approx(8, abs=0.01)
+
+
+def test_rate_limited_request_is_rejected_with_a_retry_hint():
+    async def run():
+        scheduler = _scheduler(slots=4)
+        scheduler.limiters["ask"].rate, scheduler.limiters["ask"].burst = 1, 2
+        scheduler.release(await scheduler.acquire("ask", 1, cost=2))
+        with pytest.raises(AdmissionRejected) as rejected:
+            await scheduler.acquire("ask", 1)
+        assert rejected.value.retry_after == pytest.approx(1, abs=0.01)
+        # Another user has a bucket of their own
+        scheduler.release(await scheduler.acquire("ask", 2))
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def busy(monkeypatch):
+    """An app behind admission("ask") whose only slot is taken by another user."""
+    app = FastAPI()
+
+    @app.get("/ask", dependencies=[Depends(admission("ask"))])
+    def ask():
+        return {"answer": "ok"}
+
+    app.dependency_overrides[require_user] = lambda: SimpleNamespace(id=1)
+
+    def use(**kwargs):
+        scheduler = _scheduler(**kwargs)
+        scheduler._start("ask", 2)
+        monkeypatch.setattr(admission_module, "scheduler", scheduler)
+        return TestClient(app), scheduler
+
+    return use
+
+
+@pytest.mark.parametrize("kwargs", [{"queue_max": 0}, {"queue_timeout": 0.05}], ids=["queue_full", "queue_timeout"])
+def test_busy_scheduler_returns_429_with_retry_after(busy, kwargs):
+    client, scheduler = busy(**kwargs)
+    response = client.get("/ask")
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert scheduler._waiting["ask"] == []
+
+    scheduler.release(("ask", 2, 0))
+    assert client.get("/ask").json() == {"answer": "ok"}
+    assert scheduler._running["ask"] == 0
@@ -0,0 +1,66 @@
+"""
+ensure_schema on a database created before a column and the OTP indexes
+were added, including a worker that loses the race to another one at boot.
+"""
+
+import os
+import tempfile
+from sqlalchemy import create_engine, inspect, text
+from Backend.database import database
+from Backend.database.database import Base, ensure_schema
+import Backend.models  # noqa: F401  registers the tables
+
+
+def _old_database():
+    path = os.path.join(tempfile.mkdtemp(prefix="schema-"), "old.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_otp_reset_email_used_expires"))
+        conn.execute(text("DROP INDEX ix_otp_reset_expires_at"))
+        conn.execute(text("ALTER TABLE email_outbox DROP COLUMN expires_at"))
+    return engine
+
+
+def test_adds_missing_columns_and_indexes():
+    engine = _old_database()
+    ensure_schema(engine)
+    ensure_schema(engine)       # nothing left to do the second time
+
+    inspector = inspect(engine)
+    assert "expires_at" in {c["name"] for c in inspector.get_columns("email_outbox")}
+    assert {"ix_otp_reset_email_used_expires", "ix_otp_reset_expires_at"} <= {
+        i["name"] for i in inspector.get_indexes("otp_reset")
+    }
+
+
+class _Snapshot:
+    """Answers like an inspector, from the schema as it was when taken."""
+
+    def __init__(self, bind):
+        inspector = inspect(bind)
+        self.tables = inspector.get_table_names()
+        self.columns = {t: inspector.get_columns(t) for t in self.tables}
+        self.indexes = {t: inspector.get_indexes(t) for t in self.tables}
+
+    def get_table_names(self):
+        return self.tables
+
+    def get_columns(self, table):
+        return self.columns[table]
+
+    def get_indexes(self, table):
+        return self.indexes[table]
+
+
+def test_worker_losing_the_race_carries_on(monkeypatch):
+    engine = _old_database()
+    # This worker inspected the old schema, then another worker migrated it
+    snapshot = _Snapshot(engine)
+    ensure_schema(engine)
+
+    inspectors = iter([snapshot])
+    monkeypatch.setattr(database, "inspect", lambda bind: next(inspectors, None) or inspect(bind))
+    ensure_schema(engine)
+
+    assert "expires_at" in {c["name"] for c in inspect(engine).get_columns("email_outbox")}